@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""Avatar Partitioning Benchmark.
+
+Simulates render jobs with Zipf-distributed avatar popularity being
+published to a partitioned ``videoJob`` topic and rendered by one pod per
+partition, each with a small LRU avatar cache. For each partitioning
+strategy of the orchestrate job runner it reports the per-partition skew
+(busiest partition relative to the mean) and the renderer cache hit rate:
+
+  * ``random``: unkeyed messages, as published before.
+  * ``avatar``: keyed by avatar, placed by rendezvous hashing.
+  * ``hot-split``: as ``avatar``, with hot avatars split over sub-keys.
+
+Usage:
+    python benchmarks/avatar_partitioning.py --jobs 20000 --partitions 12
+
+Author: Ruslan Magana (https://ruslanmv.com)
+License: Apache 2.0
+"""
+
+import argparse
+import random
+import sys
+import uuid
+from collections import Counter, OrderedDict
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+# Add service to path
+sys.path.insert(
+    0, str(Path(__file__).parent.parent / "services" / "orchestrate-service")
+)
+
+import partitioning
+
+
+def zipf_avatars(jobs: int, avatars: int, exponent: float, seed: int) -> List[str]:
+    """Return the avatar of each job, drawn with Zipf popularity."""
+    rng = random.Random(seed)
+    weights = [1 / rank**exponent for rank in range(1, avatars + 1)]
+    names = [f"avatar_{rank:04d}" for rank in range(1, avatars + 1)]
+    return rng.choices(names, weights=weights, k=jobs)
+
+
+def run(
+    strategy: str,
+    stream: List[str],
+    partitions: int,
+    cache_size: int,
+    tracker: Optional[partitioning.HotKeyTracker],
+) -> Tuple[float, float]:
+    """Place and render a job stream; return (partition skew, cache hit rate)."""
+    all_partitions = list(range(partitions))
+    caches = [OrderedDict() for _ in all_partitions]
+    counts: Counter = Counter()
+    hits = 0
+
+    random.seed(0)
+    for avatar in stream:
+        key = (
+            None
+            if strategy == "random"
+            else partitioning.message_key(avatar, str(uuid.uuid4()), tracker)
+        )
+        target = partitioning.partition(key, all_partitions, all_partitions)
+        counts[target] += 1
+
+        cache = caches[target]
+        if avatar in cache:
+            hits += 1
+            cache.move_to_end(avatar)
+        else:
+            cache[avatar] = True
+            if len(cache) > cache_size:
+                cache.popitem(last=False)
+
+    return partitioning.skew(counts, all_partitions), hits / len(stream)
+
+
+def main() -> None:
+    """Compare the partitioning strategies and print a table."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--jobs", type=int, default=20000)
+    parser.add_argument("--avatars", type=int, default=300)
+    parser.add_argument("--zipf", type=float, default=1.1, help="Popularity exponent")
+    parser.add_argument(
+        "--partitions", type=int, default=12, help="Partitions, one renderer pod each"
+    )
+    parser.add_argument(
+        "--cache-size", type=int, default=20, help="Avatars cached per pod"
+    )
+    parser.add_argument(
+        "--hot-share", type=float, default=partitioning.HOT_AVATAR_SHARE
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    partitioning.AVATAR_PARTITIONING = True
+    stream = zipf_avatars(args.jobs, args.avatars, args.zipf, args.seed)
+    top_share = Counter(stream).most_common(1)[0][1] / len(stream)
+    print(
+        f"{args.jobs} jobs, {args.avatars} avatars (zipf {args.zipf}, top avatar {top_share:.0%}), "
+        f"{args.partitions} partitions, {args.cache_size} cached avatars per pod\n"
+    )
+    print(f"{'strategy':>10} {'skew':>6} {'hit rate':>9}")
+
+    trackers = {
+        "random": None,
+        "avatar": partitioning.HotKeyTracker(share=1.0, static={}),
+        "hot-split": partitioning.HotKeyTracker(share=args.hot_share, static={}),
+    }
+    baseline = None
+    for strategy, tracker in trackers.items():
+        skew, hit_rate = run(
+            strategy, stream, args.partitions, args.cache_size, tracker
+        )
+        baseline = hit_rate if baseline is None else baseline
+        print(
+            f"{strategy:>10} {skew:>6.2f} {hit_rate:>8.1%}  ({hit_rate - baseline:+.1%} hit rate vs random)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Renderer CPU Scaling Benchmark.
+
+Renders a fixed sample job with the renderer's CPU backend at increasing
+worker counts and reports wall time, speedup and parallel efficiency
+relative to one worker. The worker pool is warmed up before each
+measurement so process start-up is not counted.
+
+Each worker encodes its segment with ffmpeg when it is installed. ``--work``
+adds synthetic per-frame hashing in place of the lip-sync model, which the
+renderer does not run on CPU; pass ``--work 0`` to measure encoding alone.
+
+Usage:
+    python benchmarks/renderer_cpu_scaling.py --frames 500 --work 200
+    python benchmarks/renderer_cpu_scaling.py --workers 1,2,4,8,16
+
+Author: Ruslan Magana (https://ruslanmv.com)
+License: Apache 2.0
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+# Add renderer to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "renderer"))
+
+import cpu_backend
+
+# Synthetic per-frame work (rounds of hashing a 64 KiB tile)
+DEFAULT_WORK = 200
+
+
+def default_worker_counts() -> List[int]:
+    """Return powers of two up to the number of physical cores, plus that number."""
+    cores = len(cpu_backend.physical_cores())
+    counts = []
+    count = 1
+    while count < cores:
+        counts.append(count)
+        count *= 2
+    return counts + [cores]
+
+
+def main() -> None:
+    """Run the sample job at each worker count and print a scaling table."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument(
+        "--frames", type=int, default=500, help="Frames in the sample job"
+    )
+    parser.add_argument(
+        "--work",
+        type=int,
+        default=DEFAULT_WORK,
+        help="Synthetic model work per frame (0 = encoding only)",
+    )
+    parser.add_argument(
+        "--workers", help="Comma-separated worker counts (default: 1,2,4..cores)"
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per worker count")
+    args = parser.parse_args()
+
+    counts = (
+        [int(c) for c in args.workers.split(",")]
+        if args.workers
+        else default_worker_counts()
+    )
+    cores = cpu_backend.physical_cores()
+    print(f"Physical cores available: {len(cores)} (CPUs {cores})")
+    print(f"Sample job: {args.frames} frames, synthetic work {args.work} per frame\n")
+    print(f"{'workers':>7} {'seconds':>9} {'speedup':>8} {'efficiency':>10}")
+
+    baseline = None
+    with tempfile.TemporaryDirectory() as tmp:
+        output = Path(tmp) / "sample.mp4"
+        for workers in counts:
+            # Warm up the pool so spawning workers is not measured
+            cpu_backend.render_frames(
+                "bench", tmp, workers, output, workers=workers, work=1
+            )
+
+            times = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                cpu_backend.render_frames(
+                    "bench", tmp, args.frames, output, workers=workers, work=args.work
+                )
+                times.append(time.perf_counter() - start)
+
+            best = min(times)
+            baseline = baseline or best * counts[0]
+            speedup = baseline / best
+            print(
+                f"{workers:>7} {best:>9.2f} {speedup:>8.2f} {speedup / workers:>10.0%}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""Renderer Transfer Benchmark.
+
+Measures upload and download throughput of the renderer's multipart transfers
+against a local S3 stand-in while varying part size and concurrency.
+
+By default an in-process moto server is started; pass ``--endpoint`` to run
+against MinIO or another S3-compatible server instead.
+
+Usage:
+    pip install boto3 "moto[server]"
+    python benchmarks/renderer_transfer.py --size-mb 256 --part-sizes 8,16,32 --concurrency 1,4,8
+
+    # Against MinIO
+    docker run -p 9000:9000 minio/minio server /data
+    python benchmarks/renderer_transfer.py --endpoint http://localhost:9000 \\
+        --access-key minioadmin --secret-key minioadmin
+
+Author: Ruslan Magana (https://ruslanmv.com)
+License: Apache 2.0
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, List
+
+# Add renderer to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "renderer"))
+
+import transfer
+
+MB = 1024 * 1024
+
+
+def _int_list(value: str) -> List[int]:
+    """Parse a comma-separated list of integers."""
+    return [int(item) for item in value.split(",") if item]
+
+
+def make_client(args: argparse.Namespace) -> Any:
+    """Return an S3 client for the benchmark endpoint, starting moto if needed."""
+    import boto3
+    from botocore.config import Config
+
+    endpoint = args.endpoint
+    if not endpoint:
+        from moto.server import ThreadedMotoServer
+
+        server = ThreadedMotoServer(port=args.moto_port)
+        server.start()
+        endpoint = f"http://127.0.0.1:{args.moto_port}"
+
+    return boto3.client(
+        "s3",
+        endpoint_url=endpoint,
+        aws_access_key_id=args.access_key,
+        aws_secret_access_key=args.secret_key,
+        region_name="us-east-1",
+        config=Config(max_pool_connections=max(_int_list(args.concurrency)) * 2),
+    )
+
+
+def main() -> None:
+    """Run the part size x concurrency grid and print a throughput table."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--endpoint", help="S3 endpoint URL (default: start moto)")
+    parser.add_argument("--access-key", default="testing")
+    parser.add_argument("--secret-key", default="testing")
+    parser.add_argument("--bucket", default="vg-transfer-bench")
+    parser.add_argument("--moto-port", type=int, default=5055)
+    parser.add_argument("--size-mb", type=int, default=128, help="Test file size")
+    parser.add_argument(
+        "--part-sizes", default="5,8,16,32,64", help="Part sizes in MiB"
+    )
+    parser.add_argument("--concurrency", default="1,2,4,8,16")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per grid cell")
+    args = parser.parse_args()
+
+    s3 = make_client(args)
+    try:
+        s3.create_bucket(Bucket=args.bucket)
+    except s3.exceptions.BucketAlreadyOwnedByYou:
+        pass
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / "video.mp4"
+        source.write_bytes(os.urandom(args.size_mb * MB))
+        target = Path(tmp) / "download.mp4"
+
+        print(f"File size: {args.size_mb} MiB, {args.repeat} run(s) per cell\n")
+        print(
+            f"{'part MiB':>8} {'workers':>7} {'upload MB/s':>12} {'download MB/s':>14}"
+        )
+
+        for part_mb in _int_list(args.part_sizes):
+            for workers in _int_list(args.concurrency):
+                transfer.TRANSFER_PART_SIZE = part_mb * MB
+                transfer.TRANSFER_CONCURRENCY = workers
+                transfer.TRANSFER_THRESHOLD = part_mb * MB
+                key = f"bench/{part_mb}-{workers}.mp4"
+
+                upload_times, download_times = [], []
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    transfer.upload_file(
+                        s3,
+                        source,
+                        args.bucket,
+                        key,
+                        part_size=part_mb * MB,
+                        concurrency=workers,
+                        threshold=part_mb * MB,
+                    )
+                    upload_times.append(time.perf_counter() - start)
+
+                    start = time.perf_counter()
+                    s3.download_file(
+                        args.bucket, key, str(target), Config=transfer.transfer_config()
+                    )
+                    download_times.append(time.perf_counter() - start)
+
+                upload = args.size_mb / min(upload_times)
+                download = args.size_mb / min(download_times)
+                print(f"{part_mb:>8} {workers:>7} {upload:>12.1f} {download:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
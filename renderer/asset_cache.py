@@ -0,0 +1,246 @@
+"""Node-Local Asset Cache for the GPU Renderer.
+
+Size-bounded, least-recently-used disk cache for objects fetched from IBM
+Cloud Object Storage (avatar images and similar read-only assets). Cached
+objects are revalidated against COS with their ETag (a conditional GET that
+returns 304 when unchanged) and hard-linked into each job's workspace, so a
+hit costs one small request and no copy.
+
+The cache directory may be shared by several renderer processes on a node
+(e.g. a hostPath volume); every write is an atomic rename and eviction
+tolerates files removed concurrently.
+
+Author: Ruslan Magana (https://ruslanmv.com)
+License: Apache 2.0
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Streaming block size for COS downloads
+CHUNK_SIZE = 1024 * 1024
+
+
+class FetchResult(NamedTuple):
+    """Outcome of a cache fetch.
+
+    Attributes:
+        hit: Whether the cached copy was still valid.
+        bytes_fetched: Bytes downloaded from COS for this fetch.
+    """
+
+    hit: bool
+    bytes_fetched: int
+
+
+def _is_not_modified(error: Exception) -> bool:
+    """Return whether a COS client error is a 304 Not Modified response."""
+    response: Dict[str, Any] = getattr(error, "response", None) or {}
+    code = str(response.get("Error", {}).get("Code", ""))
+    status = response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+    return code in ("304", "NotModified") or status == 304
+
+
+def link_or_copy(source: Path, dest: Path) -> None:
+    """Hard-link ``source`` to ``dest``, copying across filesystems.
+
+    Linked files share storage with the cache, so job code must treat them as
+    read-only.
+
+    Args:
+        source: Existing file.
+        dest: Path to create; replaced if it already exists.
+    """
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    dest.unlink(missing_ok=True)
+    try:
+        os.link(source, dest)
+    except OSError:
+        shutil.copy2(source, dest)
+
+
+class AssetCache:
+    """LRU disk cache of COS objects revalidated by ETag.
+
+    Args:
+        root: Cache directory.
+        max_bytes: Total size above which least recently used objects are evicted.
+
+    Example:
+        >>> cache = AssetCache(Path("/var/cache/videogenie/assets"), 5 * 1024**3)
+        >>> cache.fetch(s3, "bucket", "avatars/alice.png", Path("/tmp/job/avatar.png"))
+        FetchResult(hit=True, bytes_fetched=0)
+    """
+
+    def __init__(self, root: Path, max_bytes: int) -> None:
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._bytes_fetched = 0
+        self._warmed = 0
+
+    def _paths(self, bucket: str, key: str) -> Tuple[Path, Path]:
+        """Return the data and metadata paths of a cached object."""
+        digest = hashlib.sha256(f"{bucket}/{key}".encode()).hexdigest()
+        return self.root / digest, self.root / f"{digest}.json"
+
+    def _cached_etag(self, data_path: Path, meta_path: Path) -> Optional[str]:
+        """Return the ETag of a cached object, or None if it is not cached."""
+        try:
+            if not data_path.exists():
+                return None
+            return json.loads(meta_path.read_text()).get("etag")
+        except (OSError, ValueError):
+            return None
+
+    def fetch(
+        self, s3_client: Any, bucket: str, key: str, dest: Optional[Path]
+    ) -> FetchResult:
+        """Materialize a COS object at ``dest`` through the cache.
+
+        Args:
+            s3_client: boto3 S3 client.
+            bucket: COS bucket name.
+            key: Object key.
+            dest: Path in the job workspace to link the object to, or None to
+                only bring the cache up to date.
+
+        Returns:
+            FetchResult: Whether it was a hit and how many bytes were downloaded.
+
+        Raises:
+            botocore.exceptions.ClientError: If the object cannot be fetched.
+        """
+        result = self._fetch(s3_client, bucket, key, dest)
+        self._record(result)
+        logger.info(
+            f"Asset cache {'hit' if result.hit else 'miss'}: {key} "
+            f"({result.bytes_fetched} bytes fetched)"
+        )
+        return result
+
+    def _fetch(
+        self, s3_client: Any, bucket: str, key: str, dest: Optional[Path]
+    ) -> FetchResult:
+        """Revalidate or download an object and link it to ``dest``, if given."""
+        data_path, meta_path = self._paths(bucket, key)
+        etag = self._cached_etag(data_path, meta_path)
+
+        request: Dict[str, Any] = {"Bucket": bucket, "Key": key}
+        if etag:
+            request["IfNoneMatch"] = etag
+
+        try:
+            response = s3_client.get_object(**request)
+        except Exception as e:
+            if not (etag and _is_not_modified(e)):
+                raise
+            response = None
+
+        if response is None:
+            # Still valid: refresh its LRU position and link it
+            os.utime(data_path)
+            if dest:
+                link_or_copy(data_path, dest)
+            return FetchResult(hit=True, bytes_fetched=0)
+
+        fetched = 0
+        tmp_path = data_path.with_name(
+            f"{data_path.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        )
+        try:
+            with open(tmp_path, "wb") as file:
+                for block in iter(lambda: response["Body"].read(CHUNK_SIZE), b""):
+                    file.write(block)
+                    fetched += len(block)
+            os.replace(tmp_path, data_path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+        meta_path.write_text(
+            json.dumps({"bucket": bucket, "key": key, "etag": response.get("ETag")})
+        )
+        if dest:
+            link_or_copy(data_path, dest)
+
+        self.evict()
+        return FetchResult(hit=False, bytes_fetched=fetched)
+
+    def warm(self, s3_client: Any, bucket: str, key: str) -> FetchResult:
+        """Fetch or revalidate an object into the cache without linking it.
+
+        Warm-ups are not job lookups, so they are counted apart from the hits
+        and misses.
+
+        Args:
+            s3_client: boto3 S3 client.
+            bucket: COS bucket name.
+            key: Object key.
+
+        Returns:
+            FetchResult: Whether it was already cached and the bytes downloaded.
+        """
+        result = self._fetch(s3_client, bucket, key, None)
+        with self._lock:
+            self._warmed += 1
+        logger.info(f"Asset cache warmed: {key} ({result.bytes_fetched} bytes fetched)")
+        return result
+
+    def _record(self, result: FetchResult) -> None:
+        """Update the cumulative counters of job lookups."""
+        with self._lock:
+            if result.hit:
+                self._hits += 1
+            else:
+                self._misses += 1
+            self._bytes_fetched += result.bytes_fetched
+
+    def evict(self) -> None:
+        """Delete least recently used objects until the cache fits ``max_bytes``."""
+        entries = []
+        for path in self.root.iterdir():
+            if path.suffix:
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            path.with_suffix(".json").unlink(missing_ok=True)
+            total -= size
+            logger.info(f"Evicted cached asset: {path.name}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cumulative hit/miss counters of job lookups in this process.
+
+        Returns:
+            Dict with hits, misses, hit ratio, bytes fetched from COS for
+            jobs and the number of warm-up fetches.
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hitRatio": round(self._hits / lookups, 4) if lookups else 0.0,
+                "bytesFetched": self._bytes_fetched,
+                "warmed": self._warmed,
+            }
@@ -0,0 +1,569 @@
+#!/usr/bin/env python3
+"""Discrete-Event Capacity Simulator for the Render Pipeline.
+
+Replays job arrivals against a simulated pool of renderer pods scaled by
+KEDA, so autoscaling settings can be tuned without spending GPU hours.
+
+The model follows the renderer in daemon mode:
+
+  * Jobs wait in the ``videoJob`` topic; each ready pod takes one job at a
+    time and spends a sampled download, render and upload time on it.
+  * The consumer-group lag KEDA sees is the waiting jobs plus the jobs in
+    progress, because offsets are committed only after the upload.
+  * Every ``pollingInterval`` the desired replica count is
+    ``ceil(lag / lagThreshold)`` within the replica bounds. Scale-ups go
+    through the HPA stabilization window and percent policy, scale-downs
+    through the scale-down window, and the deployment drops to zero once
+    the lag has been zero for ``cooldownPeriod``.
+  * A new pod is billed from creation, takes ``startup`` seconds before it
+    consumes, and a pod removed while busy finishes its job first.
+
+Usage:
+    python renderer/capacity_sim.py --rate 120 --hours 4
+    python renderer/capacity_sim.py --trace jobs.jsonl --sweep max_replicas=2,4,8
+    python renderer/capacity_sim.py --rate 60 --sweep lag_threshold=1,2,5,10
+
+Author: Ruslan Magana (https://ruslanmv.com)
+License: Apache 2.0
+"""
+
+import argparse
+import bisect
+import csv
+import heapq
+import json
+import logging
+import math
+import random
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, TextIO, Tuple
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Configuration constants
+KEDA_MANIFEST = Path(__file__).parent.parent / "manifests" / "keda-scaledobject.yaml"
+GPU_HOUR_PRICE = 2.50  # USD per renderer pod hour
+POD_STARTUP_SECONDS = 90.0  # scheduling, image pull and model load
+
+
+class KedaConfig(NamedTuple):
+    """Autoscaling parameters of the renderer ScaledObject.
+
+    Attributes:
+        lag_threshold: Target lag per replica.
+        polling_interval: Seconds between scaling decisions.
+        cooldown: Seconds of zero lag before scaling to zero.
+        min_replicas: Lower replica bound.
+        max_replicas: Upper replica bound.
+        scale_up_window: HPA scale-up stabilization window in seconds.
+        scale_up_percent: Most a scale-up may add per period, in percent.
+        scale_up_period: Period of the scale-up policy in seconds.
+        scale_down_window: HPA scale-down stabilization window in seconds.
+    """
+
+    lag_threshold: int = 5
+    polling_interval: float = 30
+    cooldown: float = 300
+    min_replicas: int = 0
+    max_replicas: int = 10
+    scale_up_window: float = 0
+    scale_up_percent: int = 100
+    scale_up_period: float = 15
+    scale_down_window: float = 300
+
+
+class Stage(NamedTuple):
+    """Log-normal service time of a pipeline stage.
+
+    Attributes:
+        mean: Mean duration in seconds.
+        cv: Coefficient of variation; 0 makes the duration fixed.
+    """
+
+    mean: float
+    cv: float = 0.0
+
+    def sample(self, rng: random.Random) -> float:
+        """Draw one duration."""
+        if self.cv <= 0:
+            return self.mean
+        sigma2 = math.log(1 + self.cv**2)
+        return rng.lognormvariate(math.log(self.mean) - sigma2 / 2, math.sqrt(sigma2))
+
+
+# Defaults match the fixed 5/45/5 second simulation in render.py
+DEFAULT_STAGES = {
+    "download": Stage(5, 0.5),
+    "render": Stage(45, 0.3),
+    "upload": Stage(5, 0.5),
+}
+
+
+class Arrival(NamedTuple):
+    """One job entering the topic.
+
+    Attributes:
+        time: Seconds since the start of the simulation.
+        render_seconds: Measured render time to replay, if known.
+    """
+
+    time: float
+    render_seconds: Optional[float] = None
+
+
+class Result(NamedTuple):
+    """Outcome of one simulation run; times are in seconds."""
+
+    jobs: int
+    wait_p50: float
+    wait_p95: float
+    wait_p99: float
+    wait_max: float
+    latency_p95: float
+    utilization: float
+    pod_hours: float
+    cost: float
+    peak_replicas: int
+
+
+def load_keda_config(path: Path = KEDA_MANIFEST) -> KedaConfig:
+    """Read the autoscaling parameters from a KEDA ScaledObject manifest.
+
+    Args:
+        path: ScaledObject YAML file.
+
+    Returns:
+        KedaConfig with the manifest's values; HPA behaviour that the
+        manifest does not set keeps the Kubernetes defaults.
+    """
+    try:
+        import yaml
+    except ImportError:
+        logger.warning(
+            f"PyYAML not installed - using default KEDA parameters instead of {path}"
+        )
+        return KedaConfig()
+
+    spec = yaml.safe_load(path.read_text())["spec"]
+    trigger = next(t for t in spec["triggers"] if t["type"] == "kafka")
+    behavior = (
+        spec.get("advanced", {})
+        .get("horizontalPodAutoscalerConfig", {})
+        .get("behavior", {})
+    )
+    scale_up = behavior.get("scaleUp", {})
+    scale_down = behavior.get("scaleDown", {})
+    policy = next(
+        (p for p in scale_up.get("policies", []) if p["type"] == "Percent"), {}
+    )
+
+    defaults = KedaConfig()
+    return KedaConfig(
+        lag_threshold=int(
+            trigger["metadata"].get("lagThreshold", defaults.lag_threshold)
+        ),
+        polling_interval=float(spec.get("pollingInterval", defaults.polling_interval)),
+        cooldown=float(spec.get("cooldownPeriod", defaults.cooldown)),
+        min_replicas=int(spec.get("minReplicaCount", defaults.min_replicas)),
+        max_replicas=int(spec.get("maxReplicaCount", defaults.max_replicas)),
+        scale_up_window=float(
+            scale_up.get("stabilizationWindowSeconds", defaults.scale_up_window)
+        ),
+        scale_up_percent=int(policy.get("value", defaults.scale_up_percent)),
+        scale_up_period=float(policy.get("periodSeconds", defaults.scale_up_period)),
+        scale_down_window=float(
+            scale_down.get("stabilizationWindowSeconds", defaults.scale_down_window)
+        ),
+    )
+
+
+def _timestamp(value: Any) -> float:
+    """Return epoch seconds from a number or an ISO 8601 string."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+
+
+def load_trace(path: Path) -> List[Arrival]:
+    """Read job arrivals from a JSONL file.
+
+    Each line is a job with a ``timestamp`` (epoch seconds or ISO 8601) and
+    optionally the ``renderSeconds`` it took in production.
+
+    Args:
+        path: JSONL trace file.
+
+    Returns:
+        Arrivals sorted by time, relative to the first job.
+    """
+    records = []
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                records.append(
+                    (_timestamp(record["timestamp"]), record.get("renderSeconds"))
+                )
+
+    records.sort(key=lambda r: r[0])
+    start = records[0][0] if records else 0.0
+    return [Arrival(t - start, render) for t, render in records]
+
+
+def poisson_arrivals(
+    rate_per_hour: float, hours: float, rng: random.Random
+) -> List[Arrival]:
+    """Generate arrivals of a Poisson process.
+
+    Args:
+        rate_per_hour: Mean jobs per hour.
+        hours: Length of the arrival window.
+        rng: Random number generator.
+    """
+    arrivals = []
+    t = rng.expovariate(rate_per_hour / 3600)
+    while t < hours * 3600:
+        arrivals.append(Arrival(t))
+        t += rng.expovariate(rate_per_hour / 3600)
+    return arrivals
+
+
+def _percentile(values: List[float], q: float) -> float:
+    """Return the nearest-rank percentile of sorted values."""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, math.ceil(q / 100 * len(values)) - 1))]
+
+
+class _Pod:
+    """A renderer pod and its billing interval."""
+
+    def __init__(self, created: float) -> None:
+        self.created = created
+        self.ready = False
+        self.busy = False
+        self.draining = False
+
+
+class Simulator:
+    """Event loop of one capacity simulation.
+
+    Args:
+        arrivals: Jobs entering the topic.
+        keda: Autoscaling parameters.
+        stages: Service time of ``download``, ``render`` and ``upload``.
+        startup: Seconds from pod creation until it consumes jobs.
+        gpu_hour_price: Cost of one pod hour.
+        seed: Seed of the service-time samples.
+        timeline: Optional CSV writer target for per-poll state.
+    """
+
+    def __init__(
+        self,
+        arrivals: List[Arrival],
+        keda: KedaConfig,
+        stages: Optional[Dict[str, Stage]] = None,
+        startup: float = POD_STARTUP_SECONDS,
+        gpu_hour_price: float = GPU_HOUR_PRICE,
+        seed: int = 0,
+        timeline: Optional[TextIO] = None,
+    ) -> None:
+        self.keda = keda
+        self.stages = {**DEFAULT_STAGES, **(stages or {})}
+        self.startup = startup
+        self.price = gpu_hour_price
+        self.rng = random.Random(seed)
+        self.timeline = csv.writer(timeline) if timeline else None
+        if self.timeline:
+            self.timeline.writerow(["time", "queued", "busy", "pods"])
+
+        self.events: List[Tuple[float, int, str, Any]] = []
+        self._seq = 0
+        for arrival in arrivals:
+            self._schedule(arrival.time, "arrival", arrival)
+        self.pending_arrivals = len(arrivals)
+
+        self.queue: deque = deque()
+        self.pods: List[_Pod] = []
+        self.waits: List[float] = []
+        self.latencies: List[float] = []
+        self.busy_seconds = 0.0
+        self.pod_seconds = 0.0
+        self.peak = 0
+        self.last_active = -math.inf
+        # (time, desired replicas) of recent polls, for the stabilization windows
+        self.recommendations: List[Tuple[float, int]] = []
+        # (time, replicas) after each scaling change, for the scale-up policy
+        self.replica_history: List[Tuple[float, int]] = [(0.0, 0)]
+
+    def _schedule(self, time: float, kind: str, data: Any = None) -> None:
+        self._seq += 1
+        heapq.heappush(self.events, (time, self._seq, kind, data))
+
+    def _active_pods(self) -> List[_Pod]:
+        return [p for p in self.pods if not p.draining]
+
+    def _lag(self) -> int:
+        return len(self.queue) + sum(p.busy for p in self.pods)
+
+    def _replicas_at(self, time: float) -> int:
+        index = bisect.bisect_right(self.replica_history, (time, math.inf)) - 1
+        return self.replica_history[max(0, index)][1]
+
+    def _desired(self, now: float, current: int) -> int:
+        """Return the replica count KEDA and the HPA settle on at a poll."""
+        keda = self.keda
+        lag = self._lag()
+        floor = max(1, keda.min_replicas)
+
+        if lag > 0:
+            self.last_active = now
+            raw = min(
+                keda.max_replicas, max(floor, math.ceil(lag / keda.lag_threshold))
+            )
+        elif keda.min_replicas == 0 and now - self.last_active >= keda.cooldown:
+            return 0
+        else:
+            raw = floor if current or keda.min_replicas else 0
+
+        if current == 0:
+            # KEDA activates the deployment; the HPA takes over from one replica
+            return min(raw, floor)
+
+        horizon = max(keda.scale_up_window, keda.scale_down_window)
+        self.recommendations = [r for r in self.recommendations if r[0] > now - horizon]
+        self.recommendations.append((now, raw))
+
+        if raw > current:
+            window = [
+                r for t, r in self.recommendations if t > now - keda.scale_up_window
+            ] or [raw]
+            base = max(1, self._replicas_at(now - keda.scale_up_period))
+            limit = math.ceil(base * (1 + keda.scale_up_percent / 100))
+            return max(current, min(min(window), limit))
+        if raw < current:
+            window = [
+                r for t, r in self.recommendations if t > now - keda.scale_down_window
+            ]
+            return min(current, max(window))
+        return current
+
+    def _scale(self, now: float, target: int) -> None:
+        active = self._active_pods()
+        for _ in range(target - len(active)):
+            pod = _Pod(now)
+            self.pods.append(pod)
+            self._schedule(now + self.startup, "ready", pod)
+
+        # Remove starting pods first, then idle ones, then drain busy ones
+        surplus = sorted(active, key=lambda p: (p.ready, p.busy))[
+            : max(0, len(active) - target)
+        ]
+        for pod in surplus:
+            pod.draining = True
+            if not pod.busy:
+                self._terminate(pod, now)
+
+        if target != len(active):
+            self.replica_history.append((now, target))
+        self.peak = max(self.peak, len(self.pods))
+
+    def _terminate(self, pod: _Pod, now: float) -> None:
+        self.pod_seconds += now - pod.created
+        self.pods.remove(pod)
+
+    def _dispatch(self, now: float) -> None:
+        for pod in self.pods:
+            if not self.queue:
+                return
+            if pod.ready and not pod.busy and not pod.draining:
+                arrival = self.queue.popleft()
+                render = arrival.render_seconds
+                service = (
+                    self.stages["download"].sample(self.rng)
+                    + (
+                        render
+                        if render is not None
+                        else self.stages["render"].sample(self.rng)
+                    )
+                    + self.stages["upload"].sample(self.rng)
+                )
+                pod.busy = True
+                self.busy_seconds += service
+                self.waits.append(now - arrival.time)
+                self._schedule(now + service, "done", (pod, arrival))
+
+    def run(self) -> Result:
+        """Process events until every job is done and the pods scaled to zero.
+
+        Returns:
+            Queueing, utilization and cost figures of the run.
+        """
+        self._schedule(0.0, "poll")
+        now = 0.0
+
+        while self.events:
+            now, _, kind, data = heapq.heappop(self.events)
+
+            if kind == "arrival":
+                self.pending_arrivals -= 1
+                self.queue.append(data)
+            elif kind == "ready":
+                if data in self.pods:
+                    data.ready = True
+            elif kind == "done":
+                pod, arrival = data
+                pod.busy = False
+                self.latencies.append(now - arrival.time)
+                if pod.draining:
+                    self._terminate(pod, now)
+            elif kind == "poll":
+                self._scale(now, self._desired(now, len(self._active_pods())))
+                if self.timeline:
+                    busy = sum(p.busy for p in self.pods)
+                    self.timeline.writerow(
+                        [f"{now:.0f}", len(self.queue), busy, len(self.pods)]
+                    )
+                busy = any(p.busy for p in self.pods)
+                idle_floor = len(self._active_pods()) <= self.keda.min_replicas
+                if self.pending_arrivals or self.queue or busy or not idle_floor:
+                    self._schedule(now + self.keda.polling_interval, "poll")
+
+            self._dispatch(now)
+
+        for pod in list(self.pods):
+            self._terminate(pod, now)
+
+        waits = sorted(self.waits)
+        pod_hours = self.pod_seconds / 3600
+        return Result(
+            jobs=len(waits),
+            wait_p50=_percentile(waits, 50),
+            wait_p95=_percentile(waits, 95),
+            wait_p99=_percentile(waits, 99),
+            wait_max=waits[-1] if waits else 0.0,
+            latency_p95=_percentile(sorted(self.latencies), 95),
+            utilization=(
+                self.busy_seconds / self.pod_seconds if self.pod_seconds else 0.0
+            ),
+            pod_hours=pod_hours,
+            cost=pod_hours * self.price,
+            peak_replicas=self.peak,
+        )
+
+
+def _stage(value: str) -> Stage:
+    """Parse ``MEAN`` or ``MEAN,CV`` into a Stage."""
+    mean, _, cv = value.partition(",")
+    return Stage(float(mean), float(cv) if cv else 0.0)
+
+
+def main() -> None:
+    """Run the simulation, optionally sweeping one parameter, and print a table."""
+    parser = argparse.ArgumentParser(description="Render pipeline capacity simulator")
+    parser.add_argument(
+        "--trace", type=Path, help="JSONL file of job arrivals to replay"
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=60,
+        help="Poisson arrivals per hour without --trace",
+    )
+    parser.add_argument(
+        "--hours", type=float, default=4, help="Arrival window for --rate"
+    )
+    parser.add_argument(
+        "--keda", type=Path, default=KEDA_MANIFEST, help="KEDA ScaledObject manifest"
+    )
+    parser.add_argument(
+        "--download", type=_stage, help="Download time MEAN[,CV] in seconds"
+    )
+    parser.add_argument(
+        "--render", type=_stage, help="Render time MEAN[,CV] in seconds"
+    )
+    parser.add_argument(
+        "--upload", type=_stage, help="Upload time MEAN[,CV] in seconds"
+    )
+    parser.add_argument(
+        "--startup",
+        type=float,
+        default=POD_STARTUP_SECONDS,
+        help="Pod start-up seconds",
+    )
+    parser.add_argument(
+        "--price", type=float, default=GPU_HOUR_PRICE, help="Cost of one pod hour"
+    )
+    parser.add_argument(
+        "--sweep",
+        help="NAME=V1,V2,... over a KedaConfig field, 'rate' or 'startup' (e.g. max_replicas=2,4,8)",
+    )
+    parser.add_argument(
+        "--timeline",
+        type=Path,
+        help="Write queue and replica counts per poll to a CSV file",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    keda = load_keda_config(args.keda)
+    stages = {
+        name: getattr(args, name) for name in DEFAULT_STAGES if getattr(args, name)
+    }
+
+    name, values = "-", [None]
+    if args.sweep:
+        name, _, raw = args.sweep.partition("=")
+        if name not in KedaConfig._fields + ("rate", "startup"):
+            parser.error(f"cannot sweep '{name}'")
+        values = [float(v) for v in raw.split(",")]
+
+    print(f"KEDA: {dict(keda._asdict())}")
+    print(
+        f"{name:>16} {'jobs':>6} {'wait p50':>9} {'wait p95':>9} {'wait p99':>9} "
+        f"{'e2e p95':>9} {'util':>6} {'pod h':>7} {'cost':>8} {'peak':>5}"
+    )
+
+    for value in values:
+        rate, startup, config = args.rate, args.startup, keda
+        if name == "rate":
+            rate = value
+        elif name == "startup":
+            startup = value
+        elif value is not None:
+            config = keda._replace(**{name: type(getattr(keda, name))(value)})
+
+        rng = random.Random(args.seed)
+        arrivals = (
+            load_trace(args.trace)
+            if args.trace
+            else poisson_arrivals(rate, args.hours, rng)
+        )
+
+        timeline = (
+            open(args.timeline, "w", newline="")
+            if args.timeline and len(values) == 1
+            else None
+        )
+        try:
+            result = Simulator(
+                arrivals, config, stages, startup, args.price, args.seed, timeline
+            ).run()
+        finally:
+            if timeline:
+                timeline.close()
+
+        label = "-" if value is None else f"{value:g}"
+        print(
+            f"{label:>16} {result.jobs:>6} {result.wait_p50:>9.0f} {result.wait_p95:>9.0f} "
+            f"{result.wait_p99:>9.0f} {result.latency_p95:>9.0f} {result.utilization:>6.0%} "
+            f"{result.pod_hours:>7.1f} {result.cost:>8.2f} {result.peak_replicas:>5}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""Checkpointed Chunk Rendering.
+
+Splits a render into fixed-length chunks and persists each finished chunk to
+IBM Cloud Object Storage together with a completion marker::
+
+    chunks/{job_id}/00000.mp4    # rendered clip
+    chunks/{job_id}/00000.json   # marker: frame range, size and MD5
+
+A job restarted with the same ``jobId`` (for example after its pod was
+preempted) lists the markers, skips the chunks already rendered and resumes
+from the first missing one, so an eviction costs at most one chunk of work.
+
+Author: Ruslan Magana (https://ruslanmv.com)
+License: Apache 2.0
+"""
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import segments
+import transfer
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Configuration constants
+CHUNK_CHECKPOINTS = os.getenv("CHUNK_CHECKPOINTS", "false").lower() == "true"
+CHUNK_SECONDS = float(os.getenv("CHUNK_SECONDS", "5"))
+CHUNK_PREFIX = "chunks"
+
+# A chunk to render: (index, frame range, output file)
+Chunk = Tuple[int, range, Path]
+
+# Renders the given chunks, yielding each index as its file is complete
+ChunkRenderer = Callable[[List[Chunk]], Iterable[int]]
+
+
+def plan_chunks(frame_count: int, chunk_frames: int) -> List[range]:
+    """Split a video's frames into chunks of ``chunk_frames`` frames.
+
+    The plan depends only on its arguments, so a restarted job maps chunk
+    indexes to the same frames as the attempt it resumes.
+
+    Args:
+        frame_count: Number of frames in the video.
+        chunk_frames: Frames per chunk (the last chunk may be shorter).
+
+    Returns:
+        Frame ranges in order.
+    """
+    chunk_frames = max(1, chunk_frames)
+    return [
+        range(start, min(start + chunk_frames, frame_count))
+        for start in range(0, frame_count, chunk_frames)
+    ]
+
+
+def _md5(path: Path) -> str:
+    """Return the hex MD5 of a file."""
+    digest = hashlib.md5()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ChunkStore:
+    """Rendered chunks and their completion markers in COS.
+
+    Args:
+        s3_client: boto3 S3 client.
+        bucket: COS bucket name.
+        job_id: Job whose chunks are stored.
+    """
+
+    def __init__(self, s3_client: Any, bucket: str, job_id: str) -> None:
+        self.s3 = s3_client
+        self.bucket = bucket
+        self.prefix = f"{CHUNK_PREFIX}/{job_id}/"
+
+    def _key(self, index: int, suffix: str) -> str:
+        return f"{self.prefix}{index:05d}{suffix}"
+
+    def _keys(self) -> Iterator[str]:
+        """List every object under the job's chunk prefix."""
+        paginator = self.s3.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix):
+            for item in page.get("Contents", []):
+                yield item["Key"]
+
+    def completed(self) -> Dict[int, Dict[str, Any]]:
+        """Return the markers of completed chunks, keyed by chunk index."""
+        markers = {}
+        for key in self._keys():
+            if not key.endswith(".json"):
+                continue
+            body = self.s3.get_object(Bucket=self.bucket, Key=key)["Body"].read()
+            marker = json.loads(body)
+            markers[marker["index"]] = marker
+        return markers
+
+    def save(self, index: int, frames: range, path: Path) -> None:
+        """Upload a rendered chunk, then its marker.
+
+        The clip is uploaded with the renderer's transfer settings and
+        checksums, and the marker is written last, so a chunk only counts as
+        complete once its clip is fully stored.
+        """
+        transfer.upload_file(
+            self.s3,
+            path,
+            self.bucket,
+            self._key(index, ".mp4"),
+            extra_args={"ContentType": "video/mp4"},
+        )
+        marker = {
+            "index": index,
+            "start": frames.start,
+            "stop": frames.stop,
+            "size": path.stat().st_size,
+            "md5": _md5(path),
+        }
+        self.s3.put_object(
+            Bucket=self.bucket,
+            Key=self._key(index, ".json"),
+            Body=json.dumps(marker).encode(),
+            ContentType="application/json",
+        )
+
+    def load(self, marker: Dict[str, Any], path: Path) -> bool:
+        """Download a completed chunk and verify it against its marker.
+
+        Returns:
+            bool: True if the downloaded clip matches the marker.
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.s3.download_file(
+            Bucket=self.bucket,
+            Key=self._key(marker["index"], ".mp4"),
+            Filename=str(path),
+        )
+        return path.stat().st_size == marker["size"] and _md5(path) == marker["md5"]
+
+    def clear(self) -> None:
+        """Delete every chunk and marker of the job."""
+        keys = [{"Key": key} for key in self._keys()]
+        for start in range(0, len(keys), 1000):
+            self.s3.delete_objects(
+                Bucket=self.bucket, Delete={"Objects": keys[start : start + 1000]}
+            )
+
+
+def render_chunked(
+    job_id: str,
+    asset_path: str,
+    frame_count: int,
+    output_path: Path,
+    renderer: ChunkRenderer,
+    store: Optional[ChunkStore] = None,
+    chunk_frames: Optional[int] = None,
+) -> Path:
+    """Render a video chunk by chunk, resuming from checkpoints in ``store``.
+
+    Args:
+        job_id: Unique identifier for the rendering job.
+        asset_path: Path to downloaded assets.
+        frame_count: Number of frames in the video.
+        output_path: Video file to write.
+        renderer: Renders a list of chunks, yielding each finished index.
+        store: Checkpoint store, or None to render without checkpoints.
+        chunk_frames: Frames per chunk. Defaults to ``CHUNK_SECONDS`` of video.
+
+    Returns:
+        Path: The joined video.
+
+    Raises:
+        RuntimeError: If the renderer does not produce every chunk.
+    """
+    chunk_frames = chunk_frames or int(CHUNK_SECONDS * segments.VIDEO_FPS)
+    plan = plan_chunks(frame_count, chunk_frames)
+    chunk_dir = Path(asset_path) / "chunks"
+    paths = [chunk_dir / f"{index:05d}.mp4" for index in range(len(plan))]
+
+    done = set()
+    if store:
+        for index, marker in store.completed().items():
+            if index >= len(plan) or (marker["start"], marker["stop"]) != (
+                plan[index].start,
+                plan[index].stop,
+            ):
+                continue
+            if store.load(marker, paths[index]):
+                done.add(index)
+            else:
+                logger.warning(
+                    f"[{job_id}] Chunk {index} failed verification, re-rendering"
+                )
+
+    pending = [
+        (index, plan[index], paths[index])
+        for index in range(len(plan))
+        if index not in done
+    ]
+    if done:
+        first = pending[0][0] if pending else len(plan)
+        logger.info(
+            f"[{job_id}] Resuming at chunk {first}: {len(done)}/{len(plan)} chunks already rendered"
+        )
+    else:
+        logger.info(f"[{job_id}] Rendering {len(plan)} chunks of {chunk_frames} frames")
+
+    if pending:
+        frames_by_index = {index: frames for index, frames, _ in pending}
+        for index in renderer(pending):
+            if store:
+                store.save(index, frames_by_index[index], paths[index])
+            done.add(index)
+            logger.info(f"[{job_id}] Chunk {index + 1}/{len(plan)} complete")
+
+    missing = sorted(set(range(len(plan))) - done)
+    if missing:
+        raise RuntimeError(f"Chunks not rendered: {missing}")
+
+    segments.concat_segments(paths, output_path)
+    for path in paths:
+        path.unlink(missing_ok=True)
+    return output_path
@@ -0,0 +1,260 @@
+"""Multi-Core CPU Render Backend.
+
+Renders on CPU-only nodes by splitting a video's frame range into contiguous
+segments and rendering them in a process pool with one worker per physical
+core. Each worker is pinned to its own core and limited to one math-library
+thread, so workers do not oversubscribe the cores or contend for SMT
+siblings. Segments are joined in order once all have finished.
+
+Each worker encodes its segment with ffmpeg (see ``segments.py``). Callers
+such as the scaling benchmark can add synthetic per-frame work standing in
+for model inference; the production path never does.
+
+Author: Ruslan Magana (https://ruslanmv.com)
+License: Apache 2.0
+"""
+
+import hashlib
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Iterator, List, Optional, Tuple
+
+import segments
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Configuration constants
+CPU_WORKERS = int(os.getenv("CPU_WORKERS", "0"))  # 0 = one per physical core
+CPU_PIN_WORKERS = os.getenv("CPU_PIN_WORKERS", "true").lower() == "true"
+
+# Math libraries read these when first imported in a worker
+_THREAD_ENV_VARS = (
+    "OMP_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+)
+
+# Pool reused across jobs (daemon mode) and its size
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+
+
+def _cgroup_cpu_limit() -> Optional[int]:
+    """Return the container's CPU quota in whole CPUs, if one is set."""
+    try:
+        quota, period = Path("/sys/fs/cgroup/cpu.max").read_text().split()
+        if quota != "max":
+            return max(1, int(quota) // int(period))
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def physical_cores() -> List[int]:
+    """Return one logical CPU per physical core available to this process.
+
+    Reads the CPU topology from sysfs and keeps the first SMT sibling of each
+    (package, core) pair within the process's affinity mask, then trims the
+    list to the container's CPU quota.
+
+    Returns:
+        Logical CPU IDs, one per usable physical core.
+    """
+    allowed = sorted(os.sched_getaffinity(0))
+    seen = set()
+    cpus = []
+
+    for cpu in allowed:
+        topology = Path(f"/sys/devices/system/cpu/cpu{cpu}/topology")
+        try:
+            core = (
+                (topology / "physical_package_id").read_text().strip(),
+                (topology / "core_id").read_text().strip(),
+            )
+        except OSError:
+            core = ("cpu", str(cpu))
+        if core not in seen:
+            seen.add(core)
+            cpus.append(cpu)
+
+    limit = _cgroup_cpu_limit()
+    return cpus[:limit] if limit else cpus
+
+
+def _init_worker(cpu_queue: Any, pin: bool) -> None:
+    """Limit a pool worker to one thread and pin it to its own core."""
+    for name in _THREAD_ENV_VARS:
+        os.environ[name] = "1"
+
+    try:
+        import torch
+
+        torch.set_num_threads(1)
+    except ImportError:
+        pass
+
+    cpu = cpu_queue.get()
+    if pin:
+        os.sched_setaffinity(0, {cpu})
+
+
+def get_pool(workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """Return the worker pool, creating it with ``workers`` pinned processes.
+
+    Args:
+        workers: Number of processes. Defaults to ``CPU_WORKERS`` or one per
+            physical core.
+
+    Returns:
+        ProcessPoolExecutor: The shared pool.
+    """
+    global _pool, _pool_workers
+
+    cores = physical_cores()
+    workers = workers or CPU_WORKERS or len(cores)
+
+    if _pool is not None and _pool_workers == workers:
+        return _pool
+    if _pool is not None:
+        _pool.shutdown()
+
+    # Spawned workers start without the parent's threads or imported libraries
+    context = multiprocessing.get_context("spawn")
+    cpu_queue = context.Queue()
+    for index in range(workers):
+        cpu_queue.put(cores[index % len(cores)])
+
+    logger.info(
+        f"Starting CPU render pool: {workers} workers on cores {cores[:workers]}"
+    )
+    _pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=context,
+        initializer=_init_worker,
+        initargs=(cpu_queue, CPU_PIN_WORKERS),
+    )
+    _pool_workers = workers
+    return _pool
+
+
+def shutdown_pool() -> None:
+    """Stop the worker pool, if one was started."""
+    global _pool, _pool_workers
+
+    if _pool is not None:
+        _pool.shutdown()
+        _pool, _pool_workers = None, 0
+
+
+def _synthetic_frame(index: int, work: int) -> bytes:
+    """Burn ``work`` rounds of hashing a 64 KiB tile, standing in for a model."""
+    tile = index.to_bytes(8, "little") * 8192
+    for _ in range(work):
+        tile = hashlib.sha256(tile).digest() * 2048
+    return tile[:32]
+
+
+def render_segment(
+    frames: range,
+    asset_path: str,
+    output: str,
+    work: int = 0,
+) -> str:
+    """Render one contiguous frame range (runs inside a pool worker).
+
+    Args:
+        frames: Frame range of the segment.
+        asset_path: Path to downloaded assets.
+        output: Segment file to write.
+        work: Synthetic work per frame (benchmarks and tests only).
+
+    Returns:
+        str: Path of the written segment.
+    """
+    if work:
+        for index in frames:
+            _synthetic_frame(index, work)
+    return str(segments.write_segment(frames, asset_path, Path(output)))
+
+
+def render_chunks(
+    asset_path: str,
+    chunks: List[Tuple[int, range, Path]],
+    workers: Optional[int] = None,
+    work: int = 0,
+) -> Iterator[int]:
+    """Render chunks in parallel across the worker pool.
+
+    Args:
+        asset_path: Path to downloaded assets.
+        chunks: ``(index, frame range, output file)`` of each chunk.
+        workers: Number of worker processes (see :func:`get_pool`).
+        work: Synthetic work per frame (benchmarks and tests only).
+
+    Yields:
+        int: Index of each chunk as soon as its file has been written.
+    """
+    pool = get_pool(workers)
+    futures = {
+        pool.submit(render_segment, frames, asset_path, str(output), work): index
+        for index, frames, output in chunks
+    }
+    for future in as_completed(futures):
+        future.result()
+        yield futures[future]
+
+
+def render_frames(
+    job_id: str,
+    asset_path: str,
+    frame_count: int,
+    output_path: Path,
+    workers: Optional[int] = None,
+    work: int = 0,
+) -> Path:
+    """Render a video on CPU by splitting its frames across the worker pool.
+
+    Args:
+        job_id: Unique identifier for the rendering job.
+        asset_path: Path to downloaded assets.
+        frame_count: Number of frames to render.
+        output_path: Video file to write.
+        workers: Number of worker processes (see :func:`get_pool`).
+        work: Synthetic work per frame (benchmarks and tests only).
+
+    Returns:
+        Path: The rendered video.
+    """
+    get_pool(workers)
+    ranges = segments.frame_ranges(frame_count, _pool_workers)
+    segment_dir = Path(asset_path) / "cpu-segments"
+    chunks = [
+        (index, frames, segment_dir / f"{index:05d}.mp4")
+        for index, frames in enumerate(ranges)
+    ]
+
+    logger.info(
+        f"[{job_id}] CPU render: {frame_count} frames in {len(ranges)} segments "
+        f"on {_pool_workers} workers"
+    )
+    start = time.perf_counter()
+
+    for _ in render_chunks(asset_path, chunks, workers, work):
+        pass
+    parts = [output for _, _, output in chunks]
+    segments.concat_segments(parts, output_path)
+
+    elapsed = time.perf_counter() - start
+    logger.info(
+        f"[{job_id}] CPU render finished in {elapsed:.1f}s ({frame_count / elapsed:.1f} fps)"
+    )
+
+    for part in parts:
+        part.unlink(missing_ok=True)
+    return output_path
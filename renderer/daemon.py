@@ -0,0 +1,366 @@
+"""Kafka Consumer Mode for the GPU Renderer.
+
+Keeps one renderer process alive across many jobs: it consumes the
+``videoJob`` topic and renders each message in turn, so pod scheduling,
+image start and CUDA initialisation are paid once per pod instead of once
+per job. While a job renders, the assets of the next message are downloaded
+in a background thread. Offsets are committed only after a job's video has
+been uploaded; a failed job is sent to the dead-letter topic when one is
+configured, otherwise the process exits without committing so the job is
+redelivered to the next pod. A message that cannot be decoded is never
+redelivered: it is dead-lettered if possible and committed either way.
+
+Author: Ruslan Magana (https://ruslanmv.com)
+License: Apache 2.0
+"""
+
+import logging
+import os
+import shutil
+import signal
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, NamedTuple, Optional
+
+import job_message
+import render
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Configuration constants
+KAFKA_BROKERS = [b for b in os.getenv("KAFKA_BROKERS", "").split(",") if b]
+KAFKA_TOPIC = os.getenv("KAFKA_TOPIC", "videoJob")
+# Must match the KEDA consumerGroup so the scaler sees this group's lag
+KAFKA_GROUP_ID = os.getenv("KAFKA_GROUP_ID", "renderer-scaler")
+KAFKA_DLQ_TOPIC = os.getenv("KAFKA_DLQ_TOPIC")
+KAFKA_SECURITY_PROTOCOL = os.getenv("KAFKA_SECURITY_PROTOCOL")
+KAFKA_SASL_MECHANISM = os.getenv("KAFKA_SASL_MECHANISM")
+KAFKA_SASL_USERNAME = os.getenv("KAFKA_SASL_USERNAME")
+KAFKA_SASL_PASSWORD = os.getenv("KAFKA_SASL_PASSWORD")
+# A render must finish within this interval or the group rebalances
+KAFKA_MAX_POLL_INTERVAL_MS = int(os.getenv("KAFKA_MAX_POLL_INTERVAL_MS", "1800000"))
+# How long to wait for a next message to prefetch before rendering
+PREFETCH_POLL_MS = int(os.getenv("PREFETCH_POLL_MS", "1000"))
+# Stop after this many jobs (0 = run until terminated)
+DAEMON_MAX_JOBS = int(os.getenv("DAEMON_MAX_JOBS", "0"))
+
+
+class Job(NamedTuple):
+    """A consumed message and its decoded payload.
+
+    Attributes:
+        record: The Kafka ConsumerRecord.
+        job_id: Job identifier from the payload.
+        payload: Decoded job payload, or None if the message is malformed.
+    """
+
+    record: Any
+    job_id: str
+    payload: Optional[Dict[str, Any]]
+
+
+def _kafka_security() -> Dict[str, Any]:
+    """Return the optional SASL/TLS settings shared by consumer and producer."""
+    settings = {
+        "security_protocol": KAFKA_SECURITY_PROTOCOL,
+        "sasl_mechanism": KAFKA_SASL_MECHANISM,
+        "sasl_plain_username": KAFKA_SASL_USERNAME,
+        "sasl_plain_password": KAFKA_SASL_PASSWORD,
+    }
+    return {name: value for name, value in settings.items() if value}
+
+
+def create_consumer() -> Any:
+    """Create a Kafka consumer on the job topic with manual offset commits.
+
+    Returns:
+        kafka.KafkaConsumer: Consumer fetching one message per poll.
+
+    Raises:
+        RuntimeError: If ``KAFKA_BROKERS`` is not set.
+    """
+    from kafka import KafkaConsumer
+
+    if not KAFKA_BROKERS:
+        raise RuntimeError("KAFKA_BROKERS is required in daemon mode")
+
+    logger.info(
+        f"Consuming '{KAFKA_TOPIC}' as group '{KAFKA_GROUP_ID}' from {KAFKA_BROKERS}"
+    )
+
+    return KafkaConsumer(
+        KAFKA_TOPIC,
+        bootstrap_servers=KAFKA_BROKERS,
+        group_id=KAFKA_GROUP_ID,
+        enable_auto_commit=False,
+        auto_offset_reset="earliest",
+        max_poll_records=1,
+        max_poll_interval_ms=KAFKA_MAX_POLL_INTERVAL_MS,
+        **_kafka_security(),
+    )
+
+
+def create_dlq_producer() -> Optional[Any]:
+    """Create a producer for the dead-letter topic, if one is configured.
+
+    Returns:
+        kafka.KafkaProducer or None.
+    """
+    if not KAFKA_DLQ_TOPIC:
+        return None
+
+    from kafka import KafkaProducer
+
+    return KafkaProducer(
+        bootstrap_servers=KAFKA_BROKERS,
+        acks="all",
+        retries=3,
+        **_kafka_security(),
+    )
+
+
+def fetch_claim(reference: Dict[str, Any]) -> bytes:
+    """Download the payload a claim-check message refers to from COS.
+
+    Raises:
+        RuntimeError: If no COS client is configured.
+        ValueError: If the payload no longer exists.
+        OSError: If COS cannot be reached.
+    """
+    s3_client = render.get_s3_client()
+    if s3_client is None:
+        raise RuntimeError("COS is not configured")
+    try:
+        return s3_client.get_object(Bucket=reference["bucket"], Key=reference["key"])[
+            "Body"
+        ].read()
+    except Exception as e:
+        code = (getattr(e, "response", None) or {}).get("Error", {}).get("Code")
+        if code in ("404", "NoSuchKey"):
+            raise ValueError(
+                f"claim-checked payload {reference['key']} no longer exists"
+            ) from e
+        raise OSError(
+            f"Cannot fetch claim-checked payload {reference['key']}: {e}"
+        ) from e
+
+
+def decode(record: Any) -> Job:
+    """Decode a consumed message into a job.
+
+    Args:
+        record: Kafka ConsumerRecord whose value is a job message envelope,
+            a claim check or plain JSON (see ``job_message``).
+
+    Returns:
+        Job: The decoded job; ``payload`` is None if the value cannot be
+        decoded or its claim-checked payload no longer exists.
+
+    Raises:
+        OSError: If a claim-checked payload cannot be fetched right now.
+        RuntimeError: If a claim check arrives but COS is not configured.
+    """
+    try:
+        payload = job_message.decode(record.value, fetch_claim)
+    except (OSError, RuntimeError):
+        # Not the message's fault: exit without committing so it is redelivered
+        raise
+    except Exception as e:
+        logger.error(
+            f"Cannot decode message at {record.topic}[{record.partition}]@{record.offset}: {e}"
+        )
+        return Job(record, f"offset-{record.offset}", None)
+
+    return Job(record, payload.get("jobId", str(uuid.uuid4())), payload)
+
+
+class RenderDaemon:
+    """Consume render jobs from Kafka and process them one after another.
+
+    Args:
+        consumer: Kafka consumer with auto-commit disabled.
+        dlq_producer: Producer for the dead-letter topic, or None.
+        max_jobs: Stop after this many jobs (0 = unlimited).
+    """
+
+    def __init__(
+        self, consumer: Any, dlq_producer: Optional[Any] = None, max_jobs: int = 0
+    ) -> None:
+        self.consumer = consumer
+        self.dlq_producer = dlq_producer
+        self.max_jobs = max_jobs
+        self.processed = 0
+        self.stopping = False
+        self._prefetcher = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="prefetch"
+        )
+
+    def stop(self, *_: Any) -> None:
+        """Finish the current job, then exit the loop (used as signal handler)."""
+        logger.info("Stop requested - finishing current job")
+        self.stopping = True
+
+    def _poll(self, timeout_ms: int) -> Optional[Job]:
+        """Fetch at most one message."""
+        for records in self.consumer.poll(
+            timeout_ms=timeout_ms, max_records=1
+        ).values():
+            for record in records:
+                return decode(record)
+        return None
+
+    def _next(self) -> Optional[Job]:
+        """Block until a message arrives or a stop is requested."""
+        while not self.stopping:
+            job = self._poll(timeout_ms=1000)
+            if job:
+                return job
+        return None
+
+    def _prefetch(self, job: Optional[Job]) -> Optional[Future]:
+        """Start downloading a job's assets in the background."""
+        if job is None or job.payload is None:
+            return None
+        logger.info(f"[{job.job_id}] Prefetching assets")
+        return self._prefetcher.submit(render.download_assets, job.job_id, job.payload)
+
+    def _commit(self, job: Job) -> None:
+        """Commit the offset after ``job`` without committing prefetched messages."""
+        from kafka import OffsetAndMetadata, TopicPartition
+
+        record = job.record
+        # kafka-python >= 2.1 adds a leader_epoch field
+        extra = (-1,) if len(OffsetAndMetadata._fields) > 2 else ()
+        offset = OffsetAndMetadata(record.offset + 1, "", *extra)
+        self.consumer.commit({TopicPartition(record.topic, record.partition): offset})
+
+    def _dead_letter(self, job: Job, error: Exception) -> bool:
+        """Send a failed job to the dead-letter topic.
+
+        Returns:
+            bool: True if the message was delivered and may be committed.
+        """
+        if not self.dlq_producer:
+            return False
+
+        headers = [
+            ("error", str(error).encode()[:1000]),
+            ("jobId", job.job_id.encode()),
+        ]
+        try:
+            self.dlq_producer.send(
+                KAFKA_DLQ_TOPIC, value=job.record.value, headers=headers
+            ).get(timeout=30)
+            logger.warning(
+                f"[{job.job_id}] Sent to dead-letter topic '{KAFKA_DLQ_TOPIC}'"
+            )
+            return True
+        except Exception as e:
+            logger.error(f"[{job.job_id}] Failed to dead-letter job: {e}")
+            return False
+
+    def _remove_workspace(self, job: Job) -> None:
+        """Delete a job's workspace, whether or not it was rendered."""
+        shutil.rmtree(render.RENDER_WORK_DIR / job.job_id, ignore_errors=True)
+
+    def process(self, job: Job, assets: Optional[Future]) -> None:
+        """Render one job and commit its offset.
+
+        Args:
+            job: The job to render.
+            assets: Future of the prefetched asset path, if any.
+
+        Raises:
+            SystemExit: If the job failed and could not be dead-lettered.
+        """
+        if job.payload is None:
+            # Redelivery cannot fix a malformed message, so skip it instead
+            # of crash-looping on it
+            if not self._dead_letter(job, ValueError("Message could not be decoded")):
+                logger.error(f"[{job.job_id}] Skipping message that cannot be decoded")
+            self._commit(job)
+            return
+
+        asset_path = None
+        if assets:
+            try:
+                asset_path = assets.result()
+            except Exception as e:
+                # run_job downloads the assets itself when given no path
+                logger.warning(
+                    f"[{job.job_id}] Asset prefetch failed, downloading again: {e}"
+                )
+
+        try:
+            render.run_job(job.payload, job.job_id, asset_path)
+        except Exception as e:
+            logger.error(f"[{job.job_id}] Job failed: {e}", exc_info=True)
+            if not self._dead_letter(job, e):
+                logger.error(
+                    f"[{job.job_id}] Exiting without committing so the job is redelivered"
+                )
+                raise SystemExit(1)
+        finally:
+            # RENDER_WORK_DIR is on the node's disk; run_job only cleans up
+            # after a success
+            self._remove_workspace(job)
+
+        self._commit(job)
+        self.processed += 1
+
+    def run(self) -> None:
+        """Consume and render jobs until stopped or ``max_jobs`` is reached."""
+        job = self._next()
+        assets = self._prefetch(job)
+        upcoming = None
+
+        try:
+            while job:
+                upcoming = None
+                if not self.stopping and self.max_jobs != self.processed + 1:
+                    upcoming = self._poll(timeout_ms=PREFETCH_POLL_MS)
+                upcoming_assets = self._prefetch(upcoming)
+
+                self.process(job, assets)
+
+                if self.stopping or (self.max_jobs and self.processed >= self.max_jobs):
+                    break
+                if upcoming is None and not self.stopping:
+                    upcoming = self._next()
+                    upcoming_assets = self._prefetch(upcoming)
+                job, assets = upcoming, upcoming_assets
+                upcoming = None
+        finally:
+            # Let a running prefetch finish so its directory can be removed;
+            # the uncommitted message is redelivered
+            self._prefetcher.shutdown(wait=True, cancel_futures=True)
+            if upcoming is not None:
+                self._remove_workspace(upcoming)
+
+        logger.info(f"Render daemon stopped after {self.processed} job(s)")
+
+
+def main() -> None:
+    """Run the renderer as a long-lived Kafka consumer.
+
+    Raises:
+        SystemExit: On fatal errors with appropriate exit code.
+    """
+    try:
+        consumer = create_consumer()
+        dlq_producer = create_dlq_producer()
+    except Exception as e:
+        logger.error(f"FATAL: Cannot connect to Kafka: {e}")
+        raise SystemExit(1)
+
+    daemon = RenderDaemon(consumer, dlq_producer, DAEMON_MAX_JOBS)
+    signal.signal(signal.SIGTERM, daemon.stop)
+    signal.signal(signal.SIGINT, daemon.stop)
+
+    try:
+        daemon.run()
+    finally:
+        consumer.close(autocommit=False)
+        if dlq_producer:
+            dlq_producer.close()
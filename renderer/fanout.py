@@ -0,0 +1,116 @@
+"""Parallel Render Parts for the Argo Render Workflow.
+
+The workflow's ``chunk-step`` (``services/prompt-service/app/chunk.py``)
+splits a script into parts of roughly equal predicted duration, and one
+``gpu-render`` step renders each part at the same time. Every part is
+stored in the job's chunk checkpoint area with a verification marker::
+
+    chunks/{job_id}/00002.mp4    # clip of part 2
+    chunks/{job_id}/00002.json   # marker: size and MD5
+
+The ``merge-step`` then downloads and verifies the clips, joins them in
+order without re-encoding and uploads the video, so the end-to-end render
+time follows the longest part instead of the whole script.
+
+Author: Ruslan Magana (https://ruslanmv.com)
+License: Apache 2.0
+"""
+
+import logging
+import shutil
+from pathlib import Path
+from typing import Any, Dict
+
+import checkpoint
+import render
+import segments
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+def part_store(job_id: str) -> checkpoint.ChunkStore:
+    """Return the COS store holding a job's rendered parts.
+
+    Raises:
+        RuntimeError: If COS is not available; parts cannot be joined without it.
+    """
+    s3_client = render.get_s3_client()
+    if s3_client is None:
+        raise RuntimeError("Parallel render parts need COS to be configured")
+    return checkpoint.ChunkStore(s3_client, render.COS_BUCKET, job_id)
+
+
+def render_part(payload: Dict[str, Any]) -> Path:
+    """Render one part of a job and store its clip for the merge step.
+
+    Args:
+        payload: Part planned by ``chunk.py``, with the parent ``jobId``, its
+            index as ``chunk`` and its ``script``.
+
+    Returns:
+        Path: Local clip of the part (removed with the workspace).
+    """
+    job_id, index = payload["jobId"], int(payload["chunk"])
+    part_id = f"{job_id}-part{index:03d}"
+    store = part_store(job_id)
+
+    logger.info(f"[{job_id}] Rendering part {index + 1}/{payload.get('chunks', '?')}")
+    assets = render.download_assets(part_id, payload)
+    try:
+        video_file = render.execute_gpu_render(
+            part_id, assets, payload.get("script", "")
+        )
+        clip = Path(assets) / video_file
+        frames = range(
+            int(render.estimate_seconds(payload.get("script", "")) * segments.VIDEO_FPS)
+        )
+        store.save(index, frames, clip)
+        logger.info(f"[{job_id}] Part {index} stored ({clip.stat().st_size} bytes)")
+    finally:
+        # The part's own resume checkpoints are no longer needed
+        own = render.checkpoint_store(part_id)
+        if own:
+            own.clear()
+        shutil.rmtree(assets, ignore_errors=True)
+    return clip
+
+
+def merge_parts(job_id: str, parts: int) -> str:
+    """Join the stored parts of a job in order and upload the video.
+
+    Args:
+        job_id: Parent job identifier.
+        parts: Number of parts the job was split into.
+
+    Returns:
+        str: Public URL of the uploaded video.
+
+    Raises:
+        RuntimeError: If a part is missing or fails verification.
+    """
+    store = part_store(job_id)
+    markers = store.completed()
+    missing = [index for index in range(parts) if index not in markers]
+    if missing:
+        raise RuntimeError(f"Parts not rendered: {missing}")
+
+    workdir = render.RENDER_WORK_DIR / job_id
+    paths = [workdir / "parts" / f"{index:05d}.mp4" for index in range(parts)]
+    try:
+        for index, path in enumerate(paths):
+            if not store.load(markers[index], path):
+                raise RuntimeError(f"Part {index} failed verification")
+
+        video_file = f"{job_id}.mp4"
+        segments.concat_segments(paths, workdir / video_file)
+        logger.info(f"[{job_id}] Joined {parts} parts")
+        final_url = render.upload_result(job_id, video_file, str(workdir))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    # The video is stored, so its parts are no longer needed
+    store.clear()
+    print(f"\n✓ Job completed: {job_id}")
+    print(f"✓ Video: {final_url}\n")
+    return final_url
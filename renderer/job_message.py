@@ -0,0 +1,135 @@
+"""Decoder for ``videoJob`` Messages.
+
+The orchestrate job publishes messages in a versioned envelope (see
+``services/orchestrate-service/envelope.py``):
+
+    b"VGJ" | version (1 byte) | format (1 byte) | compression (1 byte) | body
+
+The body is compact JSON (``j``) or msgpack (``m``), optionally compressed
+with zlib (``z``) or zstd (``s``). A claim check (``c``) is a JSON reference
+to an envelope stored in COS, fetched and verified against its SHA-256
+before decoding. Messages without the envelope header are decoded as plain
+JSON, as published by older producers.
+
+Author: Ruslan Magana (https://ruslanmv.com)
+License: Apache 2.0
+"""
+
+import hashlib
+import json
+import logging
+import zlib
+from typing import Any, Callable, Dict, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+MAGIC = b"VGJ"
+VERSION = 1
+HEADER_SIZE = len(MAGIC) + 3
+
+FORMAT_JSON = ord("j")
+FORMAT_MSGPACK = ord("m")
+FORMAT_CLAIM = ord("c")
+COMPRESSION_NONE = ord("-")
+COMPRESSION_ZLIB = ord("z")
+COMPRESSION_ZSTD = ord("s")
+
+# Fetches the stored envelope of a claim check
+ClaimFetcher = Callable[[Dict[str, Any]], bytes]
+
+
+def _decompress(compression: int, body: bytes) -> bytes:
+    """Decompress an envelope body."""
+    if compression == COMPRESSION_NONE:
+        return body
+    if compression == COMPRESSION_ZLIB:
+        return zlib.decompress(body)
+    if compression == COMPRESSION_ZSTD:
+        try:
+            import zstandard
+        except ImportError:
+            raise ValueError("zstd-compressed message but zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompress(body)
+    raise ValueError(f"unknown compression {chr(compression)!r}")
+
+
+def _deserialize(fmt: int, body: bytes) -> Any:
+    """Deserialize an envelope body."""
+    if fmt == FORMAT_JSON:
+        return json.loads(body)
+    if fmt == FORMAT_MSGPACK:
+        try:
+            import msgpack
+        except ImportError:
+            raise ValueError("msgpack message but msgpack is not installed")
+        return msgpack.unpackb(body, raw=False)
+    raise ValueError(f"unknown message format {chr(fmt)!r}")
+
+
+def resolve_claim(reference: Dict[str, Any], fetch: Optional[ClaimFetcher]) -> bytes:
+    """Fetch the envelope a claim check refers to and verify it.
+
+    Args:
+        reference: Claim check with ``bucket``, ``key``, ``size`` and ``sha256``.
+        fetch: Returns the stored object of a reference.
+
+    Returns:
+        The stored envelope.
+
+    Raises:
+        ValueError: If no fetcher is available or the object does not match.
+    """
+    if fetch is None:
+        raise ValueError(
+            f"claim check {reference.get('key')} but no object storage is configured"
+        )
+
+    data = fetch(reference)
+    if (
+        len(data) != reference["size"]
+        or hashlib.sha256(data).hexdigest() != reference["sha256"]
+    ):
+        raise ValueError(
+            f"claim check {reference['key']} does not match its stored payload"
+        )
+    logger.info(
+        f"Fetched {len(data)} byte payload from {reference['bucket']}/{reference['key']}"
+    )
+    return data
+
+
+def decode(value: bytes, fetch: Optional[ClaimFetcher] = None) -> Dict[str, Any]:
+    """Decode a ``videoJob`` message value into its job payload.
+
+    Args:
+        value: Kafka message value: an envelope or plain JSON.
+        fetch: Returns the stored object of a claim check.
+
+    Returns:
+        The job payload.
+
+    Raises:
+        ValueError: If the message cannot be decoded.
+        TypeError: If the value is not bytes or str.
+    """
+    if isinstance(value, (bytes, bytearray)) and value[: len(MAGIC)] == MAGIC:
+        if len(value) < HEADER_SIZE:
+            raise ValueError("truncated message envelope")
+        version, fmt, compression = value[len(MAGIC) : HEADER_SIZE]
+        if version != VERSION:
+            raise ValueError(f"unsupported message envelope version {version}")
+
+        body = value[HEADER_SIZE:]
+        if fmt == FORMAT_CLAIM:
+            stored = resolve_claim(json.loads(_decompress(compression, body)), fetch)
+            if stored[: len(MAGIC)] != MAGIC or stored[len(MAGIC) + 1] == FORMAT_CLAIM:
+                raise ValueError("claim check does not refer to a message envelope")
+            return decode(stored)
+        payload = _deserialize(fmt, _decompress(compression, body))
+    else:
+        payload = json.loads(value)
+
+    if not isinstance(payload, dict):
+        raise ValueError("payload is not an object")
+    return payload
@@ -0,0 +1,235 @@
+"""Single-Pass Rendition Ladder.
+
+Encodes a rendered video into several resolutions (by default 1080p, 720p
+and 360p) for adaptive streaming. The source is decoded once and fanned out
+with ffmpeg's ``split`` filter into one scaler and encoder per rendition, and
+the renditions are written as HLS variant streams with a master playlist.
+Keyframes are aligned across renditions so players can switch between them.
+
+Author: Ruslan Magana (https://ruslanmv.com)
+License: Apache 2.0
+"""
+
+import json
+import logging
+import os
+import resource
+import shutil
+import subprocess
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+import segments
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Configuration constants
+RENDITION_LADDER = os.getenv("RENDITION_LADDER", "false").lower() == "true"
+RENDITION_HEIGHTS = [
+    int(h) for h in os.getenv("RENDITION_HEIGHTS", "1080,720,360").split(",") if h
+]
+HLS_SEGMENT_SECONDS = int(os.getenv("HLS_SEGMENT_SECONDS", "4"))
+FFPROBE_BIN = os.getenv("FFPROBE_BIN", "ffprobe")
+MASTER_PLAYLIST = "master.m3u8"
+
+# Target video bitrates in kbit/s by rendition height
+_BITRATES = {
+    2160: 14000,
+    1440: 9000,
+    1080: 5000,
+    720: 2800,
+    480: 1400,
+    360: 800,
+    240: 400,
+}
+
+
+class Rendition(NamedTuple):
+    """One rung of the ladder.
+
+    Attributes:
+        height: Output height in pixels (width keeps the aspect ratio).
+        bitrate: Target video bitrate in kbit/s.
+    """
+
+    height: int
+    bitrate: int
+
+    @property
+    def name(self) -> str:
+        return f"{self.height}p"
+
+
+def renditions(
+    heights: List[int], source_height: Optional[int] = None
+) -> List[Rendition]:
+    """Return the ladder for a source, never upscaling past its height.
+
+    Args:
+        heights: Requested rendition heights.
+        source_height: Height of the source video, if known.
+
+    Returns:
+        Renditions from highest to lowest; at least the lowest is kept.
+    """
+    ladder = sorted(set(heights), reverse=True)
+    if source_height:
+        ladder = [h for h in ladder if h <= source_height] or [min(ladder)]
+    return [Rendition(h, _BITRATES.get(h, max(300, h * 5))) for h in ladder]
+
+
+def probe(path: Path) -> Dict[str, object]:
+    """Return the height of a video and whether it has an audio stream.
+
+    Args:
+        path: Video file.
+
+    Returns:
+        Dict with ``height`` (int or None) and ``audio`` (bool).
+    """
+    if not shutil.which(FFPROBE_BIN):
+        return {"height": None, "audio": False}
+
+    result = subprocess.run(
+        [FFPROBE_BIN, "-v", "error", "-show_streams", "-of", "json", str(path)],
+        capture_output=True,
+        text=True,
+    )
+    streams = json.loads(result.stdout or "{}").get("streams", [])
+    video = next((s for s in streams if s.get("codec_type") == "video"), {})
+    return {
+        "height": video.get("height"),
+        "audio": any(s.get("codec_type") == "audio" for s in streams),
+    }
+
+
+def ladder_command(
+    source: Path, output_dir: Path, ladder: List[Rendition], audio: bool
+) -> List[str]:
+    """Build the ffmpeg command that encodes every rendition in one pass.
+
+    Args:
+        source: Rendered video.
+        output_dir: Directory for the playlists and segments.
+        ladder: Renditions to produce.
+        audio: Whether to carry the source's first audio stream.
+
+    Returns:
+        List of command-line arguments.
+    """
+    count = len(ladder)
+    gop = segments.VIDEO_FPS * HLS_SEGMENT_SECONDS
+
+    graph = [f"[0:v]split={count}" + "".join(f"[s{i}]" for i in range(count))]
+    graph += [f"[s{i}]scale=-2:{r.height}[v{i}]" for i, r in enumerate(ladder)]
+
+    command = [
+        segments.FFMPEG_BIN,
+        "-y",
+        "-loglevel",
+        "error",
+        "-i",
+        str(source),
+        "-filter_complex",
+        ";".join(graph),
+    ]
+    stream_map = []
+    for i, rendition in enumerate(ladder):
+        command += [
+            "-map",
+            f"[v{i}]",
+            f"-c:v:{i}",
+            "libx264",
+            f"-b:v:{i}",
+            f"{rendition.bitrate}k",
+            f"-maxrate:v:{i}",
+            f"{int(rendition.bitrate * 1.07)}k",
+            f"-bufsize:v:{i}",
+            f"{int(rendition.bitrate * 1.5)}k",
+        ]
+        entry = f"v:{i}"
+        if audio:
+            command += ["-map", "0:a:0"]
+            entry += f",a:{i}"
+        stream_map.append(f"{entry},name:{rendition.name}")
+
+    if audio:
+        command += ["-c:a", "aac", "-b:a", "128k"]
+
+    command += [
+        "-preset",
+        "veryfast",
+        "-pix_fmt",
+        "yuv420p",
+        # Identical keyframe positions in every rendition for clean switching
+        "-g",
+        str(gop),
+        "-keyint_min",
+        str(gop),
+        "-sc_threshold",
+        "0",
+        "-f",
+        "hls",
+        "-hls_time",
+        str(HLS_SEGMENT_SECONDS),
+        "-hls_playlist_type",
+        "vod",
+        "-hls_segment_filename",
+        str(output_dir / "%v" / "segment_%05d.ts"),
+        "-master_pl_name",
+        MASTER_PLAYLIST,
+        "-var_stream_map",
+        " ".join(stream_map),
+        str(output_dir / "%v" / "index.m3u8"),
+    ]
+    return command
+
+
+def encode_ladder(job_id: str, source: Path, output_dir: Path) -> Optional[Path]:
+    """Encode a rendered video into an HLS rendition ladder.
+
+    Args:
+        job_id: Unique identifier for the rendering job.
+        source: Rendered video.
+        output_dir: Directory to write the playlists and segments to.
+
+    Returns:
+        Path of the master playlist, or None if ffmpeg is not installed.
+
+    Raises:
+        RuntimeError: If ffmpeg fails.
+    """
+    if not segments.ffmpeg_available():
+        logger.warning(
+            f"[{job_id}] {segments.FFMPEG_BIN} not found - skipping rendition ladder"
+        )
+        return None
+
+    info = probe(source)
+    ladder = renditions(RENDITION_HEIGHTS, info["height"])
+    for rendition in ladder:
+        (output_dir / rendition.name).mkdir(parents=True, exist_ok=True)
+
+    logger.info(
+        f"[{job_id}] Encoding renditions {[r.name for r in ladder]} in one pass"
+    )
+    before = resource.getrusage(resource.RUSAGE_CHILDREN)
+
+    result = subprocess.run(
+        ladder_command(source, output_dir, ladder, bool(info["audio"])),
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Rendition encoding failed: {result.stderr[-1000:]}")
+
+    after = resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu_seconds = (after.ru_utime - before.ru_utime) + (
+        after.ru_stime - before.ru_stime
+    )
+    logger.info(
+        f"[{job_id}] Rendition ladder encoded using {cpu_seconds:.1f} CPU seconds"
+    )
+
+    return output_dir / MASTER_PLAYLIST
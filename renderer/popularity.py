@@ -0,0 +1,195 @@
+"""Avatar Popularity and Cache Warm-Up.
+
+Renderers count the avatars they render and add the counts to a small COS
+object per node, ``stats/avatar-popularity/{node}.json``, so pods on
+different nodes never contend for one object and a replaced pod continues
+its node's counts. Counts are written in batches rather than after every
+job. A new pod merges the recent objects and warms the node-local asset
+cache with the most popular avatars in a background thread, while its first
+job is still being fetched and parsed.
+
+Author: Ruslan Magana (https://ruslanmv.com)
+License: Apache 2.0
+"""
+
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, List, Optional
+
+from asset_cache import AssetCache
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Configuration constants
+AVATAR_PREFETCH = os.getenv("AVATAR_PREFETCH", "true").lower() == "true"
+AVATAR_PREFETCH_TOP_N = int(os.getenv("AVATAR_PREFETCH_TOP_N", "10"))
+# Only node stats updated within this window count towards popularity
+POPULARITY_WINDOW_HOURS = float(os.getenv("POPULARITY_WINDOW_HOURS", "168"))
+# Write the counts after this many renders or seconds, whichever comes first
+POPULARITY_FLUSH_JOBS = int(os.getenv("POPULARITY_FLUSH_JOBS", "20"))
+POPULARITY_FLUSH_SECONDS = float(os.getenv("POPULARITY_FLUSH_SECONDS", "300"))
+POPULARITY_PREFIX = "stats/avatar-popularity"
+# Set from spec.nodeName with the downward API; pod names change on every rollout
+NODE_NAME = os.getenv("NODE_NAME") or os.getenv("HOSTNAME") or socket.gethostname()
+
+
+def _is_missing(error: Exception) -> bool:
+    """Return whether a COS error means the object does not exist."""
+    response = getattr(error, "response", None) or {}
+    return str(response.get("Error", {}).get("Code", "")) in ("NoSuchKey", "404")
+
+
+class PopularityTracker:
+    """Counts the avatars rendered by this process and adds them to COS.
+
+    Args:
+        s3_client: boto3 S3 client.
+        bucket: COS bucket name.
+        node: Name of this node; its counts are stored under this name.
+    """
+
+    def __init__(self, s3_client: Any, bucket: str, node: str = NODE_NAME) -> None:
+        self.s3 = s3_client
+        self.bucket = bucket
+        self.key = f"{POPULARITY_PREFIX}/{node}.json"
+        self.pending: Counter = Counter()
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+    def record(self, avatar_id: str) -> None:
+        """Count one render of an avatar."""
+        with self._lock:
+            self.pending[avatar_id] += 1
+
+    def maybe_flush(self) -> None:
+        """Flush if enough renders or time have accrued since the last flush."""
+        with self._lock:
+            due = (
+                sum(self.pending.values()) >= POPULARITY_FLUSH_JOBS
+                or time.monotonic() - self._last_flush >= POPULARITY_FLUSH_SECONDS
+            )
+        if due:
+            self.flush()
+
+    def _stored(self) -> Counter:
+        """Return the counts already stored for this node."""
+        try:
+            body = self.s3.get_object(Bucket=self.bucket, Key=self.key)["Body"].read()
+            return Counter(json.loads(body).get("avatars", {}))
+        except Exception as e:
+            if not _is_missing(e):
+                raise
+            return Counter()
+
+    def flush(self) -> None:
+        """Add the pending counts to COS; failures are logged, not raised."""
+        with self._lock:
+            batch = Counter(self.pending)
+            self._last_flush = time.monotonic()
+        if not batch:
+            return
+
+        try:
+            # Read back first, so other pods on this node keep their counts
+            counts = self._stored() + batch
+            body = json.dumps({"avatars": dict(counts), "updatedAt": time.time()})
+            self.s3.put_object(
+                Bucket=self.bucket,
+                Key=self.key,
+                Body=body.encode(),
+                ContentType="application/json",
+            )
+        except Exception as e:
+            logger.warning(f"Failed to store avatar popularity: {e}")
+            return
+
+        with self._lock:
+            self.pending.subtract(batch)
+            self.pending = +self.pending
+
+
+def top_avatars(
+    s3_client: Any,
+    bucket: str,
+    limit: int = AVATAR_PREFETCH_TOP_N,
+    window_hours: float = POPULARITY_WINDOW_HOURS,
+) -> List[str]:
+    """Merge the recent per-node counts and return the most popular avatars.
+
+    Args:
+        s3_client: boto3 S3 client.
+        bucket: COS bucket name.
+        limit: Number of avatars to return.
+        window_hours: Ignore node stats last updated longer ago than this.
+
+    Returns:
+        Avatar IDs, most rendered first.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=window_hours)
+    totals: Counter = Counter()
+
+    paginator = s3_client.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=bucket, Prefix=f"{POPULARITY_PREFIX}/"):
+        for item in page.get("Contents", []):
+            if item["LastModified"] < cutoff:
+                continue
+            body = s3_client.get_object(Bucket=bucket, Key=item["Key"])["Body"].read()
+            totals.update(json.loads(body).get("avatars", {}))
+
+    return [avatar for avatar, _ in totals.most_common(limit)]
+
+
+def start_prefetch(
+    s3_client: Any,
+    bucket: str,
+    cache: AssetCache,
+    key_for: Callable[[str], str],
+    limit: int = AVATAR_PREFETCH_TOP_N,
+) -> Optional[threading.Thread]:
+    """Warm the asset cache with the most popular avatars in the background.
+
+    Args:
+        s3_client: boto3 S3 client.
+        bucket: COS bucket name.
+        cache: Node-local asset cache to fill.
+        key_for: Maps an avatar ID to its COS key.
+        limit: Number of avatars to warm.
+
+    Returns:
+        The started daemon thread, or None if ``limit`` is zero.
+    """
+    if limit <= 0:
+        return None
+
+    def warm() -> None:
+        start = time.perf_counter()
+        try:
+            avatars = top_avatars(s3_client, bucket, limit)
+        except Exception as e:
+            logger.warning(f"Avatar prefetch skipped, popularity unavailable: {e}")
+            return
+
+        fetched = 0
+        for avatar_id in avatars:
+            try:
+                fetched += cache.warm(
+                    s3_client, bucket, key_for(avatar_id)
+                ).bytes_fetched
+            except Exception as e:
+                logger.warning(f"Failed to prefetch avatar '{avatar_id}': {e}")
+
+        elapsed = time.perf_counter() - start
+        logger.info(
+            f"Prefetched {len(avatars)} popular avatars ({fetched} bytes) in {elapsed:.1f}s"
+        )
+
+    thread = threading.Thread(target=warm, name="avatar-prefetch", daemon=True)
+    thread.start()
+    return thread
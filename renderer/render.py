@@ -9,13 +9,33 @@ Author: Ruslan Magana (https://ruslanmv.com)
 License: Apache 2.0
 """
 
-import json
+import argparse
+import atexit
+import functools
+import importlib.util
 import logging
+import mimetypes
 import os
+import shutil
+import subprocess
+import sys
+import threading
 import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import checkpoint
+import cpu_backend
+import incremental
+import job_message
+import ladder
+import popularity
+import segments
+import startup
+import transfer
+from asset_cache import AssetCache, FetchResult
 
 # Configure logging
 logging.basicConfig(
@@ -33,25 +53,61 @@ COS_ENDPOINT = os.getenv(
 )
 COS_ACCESS_KEY = os.getenv("COS_ACCESS_KEY")
 COS_SECRET_KEY = os.getenv("COS_SECRET_KEY")
+S3_MAX_POOL_CONNECTIONS = int(os.getenv("S3_MAX_POOL_CONNECTIONS", "32"))
+RENDER_WORK_DIR = Path(os.getenv("RENDER_WORK_DIR", "/tmp"))
+ASSET_CACHE = os.getenv("ASSET_CACHE", "true").lower() == "true"
+ASSET_CACHE_DIR = Path(os.getenv("ASSET_CACHE_DIR", "/tmp/videogenie-asset-cache"))
+ASSET_CACHE_MAX_BYTES = int(os.getenv("ASSET_CACHE_MAX_BYTES", str(5 * 1024**3)))
+RENDER_BACKEND = os.getenv("RENDER_BACKEND", "auto").lower()  # auto, gpu or cpu
+STREAM_UPLOAD = os.getenv("STREAM_UPLOAD", "false").lower() == "true"
+FFMPEG_BIN = os.getenv("FFMPEG_BIN", "ffmpeg")
+WORDS_PER_MINUTE = 150
+
+# Content types of streaming outputs that mimetypes does not know reliably
+CONTENT_TYPES = {
+    ".mp4": "video/mp4",
+    ".m3u8": "application/vnd.apple.mpegurl",
+    ".ts": "video/mp2t",
+    ".m4s": "video/iso.segment",
+    ".mpd": "application/dash+xml",
+}
 
 # Validate required configuration
 if not COS_ACCESS_KEY or not COS_SECRET_KEY:
     logger.warning("COS credentials not configured - S3 operations will fail")
 
 
-# Import boto3 if available (for IBM Cloud Object Storage)
-try:
-    import boto3
-    from botocore.exceptions import BotoCoreError, ClientError
-
-    S3_CLIENT_AVAILABLE = True
-except ImportError:
+# boto3 (for IBM Cloud Object Storage) is imported on first use, not at start-up
+S3_CLIENT_AVAILABLE = importlib.util.find_spec("boto3") is not None
+if not S3_CLIENT_AVAILABLE:
     logger.warning("boto3 not available - COS operations will be simulated")
-    S3_CLIENT_AVAILABLE = False
+
+# One pooled S3 client per process; boto3 clients are thread-safe
+_s3_client: Optional[Any] = None
+_s3_client_lock = threading.Lock()
+
+# Node-local asset cache, created on first use
+_asset_cache: Optional[AssetCache] = None
+
+# Avatar render counts of this pod, created on first use
+_popularity: Optional[popularity.PopularityTracker] = None
+
+
+def _cos_errors() -> Tuple[type, ...]:
+    """Return the botocore exception types, importing them on first use."""
+    try:
+        from botocore.exceptions import BotoCoreError, ClientError
+    except ImportError:
+        return ()
+    return (BotoCoreError, ClientError)
 
 
 def get_s3_client() -> Optional[Any]:
-    """Create and configure S3 client for IBM Cloud Object Storage.
+    """Return the process-wide S3 client for IBM Cloud Object Storage.
+
+    The client is created once and reused, so its HTTP connection pool
+    (``S3_MAX_POOL_CONNECTIONS`` connections) is shared by every download and
+    upload in the process.
 
     Returns:
         boto3 S3 client if credentials are available, None otherwise.
@@ -67,29 +123,92 @@ def get_s3_client() -> Optional[Any]:
         logger.warning("COS credentials not set, returning None")
         return None
 
-    try:
-        logger.info("Initializing S3 client for IBM Cloud Object Storage")
+    global _s3_client
+    with _s3_client_lock:
+        if _s3_client is not None:
+            return _s3_client
 
-        client = boto3.client(
-            "s3",
-            endpoint_url=COS_ENDPOINT,
-            aws_access_key_id=COS_ACCESS_KEY,
-            aws_secret_access_key=COS_SECRET_KEY,
-        )
+        try:
+            logger.info("Initializing S3 client for IBM Cloud Object Storage")
+            import boto3
+            from botocore.config import Config
+
+            _s3_client = boto3.client(
+                "s3",
+                endpoint_url=COS_ENDPOINT,
+                aws_access_key_id=COS_ACCESS_KEY,
+                aws_secret_access_key=COS_SECRET_KEY,
+                config=Config(max_pool_connections=S3_MAX_POOL_CONNECTIONS),
+            )
+
+            logger.info(
+                f"S3 client initialized successfully "
+                f"(max_pool_connections={S3_MAX_POOL_CONNECTIONS})"
+            )
+            return _s3_client
+
+        except Exception as e:
+            logger.error(f"Failed to initialize S3 client: {e}")
+            raise
+
+
+def get_asset_cache() -> Optional[AssetCache]:
+    """Return the node-local asset cache, or None if it is disabled.
+
+    Returns:
+        AssetCache rooted at ``ASSET_CACHE_DIR`` when ``ASSET_CACHE`` is set.
+    """
+    global _asset_cache
+    if not ASSET_CACHE:
+        return None
+    if _asset_cache is None:
+        _asset_cache = AssetCache(ASSET_CACHE_DIR, ASSET_CACHE_MAX_BYTES)
+    return _asset_cache
+
+
+def avatar_object_key(avatar_id: str) -> str:
+    """Return the COS key of an avatar image."""
+    return f"avatars/{avatar_id}.png"
 
-        logger.info("S3 client initialized successfully")
-        return client
 
+def get_popularity_tracker() -> Optional[popularity.PopularityTracker]:
+    """Return this process's avatar popularity tracker, or None without COS.
+
+    Counts still pending when the process exits are flushed then.
+    """
+    global _popularity
+    if _popularity is None:
+        s3_client = get_s3_client()
+        if s3_client:
+            _popularity = popularity.PopularityTracker(s3_client, COS_BUCKET)
+            atexit.register(_popularity.flush)
+    return _popularity
+
+
+def start_avatar_prefetch() -> None:
+    """Warm the asset cache with the most popular avatars in the background.
+
+    Called at start-up before the first job is parsed or consumed, so a new
+    pod's first downloads of popular avatars are already cache hits.
+    """
+    if not popularity.AVATAR_PREFETCH:
+        return
+    try:
+        s3_client = get_s3_client()
     except Exception as e:
-        logger.error(f"Failed to initialize S3 client: {e}")
-        raise
+        logger.warning(f"Avatar prefetch skipped: {e}")
+        return
+    cache = get_asset_cache()
+    if s3_client and cache:
+        popularity.start_prefetch(s3_client, COS_BUCKET, cache, avatar_object_key)
 
 
 def download_assets(job_id: str, payload: Dict[str, Any]) -> str:
     """Download required assets from IBM Cloud Object Storage.
 
     Downloads avatar images, audio files, and other assets needed for rendering.
-    In production, this would use boto3 to fetch files from COS.
+    Avatars go through the node-local asset cache, which revalidates cached
+    copies by ETag and hard-links them into the job workspace.
 
     Args:
         job_id: Unique identifier for the rendering job.
@@ -103,10 +222,10 @@ def download_assets(job_id: str, payload: Dict[str, Any]) -> str:
         >>> print(assets_path)
         '/tmp/abc-123/'
     """
-    asset_path = f"/tmp/{job_id}/"
+    asset_path = f"{RENDER_WORK_DIR / job_id}/"
     Path(asset_path).mkdir(parents=True, exist_ok=True)
 
-    avatar_id = payload.get("avatar", "default")
+    avatar_id = payload.get("avatar") or payload.get("avatarId") or "default"
     logger.info(f"[{job_id}] Downloading assets for avatar '{avatar_id}'")
 
     # Get S3 client
@@ -115,20 +234,40 @@ def download_assets(job_id: str, payload: Dict[str, Any]) -> str:
     if s3_client and S3_CLIENT_AVAILABLE:
         try:
             # Download avatar image from COS
-            avatar_key = f"avatars/{avatar_id}.png"
+            avatar_key = avatar_object_key(avatar_id)
             local_avatar_path = Path(asset_path) / "avatar.png"
 
             logger.info(f"[{job_id}] Downloading {avatar_key} from COS")
 
-            s3_client.download_file(
-                Bucket=COS_BUCKET,
-                Key=avatar_key,
-                Filename=str(local_avatar_path),
-            )
+            cache = get_asset_cache()
+            lookups: List[FetchResult] = []
+            if cache:
+                lookups.append(
+                    cache.fetch(s3_client, COS_BUCKET, avatar_key, local_avatar_path)
+                )
+            else:
+                s3_client.download_file(
+                    Bucket=COS_BUCKET,
+                    Key=avatar_key,
+                    Filename=str(local_avatar_path),
+                    Config=transfer.transfer_config(),
+                )
 
             logger.info(f"[{job_id}] Avatar downloaded successfully")
-
-        except (BotoCoreError, ClientError) as e:
+            tracker = get_popularity_tracker()
+            if tracker:
+                tracker.record(avatar_id)
+            if cache:
+                hits = sum(lookup.hit for lookup in lookups)
+                stats = cache.stats()
+                logger.info(
+                    f"[{job_id}] Asset cache: {hits} hits, "
+                    f"{len(lookups) - hits} misses, "
+                    f"{sum(lookup.bytes_fetched for lookup in lookups)} bytes fetched "
+                    f"(process hit ratio {stats['hitRatio']:.0%})"
+                )
+
+        except _cos_errors() as e:
             logger.error(f"[{job_id}] COS download error: {e}")
             logger.warning(f"[{job_id}] Falling back to simulation mode")
             time.sleep(5)  # Simulate download
@@ -142,6 +281,35 @@ def download_assets(job_id: str, payload: Dict[str, Any]) -> str:
     return asset_path
 
 
+def detect_device(job_id: str) -> str:
+    """Log and return the device the render will use.
+
+    The capability probe imports PyTorch, so it runs once per node and is
+    then read from ``startup.DEVICE_PROBE_FILE`` (see ``startup.py``).
+
+    Args:
+        job_id: Unique identifier for the rendering job.
+
+    Returns:
+        str: ``"cuda"`` if a GPU is available, otherwise ``"cpu"``.
+    """
+    probe = startup.probe_device()
+
+    if probe["device"] == "cuda":
+        logger.info(
+            f"[{job_id}] Using GPU: {probe['name']} ({probe['memoryGb']:.1f} GB)"
+        )
+        return "cuda"
+
+    logger.warning(f"[{job_id}] {probe.get('reason', 'No GPU')}, using CPU")
+    return "cpu"
+
+
+def estimate_seconds(script_text: str) -> float:
+    """Estimate the video duration from the script's speaking time."""
+    return max(1.0, len(script_text.split()) / WORDS_PER_MINUTE * 60)
+
+
 def execute_gpu_render(job_id: str, asset_path: str, script_text: str) -> str:
     """Execute GPU-accelerated video rendering.
 
@@ -151,6 +319,11 @@ def execute_gpu_render(job_id: str, asset_path: str, script_text: str) -> str:
     - Apply video effects and transitions
     - Encode output with NVENC hardware acceleration
 
+    Without a GPU (or with ``RENDER_BACKEND=cpu``) the frames are rendered by
+    the multi-core CPU backend instead. When COS is available the video is
+    rendered in chunks checkpointed to COS, so a restarted job with the same
+    ``jobId`` resumes from its first unfinished chunk.
+
     Args:
         job_id: Unique identifier for the rendering job.
         asset_path: Path to downloaded assets.
@@ -177,18 +350,30 @@ def execute_gpu_render(job_id: str, asset_path: str, script_text: str) -> str:
     # - Video composition and effects
 
     # Check GPU availability
-    try:
-        import torch
-
-        if torch.cuda.is_available():
-            gpu_name = torch.cuda.get_device_name(0)
-            gpu_memory = torch.cuda.get_device_properties(0).total_memory / 1e9
-            logger.info(f"[{job_id}] Using GPU: {gpu_name} ({gpu_memory:.1f} GB)")
+    device = detect_device(job_id)
+    use_cpu = RENDER_BACKEND == "cpu" or (RENDER_BACKEND == "auto" and device == "cpu")
+    frame_count = int(estimate_seconds(script_text) * segments.VIDEO_FPS)
+
+    store = checkpoint_store(job_id)
+    if store:
+        # Persist each finished chunk so a restarted job resumes where it stopped
+        if use_cpu:
+            renderer = functools.partial(cpu_backend.render_chunks, asset_path)
         else:
-            logger.warning(f"[{job_id}] CUDA not available, using CPU")
+            renderer = functools.partial(
+                render_gpu_chunks, asset_path, frame_count=frame_count
+            )
+        checkpoint.render_chunked(
+            job_id, asset_path, frame_count, output_path, renderer, store
+        )
+        logger.info(f"[{job_id}] Chunked render finished: '{output_filename}'")
+        return output_filename
 
-    except ImportError:
-        logger.warning(f"[{job_id}] PyTorch not available")
+    if use_cpu:
+        # Split the frames across one pinned worker per physical core
+        cpu_backend.render_frames(job_id, asset_path, frame_count, output_path)
+        logger.info(f"[{job_id}] CPU render finished: '{output_filename}'")
+        return output_filename
 
     # Simulate rendering process
     logger.info(f"[{job_id}] Rendering in progress...")
@@ -201,28 +386,157 @@ def execute_gpu_render(job_id: str, asset_path: str, script_text: str) -> str:
     return output_filename
 
 
+def checkpoint_store(job_id: str) -> Optional[checkpoint.ChunkStore]:
+    """Return the COS store for a job's chunk checkpoints, if enabled.
+
+    Args:
+        job_id: Unique identifier for the rendering job.
+
+    Returns:
+        ChunkStore, or None if checkpoints are disabled or COS is unavailable.
+    """
+    if not checkpoint.CHUNK_CHECKPOINTS:
+        return None
+    s3_client = get_s3_client()
+    return checkpoint.ChunkStore(s3_client, COS_BUCKET, job_id) if s3_client else None
+
+
+def segment_store() -> Optional[incremental.SegmentStore]:
+    """Return the COS store of content-addressed segments, if enabled.
+
+    Returns:
+        SegmentStore, or None if incremental rendering is disabled or COS is
+        unavailable.
+    """
+    if not incremental.INCREMENTAL_RENDER:
+        return None
+    s3_client = get_s3_client()
+    return incremental.SegmentStore(s3_client, COS_BUCKET) if s3_client else None
+
+
+def render_segments(
+    job_id: str,
+    asset_path: str,
+    payload: Dict[str, Any],
+    store: incremental.SegmentStore,
+) -> str:
+    """Render a video slide by slide, reusing the stored unchanged slides.
+
+    Each new slide goes through ``execute_gpu_render`` on its own, so the
+    GPU/CPU backend choice and chunk checkpoints apply to it as usual.
+
+    Args:
+        job_id: Unique identifier for the rendering job.
+        asset_path: Path to downloaded assets.
+        payload: Job payload with the script, voice and avatar.
+        store: Content-addressed segment store.
+
+    Returns:
+        str: Filename of the rendered video (MP4).
+    """
+    output_filename = f"{job_id}.mp4"
+
+    def render_segment(text: str, output: Path) -> None:
+        segment_id = f"{job_id}-{output.stem}"
+        video_file = execute_gpu_render(segment_id, asset_path, text)
+        shutil.move(str(Path(asset_path) / video_file), output)
+        own = checkpoint_store(segment_id)
+        if own:
+            own.clear()
+
+    incremental.render_incremental(
+        job_id,
+        payload,
+        asset_path,
+        Path(asset_path) / output_filename,
+        render_segment,
+        store,
+    )
+    return output_filename
+
+
+def render_gpu_chunks(
+    asset_path: str, chunks: List[checkpoint.Chunk], frame_count: int
+) -> Iterator[int]:
+    """Render chunks one after another on the GPU.
+
+    Placeholder: simulates a 45-second render spread across the chunks.
+
+    Args:
+        asset_path: Path to downloaded assets.
+        chunks: ``(index, frame range, output file)`` of each chunk.
+        frame_count: Frames in the whole video.
+
+    Yields:
+        int: Index of each chunk once its clip is written.
+    """
+    for index, frames, output in chunks:
+        time.sleep(45 * len(frames) / frame_count)  # Simulate GPU render of the chunk
+        segments.write_segment(frames, asset_path, output)
+        yield index
+
+
+def content_type(path: Path) -> str:
+    """Return the Content-Type to store an output file with, by extension.
+
+    Args:
+        path: Output file.
+
+    Returns:
+        str: MIME type; streaming formats missing from ``mimetypes`` are covered.
+    """
+    return (
+        CONTENT_TYPES.get(path.suffix.lower())
+        or mimetypes.guess_type(path.name)[0]
+        or "application/octet-stream"
+    )
+
+
 def upload_result(job_id: str, local_file: str, asset_path: str) -> str:
     """Upload rendered video to IBM Cloud Object Storage.
 
-    Uploads the final MP4 video to COS and returns the public URL.
+    Uploads the final MP4 video to COS and returns the public URL. Large files
+    are sent as a parallel multipart upload that resumes from the completed
+    parts after a transient error and is verified end to end by checksum.
+
+    ``local_file`` may also be a directory, such as an HLS rendition ladder;
+    every file in it is uploaded under ``videos/<local_file>/`` with a
+    Content-Type chosen by extension, and the URL of its master playlist is
+    returned.
 
     Args:
         job_id: Unique identifier for the rendering job.
-        local_file: Filename of the video to upload.
+        local_file: Filename of the video (or directory) to upload.
         asset_path: Local directory containing the video file.
 
     Returns:
-        str: Public URL of the uploaded video.
+        str: Public URL of the uploaded video or master playlist.
 
     Raises:
         FileNotFoundError: If the video file doesn't exist.
+        transfer.ChecksumError: If ``TRANSFER_VERIFY_ETAG`` is set and the uploaded
+            object's ETag does not match its checksum.
     """
     local_path = Path(asset_path) / local_file
 
     if not local_path.exists():
         raise FileNotFoundError(f"Video file not found: {local_path}")
 
-    logger.info(f"[{job_id}] Uploading '{local_file}' to COS bucket '{COS_BUCKET}'")
+    if local_path.is_dir():
+        files = sorted(p for p in local_path.rglob("*") if p.is_file())
+        entry = local_path / ladder.MASTER_PLAYLIST
+        url_key = (
+            f"videos/{local_file}/{ladder.MASTER_PLAYLIST}"
+            if entry.exists()
+            else f"videos/{local_file}/"
+        )
+    else:
+        files = [local_path]
+        url_key = f"videos/{local_file}"
+
+    logger.info(
+        f"[{job_id}] Uploading '{local_file}' ({len(files)} files) to COS bucket '{COS_BUCKET}'"
+    )
 
     # Get S3 client
     s3_client = get_s3_client()
@@ -230,23 +544,27 @@ def upload_result(job_id: str, local_file: str, asset_path: str) -> str:
     if s3_client and S3_CLIENT_AVAILABLE:
         try:
             # Upload to COS
-            cos_key = f"videos/{local_file}"
-
-            s3_client.upload_file(
-                Filename=str(local_path),
-                Bucket=COS_BUCKET,
-                Key=cos_key,
-                ExtraArgs={
-                    "ContentType": "video/mp4",
-                    "ACL": "public-read",  # Make publicly accessible
-                },
-            )
-
-            final_url = f"{COS_ENDPOINT}/{COS_BUCKET}/{cos_key}"
+            def upload(path: Path) -> None:
+                cos_key = f"videos/{path.relative_to(Path(asset_path)).as_posix()}"
+                transfer.upload_file(
+                    s3_client,
+                    path,
+                    COS_BUCKET,
+                    cos_key,
+                    extra_args={
+                        "ContentType": content_type(path),
+                        "ACL": "public-read",  # Make publicly accessible
+                    },
+                )
+
+            with ThreadPoolExecutor(max_workers=transfer.TRANSFER_CONCURRENCY) as pool:
+                list(pool.map(upload, files))
+
+            final_url = f"{COS_ENDPOINT}/{COS_BUCKET}/{url_key}"
             logger.info(f"[{job_id}] Upload complete: {final_url}")
             return final_url
 
-        except (BotoCoreError, ClientError) as e:
+        except _cos_errors() as e:
             logger.error(f"[{job_id}] COS upload error: {e}")
             logger.warning(f"[{job_id}] Falling back to simulation mode")
 
@@ -254,13 +572,242 @@ def upload_result(job_id: str, local_file: str, asset_path: str) -> str:
     logger.warning(f"[{job_id}] COS not available - simulating upload")
     time.sleep(5)  # Simulate upload time
 
-    final_url = f"{COS_ENDPOINT}/{COS_BUCKET}/videos/{local_file}"
+    final_url = f"{COS_ENDPOINT}/{COS_BUCKET}/{url_key}"
     logger.info(f"[{job_id}] Simulated upload complete: {final_url}")
 
     return final_url
 
 
-def main() -> None:
+class EncoderStream:
+    """Readable stdout of an encoder process that fails if the encoder fails.
+
+    Raising from ``read`` at end of stream makes a streaming upload abort
+    instead of completing a truncated video.
+
+    Args:
+        process: Encoder process started with ``stdout=PIPE``.
+    """
+
+    def __init__(self, process: subprocess.Popen) -> None:
+        self.process = process
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.process.stdout.read(size)
+        if not data:
+            returncode = self.process.wait()
+            if returncode != 0:
+                error = self.process.stderr.read().decode(errors="replace")[-1000:]
+                raise RuntimeError(
+                    f"Encoder failed with exit code {returncode}: {error}"
+                )
+        return data
+
+
+def encode_command(asset_path: str, script_text: str) -> List[str]:
+    """Build the ffmpeg command that encodes the video as fragmented MP4 on stdout.
+
+    Fragmented MP4 (``empty_moov`` plus a fragment per keyframe) can be written
+    to a pipe because, unlike a regular MP4, it never seeks back to patch its
+    header.
+
+    Placeholder: the avatar still is looped for the estimated speaking time
+    of the script; in production the frames come from the lip-sync model.
+
+    Args:
+        asset_path: Path to downloaded assets.
+        script_text: Script text for the video.
+
+    Returns:
+        List of command-line arguments.
+    """
+    seconds = estimate_seconds(script_text)
+    avatar = Path(asset_path) / "avatar.png"
+
+    if avatar.exists():
+        source = ["-loop", "1", "-framerate", "25", "-i", str(avatar)]
+    else:
+        source = ["-f", "lavfi", "-i", "color=c=black:s=1280x720:r=25"]
+
+    return [
+        FFMPEG_BIN,
+        "-y",
+        "-loglevel",
+        "error",
+        *source,
+        "-t",
+        f"{seconds:.2f}",
+        "-vf",
+        "scale=trunc(iw/2)*2:trunc(ih/2)*2,format=yuv420p",
+        "-c:v",
+        "libx264",
+        "-preset",
+        "veryfast",
+        "-movflags",
+        "frag_keyframe+empty_moov+default_base_moof",
+        "-f",
+        "mp4",
+        "pipe:1",
+    ]
+
+
+def stream_render_upload(
+    job_id: str, asset_path: str, script_text: str
+) -> Optional[str]:
+    """Encode the video and upload its fragments to COS as they are produced.
+
+    The encoder's stdout feeds a streaming multipart upload, so the upload
+    overlaps with encoding and the video is never written to local disk;
+    at most ``TRANSFER_CONCURRENCY`` parts are held in memory.
+
+    Args:
+        job_id: Unique identifier for the rendering job.
+        asset_path: Path to downloaded assets.
+        script_text: Script text for the video.
+
+    Returns:
+        Public URL of the uploaded video, or None if streaming is unavailable
+        (no ffmpeg or no COS client) and the caller should render to disk.
+
+    Raises:
+        RuntimeError: If the encoder fails; the partial upload is aborted.
+    """
+    if not shutil.which(FFMPEG_BIN):
+        logger.warning(f"[{job_id}] {FFMPEG_BIN} not found - streaming upload disabled")
+        return None
+
+    s3_client = get_s3_client()
+    if not s3_client:
+        logger.warning(f"[{job_id}] COS not available - streaming upload disabled")
+        return None
+
+    detect_device(job_id)
+    cos_key = f"videos/{job_id}.mp4"
+    logger.info(f"[{job_id}] Streaming encoder output to COS: {cos_key}")
+
+    process = subprocess.Popen(
+        encode_command(asset_path, script_text),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    try:
+        transfer.upload_stream(
+            s3_client,
+            EncoderStream(process),
+            COS_BUCKET,
+            cos_key,
+            extra_args={"ContentType": "video/mp4", "ACL": "public-read"},
+        )
+    finally:
+        if process.poll() is None:
+            process.kill()
+        process.wait()
+
+    final_url = f"{COS_ENDPOINT}/{COS_BUCKET}/{cos_key}"
+    logger.info(f"[{job_id}] Streaming upload complete: {final_url}")
+    return final_url
+
+
+def run_job(
+    payload: Dict[str, Any],
+    job_id: Optional[str] = None,
+    asset_path: Optional[str] = None,
+) -> str:
+    """Render one job end to end.
+
+    Args:
+        payload: Job payload.
+        job_id: Job identifier. Defaults to the payload's ``jobId``.
+        asset_path: Workspace whose assets were already downloaded (e.g.
+            prefetched by the daemon); downloaded now if omitted.
+
+    Returns:
+        str: Public URL of the uploaded video.
+    """
+    start_time = time.time()
+    job_id = job_id or payload.get("jobId", str(uuid.uuid4()))
+
+    logger.info("=" * 70)
+    logger.info(f"Processing GPU Rendering Job: {job_id}")
+    logger.info("=" * 70)
+
+    # Download assets
+    assets = asset_path or download_assets(job_id, payload)
+
+    # Encode straight into COS when possible, otherwise render then upload
+    final_url = None
+    if STREAM_UPLOAD:
+        final_url = stream_render_upload(job_id, assets, payload.get("script", ""))
+        if final_url is not None:
+            # These all work on a rendered file, which a streamed video never has
+            skipped = [
+                name
+                for name, enabled in (
+                    ("INCREMENTAL_RENDER", incremental.INCREMENTAL_RENDER),
+                    ("CHUNK_CHECKPOINTS", checkpoint.CHUNK_CHECKPOINTS),
+                    ("RENDITION_LADDER", ladder.RENDITION_LADDER),
+                )
+                if enabled
+            ]
+            if skipped:
+                logger.warning(
+                    f"[{job_id}] STREAM_UPLOAD is enabled, so {', '.join(skipped)} had no effect"
+                )
+
+    if final_url is None:
+        store = segment_store()
+        if store:
+            # Re-render only the slides whose content hash is not stored yet
+            video_file = render_segments(job_id, assets, payload, store)
+        else:
+            # Execute rendering
+            video_file = execute_gpu_render(
+                job_id,
+                assets,
+                payload.get("script", ""),
+            )
+
+        # Upload result
+        final_url = upload_result(job_id, video_file, assets)
+
+        # Encode and upload the adaptive-streaming renditions from one decode
+        if ladder.RENDITION_LADDER:
+            ladder_dir = f"{job_id}-hls"
+            master = ladder.encode_ladder(
+                job_id, Path(assets) / video_file, Path(assets) / ladder_dir
+            )
+            if master:
+                hls_url = upload_result(job_id, ladder_dir, assets)
+                logger.info(f"[{job_id}] HLS master playlist: {hls_url}")
+
+    # Persist the avatar counts for the warm-up of future pods, in batches
+    tracker = get_popularity_tracker()
+    if tracker:
+        tracker.maybe_flush()
+
+    # The video is stored, so its chunk checkpoints are no longer needed
+    store = checkpoint_store(job_id)
+    if store:
+        store.clear()
+
+    # Remove the job workspace (cached assets are only unlinked)
+    shutil.rmtree(assets, ignore_errors=True)
+
+    # Calculate metrics
+    elapsed = round(time.time() - start_time, 2)
+
+    logger.info("=" * 70)
+    logger.info(f"SUCCESS: Job {job_id} completed in {elapsed}s")
+    logger.info(f"Video URL: {final_url}")
+    logger.info("=" * 70)
+
+    print(f"\n✓ Job completed: {job_id}")
+    print(f"✓ Duration: {elapsed}s")
+    print(f"✓ Video: {final_url}\n")
+
+    return final_url
+
+
+def main(argv: Optional[List[str]] = None) -> None:
     """Main execution function.
 
     Orchestrates the complete rendering pipeline:
@@ -270,52 +817,87 @@ def main() -> None:
     4. Upload result to COS
     5. Log metrics and completion
 
+    With ``--daemon`` the renderer instead consumes jobs from Kafka until it
+    is terminated (see ``daemon.py``). A payload with a ``chunk`` index is
+    one part of a parallel workflow render, and ``--merge-parts`` joins the
+    parts of a job (see ``fanout.py``).
+
+    Args:
+        argv: Command-line arguments. Defaults to ``sys.argv[1:]``.
+
     Raises:
         SystemExit: On fatal errors with appropriate exit code.
     """
-    start_time = time.time()
+    parser = argparse.ArgumentParser(description="WatsonX VideoGenie GPU Renderer")
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Consume jobs from the Kafka topic instead of JOB_PAYLOAD",
+    )
+    parser.add_argument(
+        "--merge-parts",
+        metavar="JOB_ID",
+        help="Join the parallel-rendered parts of a job and upload the video (see fanout.py)",
+    )
+    parser.add_argument(
+        "--parts",
+        type=int,
+        default=1,
+        help="Number of parts to join with --merge-parts",
+    )
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="Print an import-time breakdown and the device probe time, then exit",
+    )
+    args = parser.parse_args(argv)
+
+    if args.profile_startup:
+        startup.print_profile("render", cwd=Path(__file__).parent)
+        return
+
+    # Start warming popular avatars while the first job is still being read
+    start_avatar_prefetch()
+
+    uptime = startup.seconds_since_process_start()
+    if uptime is not None:
+        logger.info(f"Renderer ready {uptime:.2f}s after process start")
+
+    if args.daemon:
+        import daemon
+
+        daemon.main()
+        return
+
+    if args.merge_parts:
+        import fanout
+
+        try:
+            fanout.merge_parts(args.merge_parts, args.parts)
+        except Exception as e:
+            logger.error(f"FATAL: Merge failed with error: {e}", exc_info=True)
+            raise SystemExit(1)
+        return
 
     if not JOB_PAYLOAD_STR:
         logger.error("FATAL: Required 'JOB_PAYLOAD' env var not set")
         raise SystemExit(1)
 
     try:
-        # Parse payload
-        payload = json.loads(JOB_PAYLOAD_STR)
-        job_id = payload.get("jobId", str(uuid.uuid4()))
-
-        logger.info("=" * 70)
-        logger.info(f"Processing GPU Rendering Job: {job_id}")
-        logger.info("=" * 70)
-
-        # Download assets
-        assets = download_assets(job_id, payload)
-
-        # Execute rendering
-        video_file = execute_gpu_render(
-            job_id,
-            assets,
-            payload.get("script", ""),
-        )
-
-        # Upload result
-        final_url = upload_result(job_id, video_file, assets)
-
-        # Calculate metrics
-        elapsed = round(time.time() - start_time, 2)
-
-        logger.info("=" * 70)
-        logger.info(f"SUCCESS: Job {job_id} completed in {elapsed}s")
-        logger.info(f"Video URL: {final_url}")
-        logger.info("=" * 70)
+        # Parse payload (plain JSON, or an envelope like the daemon's messages)
+        payload = job_message.decode(JOB_PAYLOAD_STR.encode("utf-8"))
+    except ValueError as e:
+        logger.error(f"FATAL: Invalid JOB_PAYLOAD: {e}")
+        raise SystemExit(1)
 
-        print(f"\n✓ Job completed: {job_id}")
-        print(f"✓ Duration: {elapsed}s")
-        print(f"✓ Video: {final_url}\n")
+    try:
+        if "chunk" in payload:
+            # One part of a workflow fan-out; the merge step uploads the video
+            import fanout
 
-    except json.JSONDecodeError as e:
-        logger.error(f"FATAL: Invalid JSON in JOB_PAYLOAD: {e}")
-        raise SystemExit(1)
+            fanout.render_part(payload)
+        else:
+            run_job(payload)
 
     except Exception as e:
         logger.error(f"FATAL: Job failed with error: {e}", exc_info=True)
@@ -323,6 +905,9 @@ def main() -> None:
 
 
 if __name__ == "__main__":
+    # daemon.py and fanout.py "import render"; alias this module so they share
+    # its state instead of loading and initialising render.py a second time
+    sys.modules.setdefault("render", sys.modules[__name__])
     logger.info("=== WatsonX VideoGenie GPU Renderer Started ===")
     main()
     logger.info("=== WatsonX VideoGenie GPU Renderer Finished ===")
@@ -0,0 +1,162 @@
+"""Video Segment Helpers for the GPU Renderer.
+
+Renders and joins the contiguous pieces a video is split into, so that
+render backends can produce segments independently and merge them in order.
+Segments are encoded with ffmpeg when it is installed and joined with the
+concat demuxer without re-encoding; without ffmpeg (development) they are
+placeholder files joined byte by byte.
+
+Author: Ruslan Magana (https://ruslanmv.com)
+License: Apache 2.0
+"""
+
+import logging
+import os
+import shutil
+import subprocess
+from pathlib import Path
+from typing import List, Sequence
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Configuration constants
+FFMPEG_BIN = os.getenv("FFMPEG_BIN", "ffmpeg")
+VIDEO_FPS = int(os.getenv("VIDEO_FPS", "25"))
+
+
+def ffmpeg_available() -> bool:
+    """Return whether ffmpeg can be used to encode and join segments."""
+    return shutil.which(FFMPEG_BIN) is not None
+
+
+def frame_ranges(frame_count: int, parts: int) -> List[range]:
+    """Split ``range(frame_count)`` into at most ``parts`` contiguous ranges.
+
+    Args:
+        frame_count: Number of frames in the video.
+        parts: Number of ranges wanted.
+
+    Returns:
+        Non-empty ranges in order, whose sizes differ by at most one frame.
+
+    Example:
+        >>> frame_ranges(10, 3)
+        [range(0, 4), range(4, 7), range(7, 10)]
+    """
+    parts = max(1, min(parts, frame_count))
+    size, extra = divmod(frame_count, parts)
+    ranges = []
+    start = 0
+    for index in range(parts):
+        end = start + size + (1 if index < extra else 0)
+        ranges.append(range(start, end))
+        start = end
+    return ranges
+
+
+def write_segment(frames: range, asset_path: str, output: Path) -> Path:
+    """Encode the frames of one segment.
+
+    Placeholder: frames are the avatar still (or black if there is none); in
+    production they come from the lip-sync model.
+
+    Args:
+        frames: Frame range of the segment.
+        asset_path: Path to downloaded assets.
+        output: Segment file to write.
+
+    Returns:
+        Path: The written segment.
+
+    Raises:
+        RuntimeError: If ffmpeg fails.
+    """
+    output.parent.mkdir(parents=True, exist_ok=True)
+
+    if not ffmpeg_available():
+        output.write_text(f"Placeholder frames {frames.start}-{frames.stop - 1}\n")
+        return output
+
+    avatar = Path(asset_path) / "avatar.png"
+    if avatar.exists():
+        source = ["-loop", "1", "-framerate", str(VIDEO_FPS), "-i", str(avatar)]
+    else:
+        source = ["-f", "lavfi", "-i", f"color=c=black:s=1280x720:r={VIDEO_FPS}"]
+
+    command = [
+        FFMPEG_BIN,
+        "-y",
+        "-loglevel",
+        "error",
+        *source,
+        "-frames:v",
+        str(len(frames)),
+        "-vf",
+        "scale=trunc(iw/2)*2:trunc(ih/2)*2,format=yuv420p",
+        "-c:v",
+        "libx264",
+        "-preset",
+        "veryfast",
+        "-threads",
+        "1",
+        str(output),
+    ]
+
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Segment encoding failed: {result.stderr[-1000:]}")
+    return output
+
+
+def concat_segments(segments: Sequence[Path], output: Path) -> Path:
+    """Join segments in order into one video without re-encoding.
+
+    Args:
+        segments: Segment files in playback order.
+        output: Video file to write.
+
+    Returns:
+        Path: The joined video.
+
+    Raises:
+        RuntimeError: If ffmpeg fails.
+    """
+    if not ffmpeg_available():
+        with open(output, "wb") as target:
+            for segment in segments:
+                with open(segment, "rb") as source:
+                    shutil.copyfileobj(source, target)
+        return output
+
+    playlist = output.with_suffix(".concat.txt")
+    playlist.write_text("".join(f"file '{Path(s).resolve()}'\n" for s in segments))
+
+    command = [
+        FFMPEG_BIN,
+        "-y",
+        "-loglevel",
+        "error",
+        "-f",
+        "concat",
+        "-safe",
+        "0",
+        "-i",
+        str(playlist),
+        "-c",
+        "copy",
+        "-movflags",
+        "+faststart",
+        str(output),
+    ]
+
+    try:
+        result = subprocess.run(command, capture_output=True, text=True)
+    finally:
+        playlist.unlink(missing_ok=True)
+
+    if result.returncode != 0:
+        raise RuntimeError(f"Segment concatenation failed: {result.stderr[-1000:]}")
+
+    logger.info(f"Joined {len(segments)} segments into {output.name}")
+    return output
@@ -0,0 +1,211 @@
+"""Renderer Start-Up Profiling and Device Probe Cache.
+
+Importing PyTorch only to find out whether a GPU is present costs seconds
+on every container start. The probe result is therefore cached in a
+node-local JSON file (``DEVICE_PROBE_FILE``), written by the first renderer
+on a node and reused by later pods until the node reboots or its NVIDIA
+driver changes.
+
+``profile_imports`` reports where start-up time goes by running
+``python -X importtime`` in a child process; the renderer prints it with
+``--profile-startup``.
+
+Author: Ruslan Magana (https://ruslanmv.com)
+License: Apache 2.0
+"""
+
+import json
+import logging
+import os
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Configuration constants
+DEVICE_PROBE_FILE = Path(os.getenv("DEVICE_PROBE_FILE", "/tmp/videogenie-device.json"))
+# Modules that are only imported when a job needs them
+OPTIONAL_MODULES = ("boto3", "torch", "kafka")
+
+_IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+# Device probe of this process, resolved on first use
+_device: Optional[Dict[str, Any]] = None
+
+
+class ImportTiming(NamedTuple):
+    """Import cost of one module.
+
+    Attributes:
+        module: Module name.
+        self_ms: Time spent in the module itself, in milliseconds.
+        total_ms: Time including the modules it imported, in milliseconds.
+    """
+
+    module: str
+    self_ms: float
+    total_ms: float
+
+
+def _read(path: str) -> str:
+    """Return the stripped first line of a file, or "" if it is unreadable."""
+    try:
+        with open(path) as f:
+            return f.readline().strip()
+    except OSError:
+        return ""
+
+
+def node_fingerprint() -> Dict[str, str]:
+    """Return what a cached device probe depends on.
+
+    Returns:
+        Boot ID of the node, NVIDIA driver version line and the GPUs exposed
+        to this container by the device plugin.
+    """
+    return {
+        "bootId": _read("/proc/sys/kernel/random/boot_id"),
+        "driver": _read("/proc/driver/nvidia/version"),
+        "visibleDevices": os.getenv("NVIDIA_VISIBLE_DEVICES", ""),
+    }
+
+
+def _probe_torch() -> Dict[str, Any]:
+    """Import PyTorch and describe the first CUDA device."""
+    try:
+        import torch
+    except ImportError:
+        return {"device": "cpu", "reason": "PyTorch not available"}
+
+    if not torch.cuda.is_available():
+        return {"device": "cpu", "reason": "CUDA not available"}
+
+    return {
+        "device": "cuda",
+        "name": torch.cuda.get_device_name(0),
+        "memoryGb": round(torch.cuda.get_device_properties(0).total_memory / 1e9, 1),
+        "count": torch.cuda.device_count(),
+    }
+
+
+def probe_device(path: Path = DEVICE_PROBE_FILE) -> Dict[str, Any]:
+    """Return the node's device capabilities, probing only on a cache miss.
+
+    Args:
+        path: Node-local file holding the cached probe.
+
+    Returns:
+        Dict with ``device`` (``"cuda"`` or ``"cpu"``) and either the GPU
+        ``name`` and ``memoryGb`` or the ``reason`` no GPU is used.
+    """
+    global _device
+    if _device is not None:
+        return _device
+
+    fingerprint = node_fingerprint()
+    try:
+        cached = json.loads(path.read_text())
+        if cached.get("fingerprint") == fingerprint:
+            _device = cached["probe"]
+            return _device
+    except (OSError, ValueError, KeyError):
+        pass
+
+    start = time.perf_counter()
+    _device = _probe_torch()
+    logger.info(
+        f"Probed device in {time.perf_counter() - start:.2f}s: {_device['device']}"
+    )
+
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({"fingerprint": fingerprint, "probe": _device}))
+        os.replace(tmp, path)
+    except OSError as e:
+        logger.warning(f"Failed to cache device probe in {path}: {e}")
+
+    return _device
+
+
+def seconds_since_process_start() -> Optional[float]:
+    """Return how long this process has been running, from /proc.
+
+    In a container the renderer is PID 1's child or PID 1 itself, so this is
+    close to the time since the container started.
+    """
+    try:
+        # Fields after the parenthesised command name; starttime is field 22
+        stat = Path("/proc/self/stat").read_text().rsplit(")", 1)[1].split()
+        started = int(stat[19]) / os.sysconf("SC_CLK_TCK")
+        uptime = float(Path("/proc/uptime").read_text().split()[0])
+        return max(0.0, uptime - started)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def profile_imports(module: str, cwd: Optional[Path] = None) -> List[ImportTiming]:
+    """Measure the import cost of a module and of its direct imports.
+
+    Args:
+        module: Module to import in a fresh interpreter.
+        cwd: Working directory of the interpreter.
+
+    Returns:
+        The module itself followed by its direct imports, slowest first.
+        Empty if the module cannot be imported.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        cwd=cwd,
+    )
+    if result.returncode != 0:
+        return []
+
+    # A module is reported after the modules it imported
+    children: List[ImportTiming] = []
+    for match in _IMPORTTIME_LINE.finditer(result.stderr):
+        self_us, total_us, indent, name = match.groups()
+        timing = ImportTiming(name, int(self_us) / 1000, int(total_us) / 1000)
+        depth = (len(indent) - 1) // 2
+        if depth == 1:
+            children.append(timing)
+        elif depth == 0:
+            if name == module:
+                return [timing] + sorted(children, key=lambda t: -t.total_ms)
+            children = []
+    return []
+
+
+def print_profile(module: str, cwd: Optional[Path] = None, limit: int = 10) -> None:
+    """Print the import-time breakdown of a module and the optional imports.
+
+    Args:
+        module: Entry module of the process.
+        cwd: Working directory the module is importable from.
+        limit: Number of direct imports to list.
+    """
+    print(f"{'module':<32} {'self ms':>9} {'total ms':>9}")
+
+    timings = profile_imports(module, cwd)
+    for timing in timings[: limit + 1]:
+        print(f"{timing.module:<32} {timing.self_ms:>9.1f} {timing.total_ms:>9.1f}")
+
+    print("\nDeferred until first use:")
+    for name in OPTIONAL_MODULES:
+        own = profile_imports(name, cwd)
+        cost = f"{own[0].total_ms:>9.1f}" if own else f"{'n/a':>9}"
+        print(f"{name:<32} {'':>9} {cost}")
+
+    start = time.perf_counter()
+    probe = probe_device()
+    print(
+        f"\nDevice probe: {probe['device']} in {(time.perf_counter() - start) * 1000:.1f} ms"
+    )
@@ -0,0 +1,574 @@
+"""Resumable Multipart Transfers for the GPU Renderer.
+
+Uploads rendered videos to IBM Cloud Object Storage in parallel parts. The
+upload ID and part size are recorded in a JSON sidecar next to the local
+file, so an upload interrupted by a transient error -- or by the pod being
+restarted -- resumes from the parts COS already holds instead of from zero.
+Every request is sent with a ``Content-MD5`` header, so COS rejects a part
+corrupted in transit (``BadDigest``) instead of storing it. ETags only equal
+the MD5 of the data without SSE-KMS/SSE-C encryption, so comparing them with
+the local checksums is opt-in (``TRANSFER_VERIFY_ETAG``).
+
+Author: Ruslan Magana (https://ruslanmv.com)
+License: Apache 2.0
+"""
+
+import base64
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Configuration constants
+MB = 1024 * 1024
+TRANSFER_PART_SIZE = int(os.getenv("TRANSFER_PART_SIZE", str(16 * MB)))
+TRANSFER_CONCURRENCY = int(os.getenv("TRANSFER_CONCURRENCY", "8"))
+TRANSFER_THRESHOLD = int(os.getenv("TRANSFER_THRESHOLD", str(32 * MB)))
+TRANSFER_MAX_ATTEMPTS = int(os.getenv("TRANSFER_MAX_ATTEMPTS", "5"))
+# Only enable for unencrypted buckets: with SSE-KMS/SSE-C the ETag is not an MD5
+TRANSFER_VERIFY_ETAG = os.getenv("TRANSFER_VERIFY_ETAG", "false").lower() == "true"
+
+# S3 rejects multipart parts smaller than 5 MiB (except the last)
+MIN_PART_SIZE = 5 * MB
+
+# Error codes worth retrying
+_TRANSIENT_CODES = {
+    "BadDigest",
+    "RequestTimeout",
+    "RequestTimeTooSkewed",
+    "SlowDown",
+    "InternalError",
+    "ServiceUnavailable",
+    "500",
+    "503",
+}
+
+
+class ChecksumError(RuntimeError):
+    """Raised when a verified ETag differs from the checksum of the local copy."""
+
+
+def transfer_config() -> Any:
+    """Return a boto3 TransferConfig built from the transfer settings.
+
+    Used for downloads, which boto3 already splits into parallel ranged GETs.
+
+    Returns:
+        boto3.s3.transfer.TransferConfig
+    """
+    from boto3.s3.transfer import TransferConfig
+
+    return TransferConfig(
+        multipart_threshold=TRANSFER_THRESHOLD,
+        multipart_chunksize=TRANSFER_PART_SIZE,
+        max_concurrency=TRANSFER_CONCURRENCY,
+    )
+
+
+def is_transient(error: Exception) -> bool:
+    """Return whether a COS error is worth retrying.
+
+    Args:
+        error: Exception raised by the S3 client.
+
+    Returns:
+        bool: True for throttling, server errors, connection failures and
+        parts rejected for a ``Content-MD5`` mismatch.
+    """
+    response: Dict[str, Any] = getattr(error, "response", None) or {}
+    if not response:
+        # botocore raises connection and timeout errors without a response
+        return type(error).__module__.split(".")[0] in ("botocore", "urllib3")
+    code = str(response.get("Error", {}).get("Code", ""))
+    status = response.get("ResponseMetadata", {}).get("HTTPStatusCode", 0)
+    return code in _TRANSIENT_CODES or status >= 500
+
+
+def _backoff(attempt: int) -> None:
+    """Sleep with jittered exponential backoff before retry ``attempt``."""
+    time.sleep(random.uniform(0, min(30.0, 0.5 * 2**attempt)))
+
+
+def composite_etag(digests: List[bytes]) -> str:
+    """Return the ETag S3 assigns to a multipart object.
+
+    Args:
+        digests: Raw MD5 digests of the parts, in part order.
+
+    Returns:
+        str: ``"<md5 of concatenated digests>-<part count>"``, quoted.
+    """
+    return f'"{hashlib.md5(b"".join(digests)).hexdigest()}-{len(digests)}"'
+
+
+def _state_path(path: Path) -> Path:
+    """Return the resume sidecar of a local file."""
+    return path.with_name(f"{path.name}.upload.json")
+
+
+def _read_part(path: Path, number: int, part_size: int) -> bytes:
+    """Read part ``number`` (1-based) of a file."""
+    with open(path, "rb") as file:
+        file.seek((number - 1) * part_size)
+        return file.read(part_size)
+
+
+def _put_object(
+    s3_client: Any, path: Path, bucket: str, key: str, extra_args: Dict[str, Any]
+) -> str:
+    """Upload a small file in one checksummed request.
+
+    Returns:
+        str: The object's ETag.
+
+    Raises:
+        ChecksumError: If ``TRANSFER_VERIFY_ETAG`` is set and the ETag does not
+            match the local MD5.
+    """
+    body = path.read_bytes()
+    digest = hashlib.md5(body).digest()
+
+    for attempt in range(TRANSFER_MAX_ATTEMPTS):
+        try:
+            response = s3_client.put_object(
+                Bucket=bucket,
+                Key=key,
+                Body=body,
+                ContentMD5=base64.b64encode(digest).decode(),
+                **extra_args,
+            )
+            break
+        except Exception as e:
+            if attempt + 1 == TRANSFER_MAX_ATTEMPTS or not is_transient(e):
+                raise
+            logger.warning(f"Upload of {key} failed ({e}), retrying")
+            _backoff(attempt)
+
+    etag = response["ETag"]
+    if TRANSFER_VERIFY_ETAG and etag.strip('"') != digest.hex():
+        raise ChecksumError(f"Checksum mismatch for {key}: {etag} != {digest.hex()}")
+    return etag
+
+
+def _upload_part(
+    s3_client: Any, bucket: str, key: str, upload_id: str, number: int, body: bytes
+) -> Tuple[bytes, str]:
+    """Upload one part with Content-MD5, retrying transient errors.
+
+    Returns:
+        Tuple of the part's MD5 digest and the ETag COS assigned to it.
+
+    Raises:
+        ChecksumError: If ``TRANSFER_VERIFY_ETAG`` is set and the part's ETag
+            differs from its MD5.
+    """
+    digest = hashlib.md5(body).digest()
+
+    for attempt in range(TRANSFER_MAX_ATTEMPTS):
+        try:
+            response = s3_client.upload_part(
+                Bucket=bucket,
+                Key=key,
+                UploadId=upload_id,
+                PartNumber=number,
+                Body=body,
+                ContentMD5=base64.b64encode(digest).decode(),
+            )
+            break
+        except Exception as e:
+            if attempt + 1 == TRANSFER_MAX_ATTEMPTS or not is_transient(e):
+                raise
+            logger.warning(f"Part {number} of {key} failed ({e}), retrying")
+            _backoff(attempt)
+
+    etag = response["ETag"]
+    if TRANSFER_VERIFY_ETAG and etag.strip('"') != digest.hex():
+        raise ChecksumError(f"Checksum mismatch for part {number} of {key}")
+    return digest, etag
+
+
+class MultipartUpload:
+    """A resumable, parallel multipart upload of one local file.
+
+    Args:
+        s3_client: boto3 S3 client.
+        path: Local file to upload.
+        bucket: COS bucket name.
+        key: Object key.
+        extra_args: Extra ``create_multipart_upload`` arguments (ContentType, ACL).
+        part_size: Part size in bytes.
+        concurrency: Parts uploaded in parallel.
+    """
+
+    def __init__(
+        self,
+        s3_client: Any,
+        path: Path,
+        bucket: str,
+        key: str,
+        extra_args: Optional[Dict[str, Any]] = None,
+        part_size: int = TRANSFER_PART_SIZE,
+        concurrency: int = TRANSFER_CONCURRENCY,
+    ) -> None:
+        self.s3 = s3_client
+        self.path = Path(path)
+        self.bucket = bucket
+        self.key = key
+        self.extra_args = extra_args or {}
+        self.part_size = max(part_size, MIN_PART_SIZE)
+        self.concurrency = max(1, concurrency)
+
+        stat = self.path.stat()
+        self.size = stat.st_size
+        self.mtime = stat.st_mtime_ns
+        self.part_count = max(1, -(-self.size // self.part_size))
+        self.upload_id: Optional[str] = None
+
+    def _load_state(self) -> Optional[str]:
+        """Return the upload ID recorded for this exact file and target, if any."""
+        try:
+            state = json.loads(_state_path(self.path).read_text())
+        except (OSError, ValueError):
+            return None
+
+        expected = {
+            "bucket": self.bucket,
+            "key": self.key,
+            "size": self.size,
+            "mtime": self.mtime,
+            "partSize": self.part_size,
+        }
+        if any(state.get(name) != value for name, value in expected.items()):
+            return None
+        return state.get("uploadId")
+
+    def _save_state(self) -> None:
+        """Record the upload ID so the upload can be resumed."""
+        state = {
+            "bucket": self.bucket,
+            "key": self.key,
+            "size": self.size,
+            "mtime": self.mtime,
+            "partSize": self.part_size,
+            "uploadId": self.upload_id,
+        }
+        tmp_path = _state_path(self.path).with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(state))
+        os.replace(tmp_path, _state_path(self.path))
+
+    def _uploaded_parts(self) -> Dict[int, Dict[str, Any]]:
+        """Return the parts COS already holds for this upload, by number."""
+        parts: Dict[int, Dict[str, Any]] = {}
+        marker = 0
+        while True:
+            response = self.s3.list_parts(
+                Bucket=self.bucket,
+                Key=self.key,
+                UploadId=self.upload_id,
+                PartNumberMarker=marker,
+            )
+            for part in response.get("Parts", []):
+                parts[part["PartNumber"]] = part
+            if not response.get("IsTruncated"):
+                return parts
+            marker = response["NextPartNumberMarker"]
+
+    def _start(self) -> Dict[int, Dict[str, Any]]:
+        """Resume the recorded upload or create a new one.
+
+        Returns:
+            Dict mapping part numbers to the parts already uploaded.
+        """
+        self.upload_id = self._load_state()
+        if self.upload_id:
+            try:
+                parts = self._uploaded_parts()
+                logger.info(
+                    f"Resuming upload of {self.key}: "
+                    f"{len(parts)}/{self.part_count} parts already uploaded"
+                )
+                return parts
+            except Exception as e:
+                logger.warning(f"Cannot resume upload of {self.key} ({e}), restarting")
+
+        response = self.s3.create_multipart_upload(
+            Bucket=self.bucket,
+            Key=self.key,
+            **self.extra_args,
+        )
+        self.upload_id = response["UploadId"]
+        self._save_state()
+        return {}
+
+    def _upload_part(
+        self, number: int, uploaded: Optional[Dict[str, Any]]
+    ) -> Tuple[bytes, str]:
+        """Upload one part unless COS already holds a copy of it.
+
+        A part on COS passed its ``Content-MD5`` check, and the sidecar is
+        keyed by the file's size and mtime, so a part of the expected size is
+        reused. With ``TRANSFER_VERIFY_ETAG`` its ETag must match instead.
+
+        Args:
+            number: Part number (1-based).
+            uploaded: Part already on COS (``ETag`` and ``Size``), if any.
+
+        Returns:
+            Tuple of the part's MD5 digest and its ETag on COS.
+
+        Raises:
+            ChecksumError: If ``TRANSFER_VERIFY_ETAG`` is set and the part's
+                ETag differs from its MD5.
+        """
+        body = _read_part(self.path, number, self.part_size)
+        digest = hashlib.md5(body).digest()
+
+        if uploaded:
+            if TRANSFER_VERIFY_ETAG:
+                reusable = uploaded["ETag"].strip('"') == digest.hex()
+            else:
+                reusable = uploaded.get("Size") == len(body)
+            if reusable:
+                return digest, uploaded["ETag"]
+
+        return _upload_part(
+            self.s3, self.bucket, self.key, self.upload_id, number, body
+        )
+
+    def run(self) -> str:
+        """Upload the missing parts and complete the upload.
+
+        The sidecar is left in place if a part fails, so calling ``run`` again
+        (in this or a later process) resumes the upload.
+
+        Returns:
+            str: The completed object's ETag.
+
+        Raises:
+            ChecksumError: If ``TRANSFER_VERIFY_ETAG`` is set and the completed
+                object's ETag does not match the composite checksum of the
+                local parts.
+        """
+        uploaded = self._start()
+        numbers = range(1, self.part_count + 1)
+
+        # Every part runs to completion even after one fails, so a retry only
+        # has to send the parts that actually failed
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            futures = [
+                pool.submit(self._upload_part, n, uploaded.get(n)) for n in numbers
+            ]
+        parts = [future.result() for future in futures]
+
+        response = self.s3.complete_multipart_upload(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self.upload_id,
+            MultipartUpload={
+                "Parts": [
+                    {"PartNumber": n, "ETag": etag}
+                    for n, (_, etag) in zip(numbers, parts)
+                ]
+            },
+        )
+        _state_path(self.path).unlink(missing_ok=True)
+
+        expected = composite_etag([digest for digest, _ in parts])
+        if TRANSFER_VERIFY_ETAG and response["ETag"] != expected:
+            raise ChecksumError(
+                f"Checksum mismatch for {self.key}: {response['ETag']} != {expected}"
+            )
+
+        logger.info(
+            f"Uploaded {self.key} in {self.part_count} parts ({self.size} bytes)"
+        )
+        return response["ETag"]
+
+    def abort(self) -> None:
+        """Abort the upload so COS discards (and stops billing) its parts."""
+        _state_path(self.path).unlink(missing_ok=True)
+        if not self.upload_id:
+            return
+        try:
+            self.s3.abort_multipart_upload(
+                Bucket=self.bucket, Key=self.key, UploadId=self.upload_id
+            )
+            logger.info(f"Aborted upload of {self.key}")
+        except Exception as e:
+            logger.warning(f"Failed to abort upload of {self.key}: {e}")
+
+
+def upload_file(
+    s3_client: Any,
+    path: Path,
+    bucket: str,
+    key: str,
+    extra_args: Optional[Dict[str, Any]] = None,
+    part_size: int = TRANSFER_PART_SIZE,
+    concurrency: int = TRANSFER_CONCURRENCY,
+    threshold: int = TRANSFER_THRESHOLD,
+) -> str:
+    """Upload a file to COS with checksums, resuming multipart uploads.
+
+    Files below ``threshold`` are sent in a single request; larger files use a
+    :class:`MultipartUpload`, retried from the parts already uploaded when a
+    transient error interrupts it. The upload is aborted once it fails for
+    good, so its parts are not left behind.
+
+    Args:
+        s3_client: boto3 S3 client.
+        path: Local file to upload.
+        bucket: COS bucket name.
+        key: Object key.
+        extra_args: Extra object arguments such as ContentType and ACL.
+        part_size: Part size in bytes.
+        concurrency: Parts uploaded in parallel.
+        threshold: Size at which multipart upload is used.
+
+    Returns:
+        str: The uploaded object's ETag.
+
+    Raises:
+        ChecksumError: If ``TRANSFER_VERIFY_ETAG`` is set and an ETag does not
+            match the local checksum.
+    """
+    path = Path(path)
+    extra_args = extra_args or {}
+
+    if path.stat().st_size < threshold:
+        return _put_object(s3_client, path, bucket, key, extra_args)
+
+    upload: Optional[MultipartUpload] = None
+    for attempt in range(TRANSFER_MAX_ATTEMPTS):
+        try:
+            upload = MultipartUpload(
+                s3_client, path, bucket, key, extra_args, part_size, concurrency
+            )
+            return upload.run()
+        except Exception as e:
+            if attempt + 1 == TRANSFER_MAX_ATTEMPTS or not is_transient(e):
+                if upload is not None:
+                    upload.abort()
+                raise
+            logger.warning(f"Upload of {key} interrupted ({e}), resuming")
+            _backoff(attempt)
+
+    raise RuntimeError(f"Upload of {key} failed")
+
+
+def _read_full(stream: BinaryIO, size: int) -> bytes:
+    """Read up to ``size`` bytes, blocking until they arrive or the stream ends."""
+    chunks = []
+    remaining = size
+    while remaining:
+        chunk = stream.read(remaining)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(chunks)
+
+
+def upload_stream(
+    s3_client: Any,
+    stream: BinaryIO,
+    bucket: str,
+    key: str,
+    extra_args: Optional[Dict[str, Any]] = None,
+    part_size: int = TRANSFER_PART_SIZE,
+    concurrency: int = TRANSFER_CONCURRENCY,
+) -> str:
+    """Upload a stream of unknown length as it is produced.
+
+    Parts are sent as soon as ``part_size`` bytes have been read, so the upload
+    overlaps with whatever writes the stream (e.g. an encoder's stdout). At
+    most ``concurrency`` parts are buffered or in flight, which bounds memory
+    to ``concurrency * part_size`` and needs no local disk. A stream cannot be
+    replayed, so the upload is aborted (not resumed) if the stream or a part
+    fails.
+
+    Args:
+        s3_client: boto3 S3 client.
+        stream: Binary file-like object; its ``read`` may raise to abort.
+        bucket: COS bucket name.
+        key: Object key.
+        extra_args: Extra object arguments such as ContentType and ACL.
+        part_size: Part size in bytes.
+        concurrency: Parts buffered or uploaded in parallel.
+
+    Returns:
+        str: The uploaded object's ETag.
+
+    Raises:
+        ChecksumError: If ``TRANSFER_VERIFY_ETAG`` is set and the ETag of a part
+            or of the completed object does not match its checksum.
+    """
+    part_size = max(part_size, MIN_PART_SIZE)
+    concurrency = max(1, concurrency)
+    upload_id = s3_client.create_multipart_upload(
+        Bucket=bucket, Key=key, **(extra_args or {})
+    )["UploadId"]
+
+    slots = threading.BoundedSemaphore(concurrency)
+    futures: List[Future] = []
+    size = 0
+
+    def send(number: int, body: bytes) -> Tuple[bytes, str]:
+        try:
+            return _upload_part(s3_client, bucket, key, upload_id, number, body)
+        finally:
+            slots.release()
+
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            while True:
+                slots.acquire()
+                body = _read_full(stream, part_size)
+                # An empty stream still needs one (empty) part
+                if not body and futures:
+                    slots.release()
+                    break
+                size += len(body)
+                futures.append(pool.submit(send, len(futures) + 1, body))
+                if any(f.done() and f.exception() for f in futures):
+                    break
+                if len(body) < part_size:
+                    break
+
+        parts = [f.result() for f in futures]
+        response = s3_client.complete_multipart_upload(
+            Bucket=bucket,
+            Key=key,
+            UploadId=upload_id,
+            MultipartUpload={
+                "Parts": [
+                    {"PartNumber": n, "ETag": etag}
+                    for n, (_, etag) in enumerate(parts, 1)
+                ]
+            },
+        )
+    except BaseException:
+        logger.error(f"Streaming upload of {key} failed, aborting")
+        try:
+            s3_client.abort_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id)
+        except Exception as e:
+            logger.warning(f"Failed to abort upload of {key}: {e}")
+        raise
+
+    expected = composite_etag([digest for digest, _ in parts])
+    if TRANSFER_VERIFY_ETAG and response["ETag"] != expected:
+        raise ChecksumError(
+            f"Checksum mismatch for {key}: {response['ETag']} != {expected}"
+        )
+
+    logger.info(f"Streamed {key} in {len(parts)} parts ({size} bytes)")
+    return response["ETag"]
@@ -10,4 +10,4 @@ __version__ = "1.0.0"
 __author__ = "Ruslan Magana"
 __email__ = "ruslan@ruslanmv.com"
 
-__all__ = ["main", "render"]
+__all__ = ["main", "render", "scheduler", "weights", "wav2lip_runner"]
@@ -11,14 +11,22 @@ import json
 import logging
 import os
 from pathlib import Path
-from typing import Dict, List
+from typing import Any, Dict, List, Optional
 from uuid import uuid4
 
-from fastapi import BackgroundTasks, FastAPI, HTTPException, status
+from fastapi import FastAPI, HTTPException, status
 from fastapi.responses import FileResponse
 from pydantic import BaseModel, Field
 
-from app.render import download_voice, wav2lip_render
+from app.render import BatchItem, download_voice, wav2lip_render, wav2lip_render_batch
+from app.scheduler import (
+    DEFAULT_TENANT,
+    PRIORITY_FULL,
+    PRIORITY_PREVIEW,
+    RenderJob,
+    RenderScheduler,
+)
+from app.weights import SHARED_WEIGHTS, memory_report, preload
 
 # Configure logging
 logging.basicConfig(
@@ -40,6 +48,21 @@ app = FastAPI(
 AVATAR_DIR = Path(os.getenv("AVATAR_DIR", "/models"))
 WORK_ROOT = Path(os.getenv("WORK_ROOT", "/tmp/avatar-jobs"))
 WORK_ROOT.mkdir(parents=True, exist_ok=True)
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", "1"))
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "8"))
+BATCH_MAX_WAIT_MS = int(os.getenv("BATCH_MAX_WAIT_MS", "0"))
+TENANT_QUANTUM = int(os.getenv("TENANT_QUANTUM", "1"))
+TENANT_MAX_RUNNING = int(os.getenv("TENANT_MAX_RUNNING", "0"))
+# Comma-separated "tenant=weight" pairs, e.g. "acme=2,beta=1"
+TENANT_WEIGHTS = {
+    name.strip(): int(weight)
+    for name, _, weight in (
+        pair.partition("=")
+        for pair in os.getenv("TENANT_WEIGHTS", "").split(",")
+        if pair
+    )
+}
+PREVIEW_SECONDS = float(os.getenv("PREVIEW_SECONDS", "5"))
 
 
 class RenderTaskRequest(BaseModel):
@@ -48,10 +71,27 @@ class RenderTaskRequest(BaseModel):
     Attributes:
         avatarId: Unique identifier for the avatar (without .png extension).
         voiceUrl: URL to the audio file for lip-sync rendering.
+        preview: Whether to render a fast low-resolution preview first.
+        previewSeconds: Length of the preview, from the start of the audio.
+        tenantId: Tenant the job is accounted to for fair-share scheduling.
     """
 
-    avatarId: str = Field(..., description="Avatar identifier (file name without extension)")
+    avatarId: str = Field(
+        ..., description="Avatar identifier (file name without extension)"
+    )
     voiceUrl: str = Field(..., description="URL to download the voice audio file")
+    preview: bool = Field(False, description="Render a low-resolution preview first")
+    previewSeconds: float = Field(
+        PREVIEW_SECONDS,
+        description="Seconds of audio covered by the preview",
+        gt=0,
+    )
+    tenantId: str = Field(
+        DEFAULT_TENANT,
+        description="Tenant identifier used for fair-share scheduling",
+        min_length=1,
+        max_length=128,
+    )
 
 
 class RenderTaskResponse(BaseModel):
@@ -60,10 +100,12 @@ class RenderTaskResponse(BaseModel):
     Attributes:
         jobId: Unique identifier for the rendering job.
         statusUrl: Endpoint to check job status and retrieve the video.
+        previewUrl: Endpoint to retrieve the preview, if one was requested.
     """
 
     jobId: str = Field(..., description="Unique job identifier")
     statusUrl: str = Field(..., description="URL to check job status")
+    previewUrl: Optional[str] = Field(None, description="URL to check preview status")
 
 
 class JobStatusResponse(BaseModel):
@@ -73,7 +115,62 @@ class JobStatusResponse(BaseModel):
         state: Current state of the rendering job.
     """
 
-    state: str = Field(..., description="Job state: 'processing', 'completed', or 'failed'")
+    state: str = Field(
+        ..., description="Job state: 'processing', 'completed', or 'failed'"
+    )
+
+
+def _error_path(job: RenderJob) -> Optional[str]:
+    """Return where a job's render error is written.
+
+    Preview failures must not mark the full render as failed, so previews use
+    their own error file; full renders use the default ``error.txt``.
+    """
+    if job.priority == PRIORITY_PREVIEW:
+        return str(Path(job.out_path).with_name("preview.error.txt"))
+    return None
+
+
+def run_render_batch(jobs: List[RenderJob]) -> None:
+    """Execute a scheduled batch of render jobs with Wav2Lip.
+
+    Jobs in a batch share avatar, quality and priority; batches of more than
+    one job run in a single Wav2Lip process.
+
+    Args:
+        jobs: Render jobs taken from the scheduler queue.
+    """
+    if len(jobs) == 1:
+        job = jobs[0]
+        wav2lip_render(
+            job.avatar_id,
+            job.voice_url,
+            job.out_path,
+            quality=job.quality,
+            max_seconds=job.max_seconds,
+            error_path=_error_path(job),
+        )
+        return
+
+    wav2lip_render_batch(
+        jobs[0].avatar_id,
+        [
+            BatchItem(job.voice_url, job.out_path, job.max_seconds, _error_path(job))
+            for job in jobs
+        ],
+        quality=jobs[0].quality,
+    )
+
+
+scheduler = RenderScheduler(
+    run_render_batch,
+    workers=RENDER_WORKERS,
+    batch_max_size=BATCH_MAX_SIZE,
+    batch_max_wait=BATCH_MAX_WAIT_MS / 1000,
+    tenant_quantum=TENANT_QUANTUM,
+    tenant_weights=TENANT_WEIGHTS,
+    tenant_max_running=TENANT_MAX_RUNNING,
+)
 
 
 @app.get("/health", status_code=status.HTTP_200_OK)
@@ -86,6 +183,42 @@ async def health_check() -> Dict[str, str]:
     return {"status": "healthy", "service": "avatar-service"}
 
 
+@app.get("/scheduler/metrics", status_code=status.HTTP_200_OK)
+async def get_scheduler_metrics() -> Dict[str, Any]:
+    """Report render scheduler metrics per tenant.
+
+    Returns:
+        Dict containing total queued and running jobs, and for each tenant its
+        queue depth per priority class, running jobs and queue wait times.
+    """
+    return scheduler.metrics()
+
+
+@app.get("/memory", status_code=status.HTTP_200_OK)
+async def get_memory_report() -> Dict[str, Any]:
+    """Report per-worker unique versus shared memory.
+
+    Lists every worker process of the pod (and its render subprocesses) with
+    private ("unique") and shared resident bytes, which shows whether model
+    weights are shared when ``SHARED_WEIGHTS`` is enabled.
+
+    Returns:
+        Dict containing per-process counters and totals.
+
+    Raises:
+        HTTPException: If process memory statistics cannot be read.
+    """
+    try:
+        return memory_report()
+
+    except Exception as e:
+        logger.error(f"Error building memory report: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to build memory report",
+        )
+
+
 @app.get("/avatars", response_model=List[str])
 async def list_avatars() -> List[str]:
     """List all available avatar images.
@@ -118,19 +251,22 @@ async def list_avatars() -> List[str]:
         )
 
 
-@app.post("/render", response_model=RenderTaskResponse, status_code=status.HTTP_202_ACCEPTED)
-async def render(task: RenderTaskRequest, bg: BackgroundTasks) -> Dict[str, str]:
+@app.post(
+    "/render", response_model=RenderTaskResponse, status_code=status.HTTP_202_ACCEPTED
+)
+async def render(task: RenderTaskRequest) -> Dict[str, Optional[str]]:
     """Submit a rendering job for avatar lip-sync video generation.
 
     Creates a new rendering job that processes the avatar image with the provided
-    audio using Wav2Lip technology. The job runs asynchronously in the background.
+    audio using Wav2Lip technology. The job is queued on the render scheduler.
+    When a preview is requested, a low-resolution render of the first seconds
+    of audio is queued ahead of the full render and served from its own URL.
 
     Args:
-        task: RenderTaskRequest containing avatarId and voiceUrl.
-        bg: FastAPI BackgroundTasks for async processing.
+        task: RenderTaskRequest containing avatarId, voiceUrl and preview options.
 
     Returns:
-        Dict containing jobId and statusUrl for tracking the job.
+        Dict containing jobId, statusUrl and optional previewUrl for tracking the job.
 
     Raises:
         HTTPException: If avatar doesn't exist or parameters are invalid.
@@ -159,17 +295,44 @@ async def render(task: RenderTaskRequest, bg: BackgroundTasks) -> Dict[str, str]
                     "jobId": job_id,
                     "avatarId": task.avatarId,
                     "voiceUrl": task.voiceUrl,
+                    "preview": task.preview,
+                    "tenantId": task.tenantId,
                 }
             )
         )
 
-        # Schedule background rendering task
-        bg.add_task(wav2lip_render, task.avatarId, task.voiceUrl, str(out_mp4))
-        logger.info(f"Rendering job created: {job_id} for avatar: {task.avatarId}")
+        # Previews jump ahead of every queued full render
+        preview_url = None
+        if task.preview:
+            scheduler.submit(
+                job_id,
+                task.avatarId,
+                task.voiceUrl,
+                str(job_dir / "preview.mp4"),
+                quality="preview",
+                priority=PRIORITY_PREVIEW,
+                max_seconds=task.previewSeconds,
+                tenant_id=task.tenantId,
+            )
+            preview_url = f"/status/{job_id}/preview"
+
+        scheduler.submit(
+            job_id,
+            task.avatarId,
+            task.voiceUrl,
+            str(out_mp4),
+            priority=PRIORITY_FULL,
+            tenant_id=task.tenantId,
+        )
+        logger.info(
+            f"Rendering job created: {job_id} for avatar: {task.avatarId} "
+            f"(tenant: {task.tenantId})"
+        )
 
         return {
             "jobId": job_id,
             "statusUrl": f"/status/{job_id}",
+            "previewUrl": preview_url,
         }
 
     except HTTPException:
@@ -182,6 +345,61 @@ async def render(task: RenderTaskRequest, bg: BackgroundTasks) -> Dict[str, str]
         )
 
 
+def _job_result(
+    job_id: str,
+    video_name: str,
+    error_name: str,
+    download_name: str,
+) -> FileResponse | Dict[str, str]:
+    """Return a job's rendered video, its error, or its processing state.
+
+    Args:
+        job_id: Unique identifier for the rendering job.
+        video_name: File name of the rendered video inside the job directory.
+        error_name: File name of the error message inside the job directory.
+        download_name: File name offered to the client for the video.
+
+    Returns:
+        FileResponse: Rendered MP4 video if the render is complete.
+        Dict: Status information if the render is still processing.
+
+    Raises:
+        HTTPException: If the job is unknown or the render failed.
+    """
+    job_dir = WORK_ROOT / job_id
+
+    if not job_dir.exists():
+        logger.warning(f"Job not found: {job_id}")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job '{job_id}' not found",
+        )
+
+    mp4_file = job_dir / video_name
+    error_file = job_dir / error_name
+
+    # Check for errors
+    if error_file.exists():
+        error_msg = error_file.read_text()
+        logger.error(f"Job {job_id} failed: {error_msg}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Rendering failed: {error_msg}",
+        )
+
+    # Return video if complete
+    if mp4_file.exists():
+        logger.info(f"Returning {video_name} for job: {job_id}")
+        return FileResponse(
+            path=mp4_file,
+            media_type="video/mp4",
+            filename=download_name,
+        )
+
+    # Job still processing
+    return {"state": "processing", "jobId": job_id}
+
+
 @app.get("/status/{job_id}", response_model=None)
 async def get_job_status(job_id: str) -> FileResponse | Dict[str, str]:
     """Check rendering job status and retrieve completed video.
@@ -200,46 +418,54 @@ async def get_job_status(job_id: str) -> FileResponse | Dict[str, str]:
         HTTPException: If job ID is not found or invalid.
     """
     try:
-        job_dir = WORK_ROOT / job_id
+        return _job_result(job_id, "out.mp4", "error.txt", f"{job_id}.mp4")
 
-        if not job_dir.exists():
-            logger.warning(f"Job not found: {job_id}")
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Job '{job_id}' not found",
-            )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error checking job status {job_id}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to retrieve job status",
+        )
 
-        mp4_file = job_dir / "out.mp4"
-        error_file = job_dir / "error.txt"
 
-        # Check for errors
-        if error_file.exists():
-            error_msg = error_file.read_text()
-            logger.error(f"Job {job_id} failed: {error_msg}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Rendering failed: {error_msg}",
-            )
+@app.get("/status/{job_id}/preview", response_model=None)
+async def get_preview_status(job_id: str) -> FileResponse | Dict[str, str]:
+    """Check preview status and retrieve the low-resolution preview video.
+
+    Args:
+        job_id: Unique identifier for the rendering job.
+
+    Returns:
+        FileResponse: Preview MP4 video if the preview is complete.
+        Dict: Status information if the preview is still processing.
 
-        # Return video if complete
-        if mp4_file.exists():
-            logger.info(f"Returning completed video for job: {job_id}")
-            return FileResponse(
-                path=mp4_file,
-                media_type="video/mp4",
-                filename=f"{job_id}.mp4",
+    Raises:
+        HTTPException: If the job is unknown, has no preview, or the preview failed.
+    """
+    try:
+        meta_file = WORK_ROOT / job_id / "meta.json"
+        if meta_file.exists() and not json.loads(meta_file.read_text()).get("preview"):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Job '{job_id}' has no preview",
             )
 
-        # Job still processing
-        return {"state": "processing", "jobId": job_id}
+        return _job_result(
+            job_id,
+            "preview.mp4",
+            "preview.error.txt",
+            f"{job_id}-preview.mp4",
+        )
 
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error checking job status {job_id}: {e}")
+        logger.error(f"Error checking preview status {job_id}: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to retrieve job status",
+            detail="Failed to retrieve preview status",
         )
 
 
@@ -256,8 +482,15 @@ async def startup_event() -> None:
     if not AVATAR_DIR.exists():
         logger.warning(f"Avatar directory does not exist: {AVATAR_DIR}")
 
+    if SHARED_WEIGHTS:
+        logger.info("Shared weights enabled, preloading checkpoints")
+        preload()
+
+    scheduler.start()
+
 
 @app.on_event("shutdown")
 async def shutdown_event() -> None:
     """Application shutdown event handler."""
     logger.info("Shutting down Avatar Service")
+    scheduler.stop(timeout=5)
@@ -1,22 +1,29 @@
 """Wav2Lip Rendering Module.
 
 Thin wrappers around Wav2Lip CLI utilities for avatar lip-sync video generation.
-Handles audio download and execution of the Wav2Lip inference pipeline.
+Handles audio download, audio preprocessing and execution of the Wav2Lip
+inference pipeline.
 
 Author: Ruslan Magana (https://ruslanmv.com)
 License: Apache 2.0
 """
 
+import hashlib
+import json
 import logging
 import os
 import shutil
 import subprocess
+import sys
 import tempfile
+import threading
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
 
 import requests
 
+from app.weights import SHARED_WEIGHTS
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
@@ -28,6 +35,29 @@ WAV2LIP_CHECKPOINT = os.getenv(
 WAV2LIP_SCRIPT = os.getenv("WAV2LIP_SCRIPT", "Wav2Lip/inference.py")
 MODELS_DIR = Path(os.getenv("MODELS_DIR", "/models"))
 DOWNLOAD_TIMEOUT = int(os.getenv("DOWNLOAD_TIMEOUT", "60"))
+PREVIEW_RESIZE_FACTOR = max(2, int(os.getenv("PREVIEW_RESIZE_FACTOR", "2")))
+AUDIO_CACHE = os.getenv("AUDIO_CACHE", "true").lower() == "true"
+AUDIO_CACHE_DIR = Path(os.getenv("AUDIO_CACHE_DIR", "/tmp/avatar-audio-cache"))
+AUDIO_CACHE_MAX_BYTES = int(os.getenv("AUDIO_CACHE_MAX_BYTES", str(2 * 1024**3)))
+
+# Wav2Lip audio sample rate (see Wav2Lip/hparams.py)
+SAMPLE_RATE = 16000
+
+
+class AudioFeatures(NamedTuple):
+    """Preprocessed audio stored in the audio cache.
+
+    Attributes:
+        key: SHA-256 of the source audio content.
+        wav_path: Normalized 16 kHz mono WAV file.
+        samples_path: Normalized samples as a float32 ``.npy`` array.
+        mel_path: Mel-spectrogram as a float32 ``.npy`` array of shape (80, T).
+    """
+
+    key: str
+    wav_path: Path
+    samples_path: Path
+    mel_path: Path
 
 
 def download_voice(url: str, timeout: Optional[int] = None) -> str:
@@ -77,7 +107,9 @@ def download_voice(url: str, timeout: Optional[int] = None) -> str:
 
     except requests.HTTPError as e:
         logger.error(f"HTTP error downloading voice: {e}")
-        raise RuntimeError(f"Failed to download voice from {url}: HTTP {e.response.status_code}")
+        raise RuntimeError(
+            f"Failed to download voice from {url}: HTTP {e.response.status_code}"
+        )
     except requests.Timeout as e:
         logger.error(f"Timeout downloading voice from {url}")
         raise RuntimeError(f"Download timeout after {timeout} seconds")
@@ -89,11 +121,312 @@ def download_voice(url: str, timeout: Optional[int] = None) -> str:
         raise RuntimeError(f"Unexpected error: {str(e)}")
 
 
+def trim_audio(audio_path: str, max_seconds: float) -> str:
+    """Cut an audio file down to its first ``max_seconds`` seconds.
+
+    The clip is re-encoded as 16 kHz mono WAV, which is what Wav2Lip consumes.
+
+    Args:
+        audio_path: Path to the source audio file.
+        max_seconds: Duration of the clip to keep, in seconds.
+
+    Returns:
+        str: Path to the trimmed temporary WAV file.
+
+    Raises:
+        subprocess.CalledProcessError: If ffmpeg fails.
+    """
+    fd, trimmed_path = tempfile.mkstemp(suffix=".wav")
+    os.close(fd)
+
+    cmd = [
+        "ffmpeg",
+        "-y",
+        "-loglevel",
+        "error",
+        "-i",
+        audio_path,
+        "-t",
+        f"{max_seconds:.3f}",
+        "-ac",
+        "1",
+        "-ar",
+        "16000",
+        trimmed_path,
+    ]
+
+    logger.info(f"Trimming audio to {max_seconds:.1f}s: {audio_path}")
+    subprocess.run(cmd, check=True, capture_output=True, text=True)
+    return trimmed_path
+
+
+def _wav2lip_audio() -> Any:
+    """Import Wav2Lip's ``audio`` module from the Wav2Lip checkout."""
+    wav2lip_dir = str(Path(WAV2LIP_SCRIPT).resolve().parent)
+    if wav2lip_dir not in sys.path:
+        sys.path.insert(0, wav2lip_dir)
+
+    import audio
+
+    return audio
+
+
+def _file_sha256(path: str) -> str:
+    """Return the SHA-256 hex digest of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _audio_features(key: str) -> AudioFeatures:
+    """Return the cache paths for an audio content hash."""
+    return AudioFeatures(
+        key=key,
+        wav_path=AUDIO_CACHE_DIR / f"{key}.wav",
+        samples_path=AUDIO_CACHE_DIR / f"{key}.npy",
+        mel_path=AUDIO_CACHE_DIR / f"{key}.mel.npy",
+    )
+
+
+def _prune_audio_cache() -> None:
+    """Evict least recently used cache entries above ``AUDIO_CACHE_MAX_BYTES``."""
+    entries: Dict[str, List[Path]] = {}
+    for path in AUDIO_CACHE_DIR.iterdir():
+        # Skip files another worker is still writing
+        if path.suffix == ".tmp":
+            continue
+        entries.setdefault(path.name.split(".", 1)[0], []).append(path)
+
+    def last_used(paths: List[Path]) -> float:
+        return max(p.stat().st_mtime for p in paths)
+
+    total = sum(p.stat().st_size for paths in entries.values() for p in paths)
+    for key, paths in sorted(entries.items(), key=lambda item: last_used(item[1])):
+        if total <= AUDIO_CACHE_MAX_BYTES:
+            break
+        for path in paths:
+            total -= path.stat().st_size
+            path.unlink(missing_ok=True)
+        logger.info(f"Evicted audio cache entry: {key}")
+
+
+def preprocess_audio(audio_path: str) -> AudioFeatures:
+    """Normalize an audio file and compute its mel-spectrogram once.
+
+    The audio is resampled to 16 kHz mono, and its samples and mel-spectrogram
+    are stored as ``.npy`` files keyed by the SHA-256 of the source content.
+    Re-rendering the same voice with any avatar reuses these files, which
+    ``install_audio_hooks`` memory-maps inside the Wav2Lip run.
+
+    Args:
+        audio_path: Path to the downloaded voice audio file.
+
+    Returns:
+        AudioFeatures: Paths of the cached features.
+
+    Raises:
+        subprocess.CalledProcessError: If ffmpeg fails to normalize the audio.
+    """
+    import numpy as np
+
+    features = _audio_features(_file_sha256(audio_path))
+
+    if all(path.exists() for path in features[1:]):
+        logger.info(f"Audio cache hit: {features.key}")
+        for path in features[1:]:
+            path.touch()
+        return features
+
+    logger.info(f"Audio cache miss: {features.key}, preprocessing")
+    AUDIO_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    # Unique per thread, as threaded workers share one process
+    suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+
+    # Normalize: 16 kHz mono PCM, as Wav2Lip would otherwise do per render
+    tmp_wav = features.wav_path.with_name(features.wav_path.name + suffix)
+    subprocess.run(
+        [
+            "ffmpeg",
+            "-y",
+            "-loglevel",
+            "error",
+            "-i",
+            audio_path,
+            "-ac",
+            "1",
+            "-ar",
+            str(SAMPLE_RATE),
+            "-acodec",
+            "pcm_s16le",
+            "-f",
+            "wav",
+            str(tmp_wav),
+        ],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+
+    audio = _wav2lip_audio()
+    samples = audio.load_wav(str(tmp_wav), SAMPLE_RATE).astype(np.float32)
+    mel = audio.melspectrogram(samples).astype(np.float32)
+
+    for path, array in ((features.samples_path, samples), (features.mel_path, mel)):
+        tmp_path = path.with_name(path.name + suffix)
+        # A file object, so np.save does not append ".npy" to the name
+        with open(tmp_path, "wb") as file:
+            np.save(file, array)
+        os.replace(tmp_path, path)
+    os.replace(tmp_wav, features.wav_path)
+
+    _prune_audio_cache()
+    return features
+
+
+def install_audio_hooks() -> None:
+    """Serve cached samples and mel-spectrograms to Wav2Lip's ``audio`` module.
+
+    Patches ``audio.load_wav`` to memory-map the cached samples when the WAV
+    file comes from the audio cache, and ``audio.melspectrogram`` to return the
+    cached mel-spectrogram for those samples, skipping the resampling and STFT.
+    Intended for the dedicated Wav2Lip runner process only.
+    """
+    import numpy as np
+
+    audio = _wav2lip_audio()
+    original_load_wav = audio.load_wav
+    original_melspectrogram = audio.melspectrogram
+    cache_dir = AUDIO_CACHE_DIR.resolve()
+    mapped: Dict[int, Any] = {}
+
+    def load_wav(path: str, sr: int) -> Any:
+        features = _audio_features(Path(path).name.split(".", 1)[0])
+        if (
+            Path(path).resolve().parent == cache_dir
+            and sr == SAMPLE_RATE
+            and features.samples_path.exists()
+            and features.mel_path.exists()
+        ):
+            wav = np.load(features.samples_path, mmap_mode="r")
+            mapped[id(wav)] = (wav, features.mel_path)
+            return wav
+        return original_load_wav(path, sr)
+
+    def melspectrogram(wav: Any) -> Any:
+        if id(wav) in mapped:
+            return np.load(mapped[id(wav)][1], mmap_mode="r")
+        return original_melspectrogram(wav)
+
+    audio.load_wav = load_wav
+    audio.melspectrogram = melspectrogram
+    logger.info("Audio cache hooks installed")
+
+
+class BatchItem(NamedTuple):
+    """One job of a batched Wav2Lip render.
+
+    Attributes:
+        voice_url: URL to download the voice audio file.
+        out_path: Output path for the generated MP4 video file.
+        max_seconds: Only render the first ``max_seconds`` of audio if set.
+        error_path: File receiving the error message on failure. Defaults to
+            ``error.txt`` next to ``out_path``.
+    """
+
+    voice_url: str
+    out_path: str
+    max_seconds: Optional[float] = None
+    error_path: Optional[str] = None
+
+
+def wav2lip_command(use_runner: bool = False) -> List[str]:
+    """Return the command prefix launching Wav2Lip inference.
+
+    With ``SHARED_WEIGHTS`` enabled or cached audio features in use, inference
+    runs through ``app.wav2lip_runner``, which memory-maps the checkpoints and
+    the cached audio features before starting Wav2Lip.
+
+    Args:
+        use_runner: Force the runner, e.g. when cached audio features are used.
+
+    Returns:
+        List of command-line tokens up to and including the inference script.
+    """
+    if SHARED_WEIGHTS or use_runner:
+        return [sys.executable, "-m", "app.wav2lip_runner", WAV2LIP_SCRIPT]
+    return ["python", WAV2LIP_SCRIPT]
+
+
+def quality_args(quality: str) -> List[str]:
+    """Return the Wav2Lip arguments for a rendering quality preset.
+
+    Args:
+        quality: Rendering quality preset ('high', 'medium', 'fast', 'preview').
+
+    Returns:
+        List of extra command-line tokens for ``inference.py``.
+    """
+    if quality == "fast":
+        return ["--resize_factor", "2"]
+    if quality == "high":
+        return ["--resize_factor", "1", "--wav2lip_batch_size", "32"]
+    if quality == "preview":
+        return ["--resize_factor", str(PREVIEW_RESIZE_FACTOR)]
+    return []
+
+
+def _remove_files(paths: List[str]) -> None:
+    """Delete temporary files, ignoring those already gone."""
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+            logger.debug(f"Cleaned up temporary file: {path}")
+
+
+def prepare_audio(
+    voice_url: str,
+    max_seconds: Optional[float] = None,
+) -> Tuple[str, List[str], bool]:
+    """Download, trim and preprocess the voice audio of a render.
+
+    Args:
+        voice_url: URL to download the voice audio file.
+        max_seconds: Only keep the first ``max_seconds`` of audio if set.
+
+    Returns:
+        Tuple of the audio path to pass to Wav2Lip, the temporary files to
+        delete after the render, and whether cached audio features are used.
+    """
+    audio_path = download_voice(voice_url)
+    temp_files = [audio_path]
+
+    try:
+        if max_seconds:
+            audio_path = trim_audio(audio_path, max_seconds)
+            temp_files.append(audio_path)
+    except Exception:
+        _remove_files(temp_files)
+        raise
+
+    # Normalized audio and mel-spectrogram are shared by every render
+    if AUDIO_CACHE:
+        try:
+            return str(preprocess_audio(audio_path).wav_path), temp_files, True
+        except Exception as e:
+            logger.warning(f"Audio preprocessing failed, using raw audio: {e}")
+
+    return audio_path, temp_files, False
+
+
 def wav2lip_render(
     avatar_id: str,
     voice_url: str,
     out_path: str,
     quality: str = "high",
+    max_seconds: Optional[float] = None,
+    error_path: Optional[str] = None,
 ) -> None:
     """Execute Wav2Lip rendering to generate lip-synced avatar video.
 
@@ -105,7 +438,10 @@ def wav2lip_render(
         avatar_id: Identifier for the avatar (without .png extension).
         voice_url: URL to download the voice audio file.
         out_path: Output path for the generated MP4 video file.
-        quality: Rendering quality preset ('high', 'medium', 'fast').
+        quality: Rendering quality preset ('high', 'medium', 'fast', 'preview').
+        max_seconds: Only render the first ``max_seconds`` of audio if set.
+        error_path: File receiving the error message on failure. Defaults to
+            ``error.txt`` next to ``out_path``.
 
     Raises:
         RuntimeError: If avatar file is not found.
@@ -128,14 +464,13 @@ def wav2lip_render(
 
         logger.info(f"Starting Wav2Lip render for avatar: {avatar_id}")
 
-        # Download audio file
-        audio_path = download_voice(voice_url)
+        # Download and preprocess audio
+        audio_path, temp_files, cached = prepare_audio(voice_url, max_seconds)
 
         try:
             # Construct Wav2Lip command
             cmd = [
-                "python",
-                WAV2LIP_SCRIPT,
+                *wav2lip_command(use_runner=cached),
                 "--checkpoint_path",
                 WAV2LIP_CHECKPOINT,
                 "--face",
@@ -144,14 +479,9 @@ def wav2lip_render(
                 audio_path,
                 "--outfile",
                 str(out_path),
+                *quality_args(quality),
             ]
 
-            # Add quality-specific parameters
-            if quality == "fast":
-                cmd.extend(["--resize_factor", "2"])
-            elif quality == "high":
-                cmd.extend(["--resize_factor", "1", "--wav2lip_batch_size", "32"])
-
             logger.info(f"Executing Wav2Lip: {' '.join(cmd)}")
 
             # Run Wav2Lip inference
@@ -168,17 +498,14 @@ def wav2lip_render(
                 logger.debug(f"Wav2Lip stdout: {result.stdout}")
 
         finally:
-            # Cleanup temporary audio file
-            if os.path.exists(audio_path):
-                os.remove(audio_path)
-                logger.debug(f"Cleaned up temporary audio file: {audio_path}")
+            _remove_files(temp_files)
 
     except subprocess.CalledProcessError as e:
         error_msg = f"Wav2Lip inference failed: {e.stderr}"
         logger.error(error_msg)
 
         # Write error to file for status endpoint
-        error_file = Path(out_path).parent / "error.txt"
+        error_file = Path(error_path or Path(out_path).parent / "error.txt")
         error_file.write_text(error_msg)
 
         raise RuntimeError(error_msg)
@@ -187,7 +514,120 @@ def wav2lip_render(
         logger.error(error_msg)
 
         # Write error to file
-        error_file = Path(out_path).parent / "error.txt"
+        error_file = Path(error_path or Path(out_path).parent / "error.txt")
         error_file.write_text(error_msg)
 
         raise
+
+
+def _write_item_error(item: BatchItem, error_msg: str) -> None:
+    """Record a batch item failure for the status endpoint."""
+    logger.error(f"{item.out_path}: {error_msg}")
+    error_file = Path(item.error_path or Path(item.out_path).parent / "error.txt")
+    error_file.write_text(error_msg)
+
+
+def wav2lip_render_batch(
+    avatar_id: str,
+    items: List[BatchItem],
+    quality: str = "high",
+) -> None:
+    """Render several voice clips for the same avatar in one Wav2Lip process.
+
+    The runner loads the model once and detects the avatar's face once, then
+    renders every item in turn, writing each to its own ``out_path``. Failures
+    are isolated per item: they are written to the item's error file and do
+    not abort the rest of the batch.
+
+    Args:
+        avatar_id: Identifier for the avatar (without .png extension).
+        items: Jobs to render with this avatar.
+        quality: Rendering quality preset shared by all items.
+
+    Example:
+        >>> wav2lip_render_batch(
+        ...     "john_doe",
+        ...     [BatchItem("https://example.com/a.wav", "/tmp/a/out.mp4"),
+        ...      BatchItem("https://example.com/b.wav", "/tmp/b/out.mp4")],
+        ... )
+    """
+    face_path = MODELS_DIR / f"{avatar_id}.png"
+    if not face_path.exists():
+        for item in items:
+            _write_item_error(
+                item, f"Rendering error: Avatar '{avatar_id}' not found at {face_path}"
+            )
+        return
+
+    logger.info(
+        f"Starting batched Wav2Lip render of {len(items)} jobs for avatar: {avatar_id}"
+    )
+
+    temp_files: List[str] = []
+    prepared: List[Tuple[BatchItem, Dict[str, str]]] = []
+
+    try:
+        for item in items:
+            try:
+                audio_path, item_files, _ = prepare_audio(
+                    item.voice_url, item.max_seconds
+                )
+                temp_files.extend(item_files)
+            except Exception as e:
+                _write_item_error(item, f"Rendering error: {str(e)}")
+                continue
+
+            entry = {
+                "audio": audio_path,
+                "outfile": str(item.out_path),
+                "error": str(
+                    item.error_path or Path(item.out_path).parent / "error.txt"
+                ),
+            }
+            prepared.append((item, entry))
+
+        if not prepared:
+            return
+
+        entries = [entry for _, entry in prepared]
+
+        fd, batch_file = tempfile.mkstemp(suffix=".json")
+        with os.fdopen(fd, "w") as file:
+            json.dump(entries, file)
+        temp_files.append(batch_file)
+
+        cmd = [
+            *wav2lip_command(use_runner=True),
+            "--batch",
+            batch_file,
+            "--checkpoint_path",
+            WAV2LIP_CHECKPOINT,
+            "--face",
+            str(face_path),
+            "--audio",
+            entries[0]["audio"],
+            "--outfile",
+            entries[0]["outfile"],
+            *quality_args(quality),
+        ]
+
+        logger.info(f"Executing batched Wav2Lip: {' '.join(cmd)}")
+
+        try:
+            subprocess.run(cmd, check=True, capture_output=True, text=True)
+            failure = "Wav2Lip produced no output"
+        except subprocess.CalledProcessError as e:
+            failure = f"Wav2Lip inference failed: {e.stderr}"
+
+        # Split results back out: anything without output or error failed
+        for item, entry in prepared:
+            if (
+                not Path(entry["outfile"]).exists()
+                and not Path(entry["error"]).exists()
+            ):
+                _write_item_error(item, failure)
+
+        logger.info(f"Batched Wav2Lip render finished for avatar: {avatar_id}")
+
+    finally:
+        _remove_files(temp_files)
@@ -0,0 +1,417 @@
+"""Render Job Scheduler.
+
+In-process scheduler for Wav2Lip render jobs. Jobs are held in per-tenant
+queues and executed by a fixed pool of worker threads:
+
+* Short preview renders are always picked up before full-quality renders.
+* Within a priority class, tenants are served by deficit round-robin, so one
+  tenant submitting hundreds of renders cannot starve the others, and each
+  tenant is capped to a maximum number of concurrently running jobs.
+* Queued jobs of a tenant that share an avatar and quality are coalesced into
+  one batch, so the avatar's model and face setup is paid once per batch
+  rather than once per job.
+
+Author: Ruslan Magana (https://ruslanmv.com)
+License: Apache 2.0
+"""
+
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Priority classes (lower value is scheduled first)
+PRIORITY_PREVIEW = 0
+PRIORITY_FULL = 1
+PRIORITIES = (PRIORITY_PREVIEW, PRIORITY_FULL)
+
+DEFAULT_TENANT = "default"
+
+# Number of recent queue wait times kept per tenant for metrics
+WAIT_SAMPLES = 1000
+
+
+@dataclass(order=True)
+class RenderJob:
+    """A queued render job.
+
+    Ordering only considers ``priority`` and ``seq`` so that jobs of the same
+    priority are served in submission order.
+
+    Attributes:
+        priority: Priority class (``PRIORITY_PREVIEW`` or ``PRIORITY_FULL``).
+        seq: Monotonic submission counter used as a tie-breaker.
+        job_id: Identifier of the job this render belongs to.
+        avatar_id: Avatar identifier (without .png extension).
+        voice_url: URL of the voice audio file.
+        out_path: Output path for the rendered MP4 file.
+        quality: Rendering quality preset passed to Wav2Lip.
+        max_seconds: Optional limit on the rendered audio duration.
+        tenant_id: Tenant the job is accounted to.
+        submitted_at: Wall-clock submission time (``time.time()``).
+    """
+
+    priority: int
+    seq: int
+    job_id: str = field(compare=False)
+    avatar_id: str = field(compare=False)
+    voice_url: str = field(compare=False)
+    out_path: str = field(compare=False)
+    quality: str = field(default="high", compare=False)
+    max_seconds: Optional[float] = field(default=None, compare=False)
+    tenant_id: str = field(default=DEFAULT_TENANT, compare=False)
+    submitted_at: float = field(default_factory=time.time, compare=False)
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    """Return the ``pct`` percentile of ``samples`` (nearest rank)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+class RenderScheduler:
+    """Tenant-fair priority scheduler backed by a pool of worker threads.
+
+    Args:
+        runner: Callable executing a batch of render jobs sharing an avatar.
+            Exceptions raised by the runner are logged and do not stop the
+            worker.
+        workers: Number of concurrent render workers.
+        batch_max_size: Maximum number of jobs coalesced into one batch.
+        batch_max_wait: Seconds a worker waits for more jobs with the same
+            avatar before running a batch that is not full.
+        tenant_quantum: Jobs a tenant may start per round-robin turn.
+        tenant_weights: Optional per-tenant multipliers of ``tenant_quantum``.
+        tenant_max_running: Maximum jobs of one tenant running at once
+            (``0`` disables the cap).
+
+    Example:
+        >>> scheduler = RenderScheduler(lambda jobs: None, workers=1)
+        >>> scheduler.start()
+        >>> scheduler.submit("abc", "alice", "https://x/v.wav", "/tmp/out.mp4")
+        >>> scheduler.stop()
+    """
+
+    def __init__(
+        self,
+        runner: Callable[[List[RenderJob]], None],
+        workers: int = 1,
+        batch_max_size: int = 1,
+        batch_max_wait: float = 0.0,
+        tenant_quantum: int = 1,
+        tenant_weights: Optional[Dict[str, int]] = None,
+        tenant_max_running: int = 0,
+    ) -> None:
+        self._runner = runner
+        self._workers = max(1, workers)
+        self._batch_max_size = max(1, batch_max_size)
+        self._batch_max_wait = max(0.0, batch_max_wait)
+        self._tenant_quantum = max(1, tenant_quantum)
+        self._tenant_weights = dict(tenant_weights or {})
+        self._tenant_max_running = max(0, tenant_max_running)
+
+        # Per (priority, tenant) FIFO queues and the tenants with queued work
+        self._queues: Dict[Tuple[int, str], Deque[RenderJob]] = {}
+        self._rings: Dict[int, Deque[str]] = {p: deque() for p in PRIORITIES}
+        self._deficits: Dict[Tuple[int, str], int] = {}
+        self._tenant_running: Dict[str, int] = {}
+        self._waits: Dict[str, Deque[float]] = {}
+
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._running = False
+
+    def start(self) -> None:
+        """Start the worker threads."""
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+
+        for index in range(self._workers):
+            thread = threading.Thread(
+                target=self._work,
+                name=f"render-worker-{index}",
+                daemon=True,
+            )
+            thread.start()
+            self._threads.append(thread)
+
+        logger.info(f"Render scheduler started with {self._workers} worker(s)")
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop accepting work and wait for the worker threads to exit.
+
+        Jobs still queued are dropped; jobs already running are allowed to
+        finish within ``timeout``.
+
+        Args:
+            timeout: Maximum seconds to wait for each worker thread.
+        """
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads.clear()
+
+        logger.info("Render scheduler stopped")
+
+    def submit(
+        self,
+        job_id: str,
+        avatar_id: str,
+        voice_url: str,
+        out_path: str,
+        quality: str = "high",
+        priority: int = PRIORITY_FULL,
+        max_seconds: Optional[float] = None,
+        tenant_id: str = DEFAULT_TENANT,
+    ) -> RenderJob:
+        """Queue a render job.
+
+        Args:
+            job_id: Identifier of the job this render belongs to.
+            avatar_id: Avatar identifier (without .png extension).
+            voice_url: URL of the voice audio file.
+            out_path: Output path for the rendered MP4 file.
+            quality: Rendering quality preset passed to Wav2Lip.
+            priority: Priority class; previews should use ``PRIORITY_PREVIEW``.
+            max_seconds: Optional limit on the rendered audio duration.
+            tenant_id: Tenant the job is accounted to.
+
+        Returns:
+            RenderJob: The queued job.
+        """
+        job = RenderJob(
+            priority=priority,
+            seq=next(self._seq),
+            job_id=job_id,
+            avatar_id=avatar_id,
+            voice_url=voice_url,
+            out_path=out_path,
+            quality=quality,
+            max_seconds=max_seconds,
+            tenant_id=tenant_id,
+        )
+
+        with self._cond:
+            key = (priority, tenant_id)
+            queue = self._queues.setdefault(key, deque())
+            if not queue:
+                self._rings[priority].append(tenant_id)
+            queue.append(job)
+            depth = len(queue)
+            # Wake every worker: one may be waiting to grow a batch for this avatar
+            self._cond.notify_all()
+
+        logger.info(
+            f"Queued render {job_id} (tenant={tenant_id}, priority={priority}, "
+            f"tenant_depth={depth})"
+        )
+        return job
+
+    def queue_depth(self) -> int:
+        """Return the number of jobs waiting to be scheduled."""
+        with self._cond:
+            return sum(len(queue) for queue in self._queues.values())
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return per-tenant queue depth, running jobs and queue wait times.
+
+        Wait times are computed over the last ``WAIT_SAMPLES`` jobs started
+        for each tenant.
+
+        Returns:
+            Dict with totals and a ``tenants`` mapping.
+        """
+        with self._cond:
+            tenants = set(self._tenant_running) | set(self._waits)
+            tenants |= {tenant for _, tenant in self._queues}
+
+            report: Dict[str, Any] = {}
+            for tenant in sorted(tenants):
+                waits = list(self._waits.get(tenant, ()))
+                report[tenant] = {
+                    "queued": {
+                        "preview": len(
+                            self._queues.get((PRIORITY_PREVIEW, tenant), ())
+                        ),
+                        "full": len(self._queues.get((PRIORITY_FULL, tenant), ())),
+                    },
+                    "running": self._tenant_running.get(tenant, 0),
+                    "waitSeconds": {
+                        "count": len(waits),
+                        "mean": round(sum(waits) / len(waits), 3) if waits else 0.0,
+                        "p50": round(_percentile(waits, 50), 3),
+                        "p95": round(_percentile(waits, 95), 3),
+                        "p99": round(_percentile(waits, 99), 3),
+                        "max": round(max(waits), 3) if waits else 0.0,
+                    },
+                }
+
+            return {
+                "workers": self._workers,
+                "queued": sum(len(queue) for queue in self._queues.values()),
+                "running": sum(self._tenant_running.values()),
+                "tenants": report,
+            }
+
+    @staticmethod
+    def _batch_key(job: RenderJob) -> Tuple[str, str]:
+        """Return the key of a tenant's jobs that can share one Wav2Lip run."""
+        return job.avatar_id, job.quality
+
+    def _capacity(self, tenant: str) -> int:
+        """Return how many more jobs a tenant may start right now."""
+        if not self._tenant_max_running:
+            return self._batch_max_size
+        return self._tenant_max_running - self._tenant_running.get(tenant, 0)
+
+    def _select_tenant(self) -> Optional[Tuple[int, str]]:
+        """Pick the next (priority, tenant) to serve by deficit round-robin.
+
+        Previews are served before full renders. Within a priority class the
+        tenant at the head of the ring is served while it has deficit left;
+        it is then moved to the back and credited its quantum again on its
+        next turn. Tenants at their concurrency cap are skipped without losing
+        their credit.
+
+        Must be called with the condition lock held.
+        """
+        for priority in PRIORITIES:
+            ring = self._rings[priority]
+            eligible = [t for t in ring if self._capacity(t) > 0]
+            if not eligible:
+                continue
+
+            while True:
+                tenant = ring[0]
+                key = (priority, tenant)
+                if self._capacity(tenant) <= 0:
+                    ring.rotate(-1)
+                    continue
+                if self._deficits.get(key, 0) <= 0:
+                    # New turn: credit the quantum; an overdrawn tenant
+                    # (from a large batch) may need several turns to recover
+                    weight = max(1, self._tenant_weights.get(tenant, 1))
+                    self._deficits[key] = (
+                        self._deficits.get(key, 0) + self._tenant_quantum * weight
+                    )
+                    if self._deficits[key] <= 0:
+                        ring.rotate(-1)
+                        continue
+                return key
+
+        return None
+
+    def _take(
+        self,
+        key: Tuple[int, str],
+        first: Optional[RenderJob],
+        limit: int,
+    ) -> List[RenderJob]:
+        """Remove up to ``limit`` jobs from a tenant queue.
+
+        Without ``first`` the head job plus jobs batchable with it are taken;
+        with ``first`` only jobs batchable with ``first`` are taken. The
+        tenant's deficit and running count are charged for every job taken.
+
+        Must be called with the condition lock held.
+        """
+        queue = self._queues.get(key)
+        limit = min(limit, self._capacity(key[1]))
+        if not queue or limit <= 0:
+            return []
+
+        batch_key = self._batch_key(first or queue[0])
+        taken = [job for job in queue if self._batch_key(job) == batch_key][:limit]
+        taken_ids = {id(job) for job in taken}
+        remaining = deque(job for job in queue if id(job) not in taken_ids)
+
+        now = time.time()
+        tenant = key[1]
+        waits = self._waits.setdefault(tenant, deque(maxlen=WAIT_SAMPLES))
+        waits.extend(now - job.submitted_at for job in taken)
+        self._tenant_running[tenant] = self._tenant_running.get(tenant, 0) + len(taken)
+        self._deficits[key] = self._deficits.get(key, 0) - len(taken)
+
+        ring = self._rings[key[0]]
+        if remaining:
+            self._queues[key] = remaining
+            if self._deficits[key] <= 0 and ring and ring[0] == tenant:
+                ring.rotate(-1)
+        else:
+            del self._queues[key]
+            self._deficits.pop(key, None)
+            ring.remove(tenant)
+
+        return taken
+
+    def _next_batch(self) -> Optional[List[RenderJob]]:
+        """Block until a batch is available or the scheduler stops."""
+        with self._cond:
+            while True:
+                if not self._running:
+                    return None
+                key = self._select_tenant()
+                if key is not None:
+                    break
+                self._cond.wait()
+
+            batch = self._take(key, None, self._batch_max_size)
+            first = batch[0]
+
+            # Give jobs for the same avatar a bounded chance to join the batch
+            deadline = time.monotonic() + self._batch_max_wait
+            while self._running and len(batch) < self._batch_max_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+                batch.extend(self._take(key, first, self._batch_max_size - len(batch)))
+
+            return batch
+
+    def _finish(self, batch: List[RenderJob]) -> None:
+        """Release the tenant concurrency held by a finished batch."""
+        with self._cond:
+            tenant = batch[0].tenant_id
+            self._tenant_running[tenant] -= len(batch)
+            if not self._tenant_running[tenant]:
+                del self._tenant_running[tenant]
+            self._cond.notify_all()
+
+    def _work(self) -> None:
+        """Worker loop executing queued batches in fair-share order."""
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+
+            now = time.time()
+            job_ids = ", ".join(job.job_id for job in batch)
+            waited = max(now - job.submitted_at for job in batch)
+            logger.info(
+                f"Starting render batch [{job_ids}] (tenant={batch[0].tenant_id}, "
+                f"avatar={batch[0].avatar_id}, priority={batch[0].priority}, "
+                f"size={len(batch)}, max_wait={waited:.2f}s)"
+            )
+
+            try:
+                self._runner(batch)
+            except Exception as e:
+                logger.error(f"Render batch [{job_ids}] failed: {e}")
+            finally:
+                self._finish(batch)
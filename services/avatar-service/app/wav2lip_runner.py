@@ -0,0 +1,126 @@
+"""Wav2Lip Inference Runner.
+
+Runs Wav2Lip's ``inference.py`` inside a process that first installs the
+shared-weight hooks from ``app.weights``, so the Wav2Lip and face-detector
+checkpoints are memory-mapped instead of copied into every render process,
+and the audio hooks from ``app.render``, so cached samples and
+mel-spectrograms are memory-mapped instead of recomputed.
+
+With ``--batch <file.json>`` the runner renders a list of ``{"audio",
+"outfile", "error"}`` entries for the same face in one process, loading the
+model and detecting the face only once.
+
+Usage:
+    python -m app.wav2lip_runner Wav2Lip/inference.py --checkpoint_path ... --face ...
+    python -m app.wav2lip_runner Wav2Lip/inference.py --batch jobs.json --face ...
+
+Author: Ruslan Magana (https://ruslanmv.com)
+License: Apache 2.0
+"""
+
+import functools
+import json
+import logging
+import runpy
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app import render, weights
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+
+def _pop_option(argv: List[str], name: str) -> Optional[str]:
+    """Remove ``name <value>`` from an argument list and return the value."""
+    if name not in argv:
+        return None
+    index = argv.index(name)
+    value = argv[index + 1]
+    del argv[index : index + 2]
+    return value
+
+
+def run_batch(script: Path, batch_file: str) -> None:
+    """Render every entry of a batch file with one loaded model.
+
+    Executes ``inference.py`` without running its ``main()``, memoizes its
+    ``load_model`` and (for static faces) ``face_detect`` functions, then calls
+    ``main()`` once per entry with that entry's audio and output file.
+
+    Args:
+        script: Path to Wav2Lip's ``inference.py``.
+        batch_file: JSON file listing the entries to render.
+    """
+    with open(batch_file) as file:
+        entries: List[Dict[str, str]] = json.load(file)
+
+    namespace = runpy.run_path(str(script), run_name="wav2lip_inference")
+    inference = namespace["main"].__globals__
+    args = inference["args"]
+
+    inference["load_model"] = functools.lru_cache(maxsize=None)(inference["load_model"])
+
+    face_detect = inference["face_detect"]
+    detected: Dict[str, Any] = {}
+
+    def cached_face_detect(images: Any) -> Any:
+        if not args.static:
+            return face_detect(images)
+        if args.face not in detected:
+            detected[args.face] = face_detect(images)
+        return detected[args.face]
+
+    inference["face_detect"] = cached_face_detect
+
+    for entry in entries:
+        args.audio = entry["audio"]
+        args.outfile = entry["outfile"]
+        logger.info(f"Rendering batch entry: {entry['outfile']}")
+
+        try:
+            inference["main"]()
+        except Exception as e:
+            logger.error(f"Batch entry failed: {entry['outfile']}: {e}")
+            Path(entry["error"]).write_text(f"Wav2Lip inference failed: {e}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Run a Wav2Lip script with shared weights and cached audio features.
+
+    Args:
+        argv: Script path followed by its arguments. Defaults to ``sys.argv[1:]``.
+
+    Raises:
+        SystemExit: If no script path is given.
+    """
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if not argv:
+        logger.error("Usage: python -m app.wav2lip_runner <inference.py> [args...]")
+        raise SystemExit(2)
+
+    script = Path(argv[0]).resolve()
+    batch_file = _pop_option(argv, "--batch")
+
+    # Wav2Lip imports its sibling modules (audio, models, face_detection)
+    sys.path.insert(0, str(script.parent))
+    sys.argv = [str(script), *argv[1:]]
+
+    if weights.SHARED_WEIGHTS:
+        weights.install_torch_hooks()
+    if render.AUDIO_CACHE:
+        render.install_audio_hooks()
+
+    if batch_file:
+        run_batch(script, batch_file)
+    else:
+        runpy.run_path(str(script), run_name="__main__")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""Shared Model Weights.
+
+Lets every Wav2Lip process on a pod share one physical copy of the Wav2Lip and
+face-detector weights. Checkpoints are converted once to PyTorch's zip format
+and then loaded with ``torch.load(mmap=True)``; modules adopt the mapped
+tensors via ``load_state_dict(assign=True)``. Because the mappings are
+file-backed and never written to, their pages live in the page cache and are
+counted once no matter how many workers map them.
+
+Author: Ruslan Magana (https://ruslanmv.com)
+License: Apache 2.0
+"""
+
+import functools
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Configuration constants
+SHARED_WEIGHTS = os.getenv("SHARED_WEIGHTS", "false").lower() == "true"
+WEIGHTS_CACHE_DIR = Path(os.getenv("WEIGHTS_CACHE_DIR", "/tmp/avatar-weights"))
+WAV2LIP_CHECKPOINT = os.getenv(
+    "WAV2LIP_CHECKPOINT",
+    "Wav2Lip/checkpoints/wav2lip_gan.pth",
+)
+FACE_DETECTOR_CHECKPOINT = os.getenv(
+    "FACE_DETECTOR_CHECKPOINT",
+    "Wav2Lip/face_detection/detection/sfd/s3fd.pth",
+)
+
+# Process information pseudo-filesystem
+PROC_DIR = Path("/proc")
+
+# smaps fields summed into the memory report
+_SMAPS_FIELDS = {
+    "Rss": "rssBytes",
+    "Pss": "pssBytes",
+    "Shared_Clean": "sharedBytes",
+    "Shared_Dirty": "sharedBytes",
+    "Private_Clean": "uniqueBytes",
+    "Private_Dirty": "uniqueBytes",
+}
+
+
+def shared_checkpoints() -> List[str]:
+    """Return the checkpoint paths whose weights are shared between workers."""
+    return [WAV2LIP_CHECKPOINT, FACE_DETECTOR_CHECKPOINT]
+
+
+def mmap_checkpoint(path: str) -> Path:
+    """Return a memory-mappable copy of a checkpoint.
+
+    ``torch.load(mmap=True)`` only supports the zip serialization format, while
+    the published Wav2Lip checkpoints use the legacy format. The checkpoint is
+    re-saved once into ``WEIGHTS_CACHE_DIR``; the copy is keyed by source size
+    and modification time and written atomically, so concurrent workers can
+    call this safely.
+
+    Args:
+        path: Path to the original checkpoint.
+
+    Returns:
+        Path: Path to the zip-format checkpoint.
+
+    Raises:
+        FileNotFoundError: If the source checkpoint does not exist.
+    """
+    import torch
+
+    source = Path(path)
+    stat = source.stat()
+    target = WEIGHTS_CACHE_DIR / f"{source.stem}-{stat.st_size}-{int(stat.st_mtime)}.pt"
+
+    if target.exists():
+        return target
+
+    WEIGHTS_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    logger.info(f"Converting checkpoint for memory mapping: {source} -> {target}")
+
+    checkpoint = torch.load(str(source), map_location="cpu")
+    tmp_path = target.with_suffix(f".{os.getpid()}.tmp")
+    torch.save(checkpoint, str(tmp_path))
+    os.replace(tmp_path, target)
+
+    return target
+
+
+@functools.lru_cache(maxsize=None)
+def load_shared(path: str) -> Any:
+    """Load a checkpoint as read-only memory-mapped tensors.
+
+    Args:
+        path: Path to the original checkpoint.
+
+    Returns:
+        The deserialized checkpoint whose tensors are backed by the file mapping.
+    """
+    import torch
+
+    mapped = mmap_checkpoint(path)
+    logger.info(f"Memory-mapping checkpoint: {mapped}")
+    return torch.load(str(mapped), map_location="cpu", mmap=True)
+
+
+def preload() -> None:
+    """Convert and map every shared checkpoint in the current process.
+
+    Called at service start-up so conversion happens once per node instead of
+    inside the first render, and the pages are already in the page cache when
+    render workers map them.
+    """
+    for path in shared_checkpoints():
+        if not Path(path).exists():
+            logger.warning(f"Checkpoint not found, not preloading: {path}")
+            continue
+        try:
+            load_shared(path)
+        except Exception as e:
+            logger.error(f"Failed to preload checkpoint {path}: {e}")
+
+
+def install_torch_hooks() -> None:
+    """Route checkpoint loads in this process through the shared mappings.
+
+    Patches ``torch.load`` so the shared checkpoints resolve to their mapped
+    copies, and ``Module.load_state_dict`` so modules adopt the mapped tensors
+    instead of copying them into freshly allocated parameters. Intended for
+    the dedicated Wav2Lip runner process only.
+    """
+    import torch
+
+    shared = {str(Path(p).resolve()) for p in shared_checkpoints()}
+    original_load = torch.load
+    original_load_state_dict = torch.nn.Module.load_state_dict
+
+    @functools.wraps(original_load)
+    def load(f: Any, *args: Any, **kwargs: Any) -> Any:
+        if isinstance(f, (str, os.PathLike)) and str(Path(f).resolve()) in shared:
+            return load_shared(str(f))
+        return original_load(f, *args, **kwargs)
+
+    @functools.wraps(original_load_state_dict)
+    def load_state_dict(self: Any, state_dict: Any, *args: Any, **kwargs: Any) -> Any:
+        kwargs.setdefault("assign", True)
+        return original_load_state_dict(self, state_dict, *args, **kwargs)
+
+    torch.load = load
+    torch.nn.Module.load_state_dict = load_state_dict
+    logger.info("Shared weight hooks installed")
+
+
+def _read_smaps(pid: int) -> Dict[str, int]:
+    """Sum the memory counters of a process from procfs.
+
+    Args:
+        pid: Process ID.
+
+    Returns:
+        Dict mapping report keys to byte counts.
+    """
+    proc = PROC_DIR / str(pid)
+    rollup = proc / "smaps_rollup"
+    source = rollup if rollup.exists() else proc / "smaps"
+
+    totals = {key: 0 for key in set(_SMAPS_FIELDS.values())}
+    for line in source.read_text().splitlines():
+        name, _, value = line.partition(":")
+        if name in _SMAPS_FIELDS:
+            totals[_SMAPS_FIELDS[name]] += int(value.split()[0]) * 1024
+
+    return totals
+
+
+def _same_exe(pid: int, exe: str) -> bool:
+    """Return whether a process runs the given executable."""
+    try:
+        return os.readlink(PROC_DIR / str(pid) / "exe") == exe
+    except OSError:
+        return False
+
+
+def worker_pids() -> List[int]:
+    """Return the PIDs of this service's worker processes.
+
+    Covers the current process, its sibling workers (children of the same
+    parent running the same interpreter, e.g. uvicorn or gunicorn workers)
+    and their render subprocesses.
+
+    Returns:
+        List of process IDs.
+    """
+    parents: Dict[int, List[int]] = {}
+    for stat_file in PROC_DIR.glob("[0-9]*/stat"):
+        try:
+            fields = stat_file.read_text().rsplit(")", 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        parents.setdefault(int(fields[1]), []).append(int(stat_file.parent.name))
+
+    pid, ppid = os.getpid(), os.getppid()
+    workers = [pid]
+    if ppid:
+        exe = os.readlink(PROC_DIR / "self" / "exe")
+        workers = [w for w in parents.get(ppid, []) if _same_exe(w, exe)] or [pid]
+
+    pids: List[int] = []
+    for worker in sorted(workers):
+        pids.append(worker)
+        pids.extend(sorted(parents.get(worker, [])))
+    return pids
+
+
+def memory_report(pids: Optional[Iterable[int]] = None) -> Dict[str, Any]:
+    """Report unique versus shared memory for each worker process.
+
+    ``uniqueBytes`` is memory only that process holds (private pages);
+    ``sharedBytes`` is memory mapped by more than one process, such as
+    memory-mapped weights. ``pssBytes`` splits shared pages evenly, so its
+    total is the real footprint of the pod's workers.
+
+    Args:
+        pids: Process IDs to report on. Defaults to ``worker_pids()``.
+
+    Returns:
+        Dict with a per-process list and totals.
+    """
+    processes = []
+    for pid in pids if pids is not None else worker_pids():
+        try:
+            counters = _read_smaps(pid)
+            cmd = (PROC_DIR / str(pid) / "cmdline").read_bytes()
+        except (OSError, ValueError):
+            continue
+        processes.append(
+            {
+                "pid": pid,
+                "cmd": cmd.replace(b"\0", b" ").decode(errors="replace").strip()[:120],
+                **counters,
+            }
+        )
+
+    totals = {
+        key: sum(p[key] for p in processes)
+        for key in ("rssBytes", "pssBytes", "uniqueBytes", "sharedBytes")
+    }
+
+    return {"sharedWeights": SHARED_WEIGHTS, "processes": processes, "totals": totals}
@@ -0,0 +1,177 @@
+"""Batch Processing for the Orchestrate Job Runner.
+
+Feeds many payloads through one job run so the container start, the Kafka
+producer bootstrap and the HTTP connections to Orchestrate are paid once
+per batch instead of once per payload. Payloads come from a JSONL stream
+(a file or stdin) or from an input Kafka topic, and up to
+``ORCH_CONCURRENCY`` of them are processed at the same time.
+
+Author: Ruslan Magana (https://ruslanmv.com)
+License: Apache 2.0
+"""
+
+import asyncio
+import json
+import logging
+import math
+import os
+import time
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    TextIO,
+    Tuple,
+)
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Configuration constants
+# Commit input-topic offsets after this many payloads
+BATCH_COMMIT_EVERY = int(os.getenv("BATCH_COMMIT_EVERY", "100"))
+# Payloads in flight at the same time
+ORCH_CONCURRENCY = int(os.getenv("ORCH_CONCURRENCY", "8"))
+
+# A payload source yields (label, raw JSON) pairs; the label locates failures
+Source = Iterable[Tuple[str, Any]]
+
+
+class BatchStats:
+    """Per-payload durations and aggregate throughput of a batch."""
+
+    def __init__(self) -> None:
+        self.durations: List[float] = []
+        self.failed = 0
+        self.started = time.perf_counter()
+
+    def record(self, seconds: float, ok: bool) -> None:
+        """Record one processed payload."""
+        if ok:
+            self.durations.append(seconds)
+        else:
+            self.failed += 1
+
+    def summary(self) -> Dict[str, float]:
+        """Return counts, elapsed time, throughput and latency percentiles."""
+        elapsed = time.perf_counter() - self.started
+        durations = sorted(self.durations)
+
+        def percentile(q: float) -> float:
+            if not durations:
+                return 0.0
+            return durations[max(0, math.ceil(q / 100 * len(durations)) - 1)]
+
+        return {
+            "queued": len(durations),
+            "failed": self.failed,
+            "elapsed": round(elapsed, 2),
+            "perSecond": round(len(durations) / elapsed, 2) if elapsed else 0.0,
+            "p50": round(percentile(50), 3),
+            "p95": round(percentile(95), 3),
+        }
+
+
+def jsonl_source(stream: TextIO) -> Iterator[Tuple[str, str]]:
+    """Yield the non-blank lines of a JSONL stream.
+
+    Args:
+        stream: Open text stream, e.g. a file or ``sys.stdin``.
+    """
+    for number, line in enumerate(stream, start=1):
+        if line.strip():
+            yield f"line {number}", line
+
+
+def topic_source(consumer: Any) -> Iterator[Tuple[str, bytes]]:
+    """Yield the records of a Kafka consumer until it times out.
+
+    Args:
+        consumer: KafkaConsumer created with ``consumer_timeout_ms`` so that
+            iteration stops once the topic is drained.
+    """
+    for record in consumer:
+        yield f"{record.topic}/{record.partition}@{record.offset}", record.value
+
+
+async def run_batch(
+    source: Source,
+    handle: Callable[[Dict[str, Any]], Awaitable[str]],
+    checkpoint: Optional[Callable[[], None]] = None,
+    commit_every: int = BATCH_COMMIT_EVERY,
+    concurrency: int = ORCH_CONCURRENCY,
+) -> BatchStats:
+    """Process every payload of a source concurrently, continuing past failures.
+
+    At most ``concurrency`` payloads are handled at once; the steps within
+    one payload stay in the order ``handle`` awaits them. Before each
+    checkpoint the payloads in flight are drained, so a checkpoint never
+    covers a payload that has not been published yet. Once a payload has
+    failed, no further checkpoint is taken, so a re-run processes it again.
+
+    Args:
+        source: Pairs of a label and the payload's JSON text or bytes. It is
+            read in a worker thread, so blocking sources (stdin, a Kafka
+            consumer) do not stall the payloads in flight.
+        handle: Coroutine that enriches and publishes one payload and
+            returns its job ID.
+        checkpoint: Called every ``commit_every`` payloads and at the end,
+            e.g. to commit input-topic offsets.
+        commit_every: Payloads between checkpoints.
+        concurrency: Most payloads in flight at the same time.
+
+    Returns:
+        BatchStats of the run.
+    """
+    stats = BatchStats()
+    slots = asyncio.Semaphore(concurrency)
+    in_flight: Set[asyncio.Task] = set()
+    items = iter(source)
+    count = 0
+
+    async def process(label: str, raw: Any) -> None:
+        start = time.perf_counter()
+        try:
+            job_id = await handle(json.loads(raw))
+            elapsed = time.perf_counter() - start
+            stats.record(elapsed, ok=True)
+            logger.info(f"[{label}] Job {job_id} queued in {elapsed:.2f}s")
+        except Exception as e:
+            stats.record(time.perf_counter() - start, ok=False)
+            logger.error(f"[{label}] Payload failed: {e}")
+        finally:
+            slots.release()
+
+    def take_checkpoint() -> None:
+        if stats.failed:
+            logger.error(f"Not checkpointing: {stats.failed} payloads failed")
+            return
+        checkpoint()
+
+    while True:
+        await slots.acquire()
+        item = await asyncio.to_thread(next, items, None)
+        if item is None:
+            slots.release()
+            break
+
+        task = asyncio.create_task(process(*item))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+
+        count += 1
+        if checkpoint and count % commit_every == 0:
+            await asyncio.gather(*in_flight)
+            take_checkpoint()
+
+    await asyncio.gather(*in_flight)
+    if checkpoint and count % commit_every:
+        take_checkpoint()
+
+    return stats
@@ -0,0 +1,162 @@
+"""Versioned Envelope for ``videoJob`` Messages.
+
+Enriched payloads carry the original text, the script and the slides, and
+as plain JSON a large deck makes a multi-hundred-KB message. Messages are
+therefore published in a compact, versioned envelope:
+
+    b"VGJ" | version (1 byte) | format (1 byte) | compression (1 byte) | body
+
+  * format ``j`` is compact JSON, ``m`` is msgpack (when installed) and
+    ``c`` is a claim check.
+  * compression ``-`` is none, ``z`` is zlib and ``s`` is zstd (when
+    installed). Bodies under ``MESSAGE_COMPRESS_BYTES`` are not compressed.
+
+An envelope larger than ``CLAIM_CHECK_BYTES`` is stored in object storage
+instead. The message then carries only a claim check: a JSON reference with
+the bucket, key, size and SHA-256 of the stored envelope. The renderer
+decodes both, and raw JSON messages from older producers
+(``renderer/job_message.py``). Envelopes are only published with
+``MESSAGE_ENVELOPE=true``, since the Argo pipeline reads plain JSON.
+
+Author: Ruslan Magana (https://ruslanmv.com)
+License: Apache 2.0
+"""
+
+import hashlib
+import json
+import logging
+import os
+import zlib
+from typing import Any, Dict, Optional, Tuple
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Configuration constants
+# Off by default: the Argo event source and JOB_PAYLOAD/INPUT_JSON still
+# expect plain JSON; enable once every videoJob consumer uses job_message
+MESSAGE_ENVELOPE = os.getenv("MESSAGE_ENVELOPE", "false").lower() == "true"
+MESSAGE_FORMAT = os.getenv("MESSAGE_FORMAT", "auto").lower()  # auto, msgpack or json
+MESSAGE_COMPRESS_BYTES = int(os.getenv("MESSAGE_COMPRESS_BYTES", "1024"))
+CLAIM_CHECK_BYTES = int(os.getenv("CLAIM_CHECK_BYTES", str(64 * 1024)))
+CLAIM_CHECK_PREFIX = os.getenv("CLAIM_CHECK_PREFIX", "job-payloads/")
+
+MAGIC = b"VGJ"
+VERSION = 1
+
+FORMAT_JSON = b"j"
+FORMAT_MSGPACK = b"m"
+FORMAT_CLAIM = b"c"
+COMPRESSION_NONE = b"-"
+COMPRESSION_ZLIB = b"z"
+COMPRESSION_ZSTD = b"s"
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+def header(fmt: bytes, compression: bytes) -> bytes:
+    """Return the envelope header for a body format and compression."""
+    return MAGIC + bytes([VERSION]) + fmt + compression
+
+
+def _serialize(message: Dict[str, Any]) -> Tuple[bytes, bytes]:
+    """Serialize a message with the configured format."""
+    if MESSAGE_FORMAT != "json" and msgpack is not None:
+        return FORMAT_MSGPACK, msgpack.packb(message, use_bin_type=True)
+    if MESSAGE_FORMAT == "msgpack":
+        logger.warning("msgpack not installed - publishing JSON envelopes")
+    return FORMAT_JSON, json.dumps(
+        message, separators=(",", ":"), ensure_ascii=False
+    ).encode("utf-8")
+
+
+def _compress(body: bytes) -> Tuple[bytes, bytes]:
+    """Compress a body with zstd, or zlib if zstandard is not installed."""
+    if len(body) < MESSAGE_COMPRESS_BYTES:
+        return COMPRESSION_NONE, body
+    if zstandard is not None:
+        return COMPRESSION_ZSTD, zstandard.ZstdCompressor(level=3).compress(body)
+    return COMPRESSION_ZLIB, zlib.compress(body, 6)
+
+
+class ClaimStore:
+    """Stores oversized envelopes in a COS bucket.
+
+    Objects are never deleted here: a redelivered message must still find
+    its payload. Expire ``CLAIM_CHECK_PREFIX`` with a bucket lifecycle rule.
+
+    Args:
+        s3_client: boto3 S3 client for IBM Cloud Object Storage.
+        bucket: Bucket to store payloads in.
+        prefix: Key prefix of stored payloads.
+    """
+
+    def __init__(
+        self, s3_client: Any, bucket: str, prefix: str = CLAIM_CHECK_PREFIX
+    ) -> None:
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.prefix = prefix
+
+    def put(self, job_id: str, data: bytes) -> Dict[str, Any]:
+        """Store an envelope and return its claim check.
+
+        Args:
+            job_id: Job the payload belongs to.
+            data: Complete envelope to store.
+
+        Returns:
+            Dict with the job ID, bucket, key, size and SHA-256 of ``data``.
+        """
+        key = f"{self.prefix}{job_id}.vgj"
+        self.s3_client.put_object(Bucket=self.bucket, Key=key, Body=data)
+        logger.info(
+            f"Stored {len(data)} byte payload of job {job_id} at {self.bucket}/{key}"
+        )
+        return {
+            "jobId": job_id,
+            "bucket": self.bucket,
+            "key": key,
+            "size": len(data),
+            "sha256": hashlib.sha256(data).hexdigest(),
+        }
+
+
+def encode(message: Dict[str, Any], claim_store: Optional[ClaimStore] = None) -> bytes:
+    """Encode a ``videoJob`` message.
+
+    Args:
+        message: Job message including its ``jobId``.
+        claim_store: Where envelopes above ``CLAIM_CHECK_BYTES`` go; without
+            one they are published inline.
+
+    Returns:
+        The Kafka message value.
+    """
+    if not MESSAGE_ENVELOPE:
+        return json.dumps(message).encode("utf-8")
+
+    fmt, body = _serialize(message)
+    compression, body = _compress(body)
+    data = header(fmt, compression) + body
+    if len(data) <= CLAIM_CHECK_BYTES:
+        return data
+
+    if claim_store is None:
+        logger.warning(
+            f"Job {message.get('jobId')} message is {len(data)} bytes but no claim store is configured"
+        )
+        return data
+
+    reference = claim_store.put(message["jobId"], data)
+    return header(FORMAT_CLAIM, COMPRESSION_NONE) + json.dumps(
+        reference, separators=(",", ":")
+    ).encode("utf-8")
@@ -9,16 +9,33 @@ Author: Ruslan Magana (https://ruslanmv.com)
 License: Apache 2.0
 """
 
+import argparse
+import asyncio
 import json
 import logging
+import math
 import os
+import sqlite3
+import sys
+import threading
 import time
 import uuid
-from typing import Any, Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
 
+import httpx
 import requests
-from kafka import KafkaProducer
+from kafka import KafkaConsumer, KafkaProducer
 from kafka.errors import KafkaError
+from requests.adapters import HTTPAdapter
+
+import batch
+import envelope
+import partitioning
+import publisher
+import resilience
+import skill_cache
+import slides
 
 # Configure logging
 logging.basicConfig(
@@ -38,6 +55,21 @@ ORCH_API = os.getenv(
 )
 ORCH_KEY = os.environ.get("ORCH_APIKEY")
 TIMEOUT = int(os.getenv("ORCH_TIMEOUT", "30"))
+ORCH_POOL_SIZE = int(os.getenv("ORCH_POOL_SIZE", "10"))
+
+# Batch input topic configuration
+INPUT_GROUP_ID = os.getenv("INPUT_GROUP_ID", "orchestrate-batch")
+# Stop consuming the input topic after this long without a new message
+INPUT_IDLE_MS = int(os.getenv("INPUT_IDLE_MS", "30000"))
+
+# IBM Cloud Object Storage for claim-checked job payloads
+COS_BUCKET = os.getenv("COS_BUCKET", "vg-videos-prod")
+COS_ENDPOINT = os.getenv(
+    "COS_ENDPOINT",
+    "https://s3.eu-de.cloud-object-storage.appdomain.cloud",
+)
+COS_ACCESS_KEY = os.getenv("COS_ACCESS_KEY")
+COS_SECRET_KEY = os.getenv("COS_SECRET_KEY")
 
 # Validate required environment variables
 if not KAFKA_BROKERS or not KAFKA_BROKERS[0]:
@@ -49,8 +81,12 @@ if not ORCH_KEY:
     raise EnvironmentError("ORCH_APIKEY is required")
 
 
-def create_kafka_producer() -> KafkaProducer:
-    """Create and configure Kafka producer with JSON serialization.
+def create_kafka_producer(high_throughput: bool = False) -> KafkaProducer:
+    """Create and configure Kafka producer for encoded job messages.
+
+    Args:
+        high_throughput: Use the batching, compressing producer settings of
+            ``publisher.producer_config`` for asynchronous publishing.
 
     Returns:
         KafkaProducer: Configured Kafka producer instance.
@@ -63,10 +99,10 @@ def create_kafka_producer() -> KafkaProducer:
 
         producer = KafkaProducer(
             bootstrap_servers=KAFKA_BROKERS,
-            value_serializer=lambda v: json.dumps(v).encode("utf-8"),
-            acks="all",  # Wait for all replicas
-            retries=3,
-            max_in_flight_requests_per_connection=1,
+            # Values are encoded by encode_message
+            # Jobs keyed by avatar stay on one partition (see partitioning.py)
+            partitioner=partitioning.partition,
+            **publisher.producer_config(high_throughput),
         )
 
         logger.info("Successfully connected to Kafka")
@@ -77,12 +113,174 @@ def create_kafka_producer() -> KafkaProducer:
         raise
 
 
+def create_input_consumer(topic: str) -> KafkaConsumer:
+    """Create a consumer that drains an input topic for batch mode.
+
+    Offsets are committed by the batch runner after the payloads have been
+    published, and iteration stops after ``INPUT_IDLE_MS`` without a message.
+
+    Args:
+        topic: Topic holding raw JSON payloads.
+
+    Returns:
+        KafkaConsumer: Consumer subscribed to ``topic``.
+
+    Raises:
+        KafkaError: If connection to Kafka brokers fails.
+    """
+    try:
+        logger.info(f"Consuming payloads from Kafka topic: {topic}")
+
+        return KafkaConsumer(
+            topic,
+            bootstrap_servers=KAFKA_BROKERS,
+            group_id=INPUT_GROUP_ID,
+            enable_auto_commit=False,
+            auto_offset_reset="earliest",
+            consumer_timeout_ms=INPUT_IDLE_MS,
+        )
+
+    except KafkaError as e:
+        logger.error(f"Failed to connect to Kafka: {e}")
+        raise
+
+
+def create_http_session() -> requests.Session:
+    """Create the HTTP session shared by all skill calls.
+
+    Keeping one session reuses TCP/TLS connections to Orchestrate across
+    skill calls and payloads.
+
+    Returns:
+        requests.Session: Session with ``ORCH_POOL_SIZE`` pooled connections.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=ORCH_POOL_SIZE)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(
+        {
+            "Authorization": f"Bearer {ORCH_KEY}",
+            "Content-Type": "application/json",
+        }
+    )
+    return session
+
+
+# One pooled session per process
+http_session = create_http_session()
+
+# Skill result cache, opened on first use
+_skill_cache: Optional[skill_cache.SkillCache] = None
+
+# Claim-check store for oversized messages, created on first use
+_claim_store: Optional[envelope.ClaimStore] = None
+_claim_store_lock = threading.Lock()
+
+
+def get_skill_cache() -> Optional[skill_cache.SkillCache]:
+    """Return the persistent skill result cache, or None if it is disabled.
+
+    Returns:
+        SkillCache at ``SKILL_CACHE_PATH`` when ``SKILL_CACHE`` is set and the
+        file can be opened.
+    """
+    global _skill_cache
+    if not skill_cache.SKILL_CACHE:
+        return None
+    if _skill_cache is None:
+        try:
+            _skill_cache = skill_cache.SkillCache(bypass=skill_cache.SKILL_CACHE_BYPASS)
+        except sqlite3.Error as e:
+            logger.warning(f"Skill cache unavailable, calling skills uncached: {e}")
+            skill_cache.SKILL_CACHE = False
+    return _skill_cache
+
+
+def create_async_client(concurrency: int) -> httpx.AsyncClient:
+    """Create the async HTTP client used by the batch pipeline.
+
+    A payload sends up to ``SLIDE_SECTION_CONCURRENCY`` slide requests at
+    once and each may be hedged, so the pool has two connections per section
+    slot. A smaller pool makes requests wait for a connection and fail with
+    ``httpx.PoolTimeout`` while Orchestrate is healthy.
+
+    Args:
+        concurrency: Payloads in flight.
+
+    Returns:
+        httpx.AsyncClient: Client with a pooled connection for every request
+        the payloads can have open.
+    """
+    connections = concurrency * max(1, slides.SLIDE_SECTION_CONCURRENCY) * 2
+    return httpx.AsyncClient(
+        headers={
+            "Authorization": f"Bearer {ORCH_KEY}",
+            "Content-Type": "application/json",
+        },
+        timeout=TIMEOUT,
+        limits=httpx.Limits(
+            max_connections=connections, max_keepalive_connections=connections
+        ),
+    )
+
+
+def _skill_result(skill: str, body: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the ``result`` of a skill response body."""
+    if "result" not in body:
+        raise ValueError(f"Invalid response format from skill '{skill}'")
+    return body["result"]
+
+
+def _is_retryable(error: Exception) -> bool:
+    """Return whether a failed skill request (requests or httpx) may be retried."""
+    status = getattr(getattr(error, "response", None), "status_code", None)
+    if status is not None:
+        return status == 429 or status >= 500
+    return isinstance(
+        error,
+        (
+            requests.Timeout,
+            requests.ConnectionError,
+            httpx.TimeoutException,
+            httpx.TransportError,
+        ),
+    )
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Return the delay of a retry that is not an Orchestrate failure, else None.
+
+    A rate-limited (429) request waits for its ``Retry-After``, capped at
+    ``ORCH_RETRY_CAP``. A request that never got a connection from the local
+    pool (``httpx.PoolTimeout``) backs off without counting against the
+    circuit breaker.
+    """
+    if isinstance(error, httpx.PoolTimeout):
+        return resilience.backoff(1)
+    response = getattr(error, "response", None)
+    if getattr(response, "status_code", None) != 429:
+        return None
+    try:
+        delay = float(response.headers.get("Retry-After", ""))
+    except ValueError:
+        return resilience.ORCH_RETRY_BASE
+    if not math.isfinite(delay):
+        return resilience.ORCH_RETRY_CAP
+    return min(max(delay, 0.0), resilience.ORCH_RETRY_CAP)
+
+
 def call_skill(skill: str, params: Dict[str, Any]) -> Dict[str, Any]:
     """Invoke a Watson X Orchestrate AI skill.
 
     Calls a specific AI skill via the Watson X Orchestrate API to process
     the provided parameters. Skills can perform tasks like script rewriting
-    and slide generation.
+    and slide generation. Results are served from and stored in the
+    persistent skill cache when it is enabled.
+
+    Requests use the skill's adaptive timeout, are hedged after its p95
+    latency, retried on transient errors and short-circuited while
+    Orchestrate is failing (see ``resilience.py``).
 
     Args:
         skill: Name of the AI skill to invoke (e.g., 'rewrite-script').
@@ -94,6 +292,7 @@ def call_skill(skill: str, params: Dict[str, Any]) -> Dict[str, Any]:
     Raises:
         requests.HTTPError: If the API call fails.
         requests.Timeout: If the request exceeds the timeout.
+        resilience.CircuitOpenError: If Orchestrate is failing.
         ValueError: If the response format is invalid.
 
     Example:
@@ -101,30 +300,34 @@ def call_skill(skill: str, params: Dict[str, Any]) -> Dict[str, Any]:
         >>> print(result)
         {'enhanced_text': '...'}
     """
-    try:
-        url = f"{ORCH_API}/skills/{skill}:invoke"
+    cache = get_skill_cache()
+    if cache:
+        cached = cache.get(skill, params)
+        if cached is not None:
+            return cached
 
-        logger.info(f"Calling Watson X Orchestrate skill: {skill}")
-        logger.debug(f"Skill parameters: {params}")
+    url = f"{ORCH_API}/skills/{skill}:invoke"
+    skill_policy = resilience.policy(skill, TIMEOUT)
 
-        response = requests.post(
+    def invoke(timeout: float) -> Dict[str, Any]:
+        response = http_session.post(
             url,
-            headers={
-                "Authorization": f"Bearer {ORCH_KEY}",
-                "Content-Type": "application/json",
-            },
             json={"params": params},
-            timeout=TIMEOUT,
+            timeout=timeout,
         )
-
         response.raise_for_status()
-        result = response.json()
+        return _skill_result(skill, response.json())
+
+    try:
+        logger.info(f"Calling Watson X Orchestrate skill: {skill}")
+        logger.debug(f"Skill parameters: {params}")
 
-        if "result" not in result:
-            raise ValueError(f"Invalid response format from skill '{skill}'")
+        result = resilience.call(invoke, skill_policy, _is_retryable, _retry_after)
+        if cache:
+            cache.put(skill, params, result)
 
         logger.info(f"Successfully executed skill: {skill}")
-        return result["result"]
+        return result
 
     except requests.HTTPError as e:
         logger.error(f"HTTP error calling skill '{skill}': {e}")
@@ -132,18 +335,145 @@ def call_skill(skill: str, params: Dict[str, Any]) -> Dict[str, Any]:
         raise
 
     except requests.Timeout:
-        logger.error(f"Timeout calling skill '{skill}' after {TIMEOUT}s")
+        logger.error(
+            f"Timeout calling skill '{skill}' after {skill_policy.timeout():.1f}s"
+        )
         raise
 
     except requests.RequestException as e:
         logger.error(f"Network error calling skill '{skill}': {e}")
         raise
 
+    except resilience.CircuitOpenError as e:
+        logger.error(f"Skill '{skill}' not called: {e}")
+        raise
+
     except Exception as e:
         logger.error(f"Unexpected error calling skill '{skill}': {e}")
         raise
 
 
+async def call_skill_async(
+    client: httpx.AsyncClient,
+    skill: str,
+    params: Dict[str, Any],
+) -> Dict[str, Any]:
+    """Invoke a Watson X Orchestrate AI skill without blocking the event loop.
+
+    Uses the persistent skill cache and the resilience policy like
+    ``call_skill``. A ``429 Too Many Requests`` answer is retried after its
+    ``Retry-After`` delay, so a concurrency setting above Orchestrate's rate
+    limit slows the batch down instead of failing it.
+
+    Args:
+        client: Shared async HTTP client.
+        skill: Name of the AI skill to invoke (e.g., 'rewrite-script').
+        params: Dictionary of parameters to pass to the skill.
+
+    Returns:
+        Dict containing the skill execution result.
+
+    Raises:
+        httpx.HTTPStatusError: If the API call fails.
+        httpx.TimeoutException: If the request exceeds the timeout.
+        resilience.CircuitOpenError: If Orchestrate is failing.
+        ValueError: If the response format is invalid.
+    """
+    cache = get_skill_cache()
+    if cache:
+        # SQLite blocks, and may wait on a lock held by another run
+        cached = await asyncio.to_thread(cache.get, skill, params)
+        if cached is not None:
+            return cached
+
+    url = f"{ORCH_API}/skills/{skill}:invoke"
+    skill_policy = resilience.policy(skill, TIMEOUT)
+
+    async def invoke(timeout: float) -> Dict[str, Any]:
+        response = await client.post(url, json={"params": params}, timeout=timeout)
+        response.raise_for_status()
+        return _skill_result(skill, response.json())
+
+    try:
+        result = await resilience.call_async(
+            invoke, skill_policy, _is_retryable, _retry_after
+        )
+        if cache:
+            await asyncio.to_thread(cache.put, skill, params, result)
+        return result
+
+    except httpx.HTTPStatusError as e:
+        logger.error(f"HTTP error calling skill '{skill}': {e}")
+        logger.error(f"Response: {e.response.text}")
+        raise
+
+    except httpx.TimeoutException:
+        logger.error(
+            f"Timeout calling skill '{skill}' after {skill_policy.timeout():.1f}s"
+        )
+        raise
+
+    except httpx.RequestError as e:
+        logger.error(f"Network error calling skill '{skill}': {e}")
+        raise
+
+    except resilience.CircuitOpenError as e:
+        logger.error(f"Skill '{skill}' not called: {e}")
+        raise
+
+
+def generate_slides(script: Any) -> Any:
+    """Generate the slides of a script, section by section if it is long.
+
+    Sections are sent to ``generate-slides`` concurrently and cached one by
+    one, so editing part of a long script only regenerates that section.
+
+    Args:
+        script: Enhanced script returned by ``rewrite-script``.
+
+    Returns:
+        The merged ``generate-slides`` result.
+    """
+    sections = slides.split_sections(script) if isinstance(script, str) else [script]
+    if len(sections) == 1:
+        return call_skill("generate-slides", {"text": script})
+
+    logger.info(f"Generating slides for {len(sections)} script sections")
+    workers = min(len(sections), slides.SLIDE_SECTION_CONCURRENCY)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(
+            executor.map(
+                lambda text: call_skill("generate-slides", {"text": text}), sections
+            )
+        )
+    return slides.merge_slides(results)
+
+
+async def generate_slides_async(client: httpx.AsyncClient, script: Any) -> Any:
+    """Generate the slides of a script like ``generate_slides``, using async calls.
+
+    Args:
+        client: Shared async HTTP client.
+        script: Enhanced script returned by ``rewrite-script``.
+
+    Returns:
+        The merged ``generate-slides`` result.
+    """
+    sections = slides.split_sections(script) if isinstance(script, str) else [script]
+    if len(sections) == 1:
+        return await call_skill_async(client, "generate-slides", {"text": script})
+
+    logger.info(f"Generating slides for {len(sections)} script sections")
+    limit = asyncio.Semaphore(slides.SLIDE_SECTION_CONCURRENCY)
+
+    async def section_slides(text: str) -> Any:
+        async with limit:
+            return await call_skill_async(client, "generate-slides", {"text": text})
+
+    results = await asyncio.gather(*(section_slides(text) for text in sections))
+    return slides.merge_slides(list(results))
+
+
 def process_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
     """Process and enrich video creation payload using Watson X Orchestrate.
 
@@ -177,11 +507,7 @@ def process_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
 
         # Step 2: Generate slide segmentation
         logger.info("Step 2: Generating slide segmentation")
-        slides = call_skill(
-            "generate-slides",
-            {"text": enhanced_script},
-        )
-        payload["slides"] = slides
+        payload["slides"] = generate_slides(enhanced_script)
 
         logger.info("Payload processing completed successfully")
         return payload
@@ -195,6 +521,83 @@ def process_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
         raise
 
 
+async def process_payload_async(
+    client: httpx.AsyncClient, payload: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Enrich a payload like ``process_payload``, using async skill calls.
+
+    The script is rewritten before the slides are generated from it; other
+    payloads' skill calls run in between.
+
+    Args:
+        client: Shared async HTTP client.
+        payload: Raw video creation request payload.
+
+    Returns:
+        Dict containing enriched payload with processed script and slides.
+
+    Raises:
+        KeyError: If required fields are missing from payload.
+    """
+    if "text" not in payload:
+        raise KeyError("Payload must contain 'text' field")
+
+    payload["script"] = await call_skill_async(
+        client, "rewrite-script", {"text": payload["text"]}
+    )
+    payload["slides"] = await generate_slides_async(client, payload["script"])
+    return payload
+
+
+def get_claim_store() -> Optional[envelope.ClaimStore]:
+    """Return the COS store for oversized job messages, or None.
+
+    Returns:
+        ClaimStore on ``COS_BUCKET`` when COS credentials are set and boto3
+        is installed.
+    """
+    global _claim_store
+    if not COS_ACCESS_KEY or not COS_SECRET_KEY:
+        return None
+
+    with _claim_store_lock:
+        if _claim_store is None:
+            try:
+                import boto3
+            except ImportError:
+                logger.warning(
+                    "boto3 not installed - large job messages are published inline"
+                )
+                return None
+
+            s3_client = boto3.client(
+                "s3",
+                endpoint_url=COS_ENDPOINT,
+                aws_access_key_id=COS_ACCESS_KEY,
+                aws_secret_access_key=COS_SECRET_KEY,
+            )
+            _claim_store = envelope.ClaimStore(s3_client, COS_BUCKET)
+    return _claim_store
+
+
+def encode_message(payload: Dict[str, Any], job_id: str) -> bytes:
+    """Encode an enriched payload as a ``videoJob`` message value.
+
+    Messages above ``CLAIM_CHECK_BYTES`` are uploaded to COS and replaced by
+    a claim check, so this may block on the upload.
+
+    Args:
+        payload: Enriched job payload.
+        job_id: Unique job identifier.
+
+    Returns:
+        bytes: Message value in the versioned envelope.
+    """
+    message = {"jobId": job_id, **payload}
+    claim_store = get_claim_store() if envelope.MESSAGE_ENVELOPE else None
+    return envelope.encode(message, claim_store)
+
+
 def publish_to_kafka(
     producer: KafkaProducer,
     payload: Dict[str, Any],
@@ -211,11 +614,14 @@ def publish_to_kafka(
         KafkaError: If message publishing fails.
     """
     try:
-        message = {"jobId": job_id, **payload}
+        value = encode_message(payload, job_id)
+        key = partitioning.message_key(partitioning.job_avatar(payload), job_id)
 
-        logger.info(f"Publishing job {job_id} to Kafka topic: {TOPIC}")
+        logger.info(
+            f"Publishing job {job_id} to Kafka topic: {TOPIC} ({len(value)} bytes)"
+        )
 
-        future = producer.send(TOPIC, value=message)
+        future = producer.send(TOPIC, key=key, value=value)
         record_metadata = future.get(timeout=10)
 
         logger.info(
@@ -234,7 +640,139 @@ def publish_to_kafka(
         raise
 
 
-def main() -> None:
+def publish_async(
+    producer: KafkaProducer,
+    value: bytes,
+    job_id: str,
+    tracker: publisher.DeliveryTracker,
+    key: Optional[bytes] = None,
+) -> None:
+    """Publish an encoded job message without waiting for the broker.
+
+    The delivery result is recorded by ``tracker``; call ``producer.flush()``
+    before relying on it.
+
+    Args:
+        producer: Kafka producer instance.
+        value: Message value from ``encode_message``.
+        job_id: Unique job identifier.
+        tracker: Collects the delivery outcome.
+        key: Partitioning key from ``partitioning.message_key``.
+    """
+    future = producer.send(TOPIC, key=key, value=value)
+    tracker.track(future, job_id)
+
+
+def enrich_and_publish(producer: KafkaProducer, payload: Dict[str, Any]) -> str:
+    """Enrich one payload and publish it as a new render job.
+
+    Args:
+        producer: Kafka producer instance.
+        payload: Raw video creation request payload.
+
+    Returns:
+        str: ID of the queued job.
+    """
+    job_id = str(uuid.uuid4())
+    logger.info(f"Processing job ID: {job_id}")
+
+    enriched_payload = process_payload(payload)
+    publish_to_kafka(producer, enriched_payload, job_id)
+    return job_id
+
+
+async def run_batch(
+    producer: KafkaProducer,
+    source: Optional[str],
+    input_topic: Optional[str],
+    concurrency: int,
+    tracker: Optional[publisher.DeliveryTracker] = None,
+) -> bool:
+    """Process many payloads concurrently with one producer and one HTTP client.
+
+    Args:
+        producer: Kafka producer shared by all payloads.
+        source: JSONL file path, or ``-`` for stdin.
+        input_topic: Topic to drain instead of reading ``source``.
+        concurrency: Payloads in flight at the same time.
+        tracker: Publish asynchronously and collect delivery failures here;
+            without it every publish waits for the broker.
+
+    Returns:
+        bool: True if every payload was queued and delivered.
+    """
+    async with create_async_client(concurrency) as client:
+
+        async def handle(payload: Dict[str, Any]) -> str:
+            job_id = str(uuid.uuid4())
+            enriched_payload = await process_payload_async(client, payload)
+            if tracker:
+                # Encoding may upload a claim-checked payload to COS
+                value = await asyncio.to_thread(
+                    encode_message, enriched_payload, job_id
+                )
+                key = partitioning.message_key(
+                    partitioning.job_avatar(enriched_payload), job_id
+                )
+                publish_async(producer, value, job_id, tracker, key)
+            else:
+                # The producer blocks until the broker acknowledges
+                await asyncio.to_thread(
+                    publish_to_kafka, producer, enriched_payload, job_id
+                )
+            return job_id
+
+        if input_topic:
+            consumer = create_input_consumer(input_topic)
+
+            def commit() -> None:
+                # Offsets may only move past messages the broker has accepted
+                producer.flush()
+                if tracker and tracker.failures:
+                    logger.error(
+                        f"Not committing input offsets: {len(tracker.failures)} jobs undelivered"
+                    )
+                    return
+                consumer.commit()
+
+            try:
+                stats = await batch.run_batch(
+                    batch.topic_source(consumer),
+                    handle,
+                    commit,
+                    concurrency=concurrency,
+                )
+            finally:
+                consumer.close()
+        elif source == "-":
+            stats = await batch.run_batch(
+                batch.jsonl_source(sys.stdin), handle, concurrency=concurrency
+            )
+        else:
+            with open(source) as f:
+                stats = await batch.run_batch(
+                    batch.jsonl_source(f), handle, concurrency=concurrency
+                )
+
+    producer.flush()
+    summary = stats.summary()
+    undelivered = len(tracker.failures) if tracker else 0
+    logger.info(f"Batch summary: {summary}, undelivered: {undelivered}")
+    if tracker and tracker.partitions:
+        logger.info(
+            f"Jobs per partition: {dict(sorted(tracker.partitions.items()))} "
+            f"(skew {partitioning.skew(tracker.partitions):.2f})"
+        )
+
+    print(
+        f"✓ Jobs queued: {summary['queued']} ({summary['failed']} failed, {undelivered} undelivered)"
+    )
+    print(f"✓ Elapsed time: {summary['elapsed']}s ({summary['perSecond']} payloads/s)")
+    print(f"✓ Per payload: p50 {summary['p50']}s, p95 {summary['p95']}s")
+    return summary["failed"] == 0 and undelivered == 0
+
+
+def main(argv: Optional[List[str]] = None) -> None:
     """Main execution function.
 
     Orchestrates the complete workflow:
@@ -243,13 +781,73 @@ def main() -> None:
     3. Publish to Kafka for GPU rendering
     4. Log execution metrics
 
+    With ``--batch`` or ``--input-topic`` the job instead processes many
+    payloads, ``--concurrency`` at a time, with one Kafka producer and one
+    pooled HTTP client, and exits non-zero if any payload failed. Batch
+    publishing is asynchronous on the high-throughput producer unless
+    ``--sync-publish`` is given.
+
+    Args:
+        argv: Command-line arguments. Defaults to ``sys.argv[1:]``.
+
     Raises:
         EnvironmentError: If INPUT_PAYLOAD is not set.
         Exception: For any processing errors.
     """
+    parser = argparse.ArgumentParser(description="Watson X Orchestrate Job Runner")
+    parser.add_argument(
+        "--batch",
+        metavar="FILE",
+        help="Process JSONL payloads from FILE ('-' for stdin)",
+    )
+    parser.add_argument(
+        "--input-topic", help="Process payloads from a Kafka topic until it is drained"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=batch.ORCH_CONCURRENCY,
+        help="Payloads processed at the same time in batch mode",
+    )
+    parser.add_argument(
+        "--bypass-skill-cache",
+        action="store_true",
+        help="Call every skill even if a cached result exists (results are still stored)",
+    )
+    parser.add_argument(
+        "--sync-publish",
+        action="store_true",
+        help="Wait for the broker after every message in batch mode",
+    )
+    args = parser.parse_args(argv)
+
+    if args.bypass_skill_cache:
+        skill_cache.SKILL_CACHE_BYPASS = True
+
     start_time = time.time()
 
     try:
+        if args.batch or args.input_topic:
+            producer = create_kafka_producer(high_throughput=not args.sync_publish)
+            tracker = None if args.sync_publish else publisher.DeliveryTracker()
+            try:
+                ok = asyncio.run(
+                    run_batch(
+                        producer,
+                        args.batch,
+                        args.input_topic,
+                        args.concurrency,
+                        tracker,
+                    )
+                )
+            finally:
+                producer.flush()
+                producer.close()
+                logger.info("Kafka producer closed")
+            if not ok:
+                raise SystemExit(1)
+            return
+
         # Load input payload
         payload_str = os.environ.get("INPUT_PAYLOAD")
         if not payload_str:
@@ -258,19 +856,12 @@ def main() -> None:
         logger.info("Loading input payload")
         payload = json.loads(payload_str)
 
-        # Generate unique job ID
-        job_id = str(uuid.uuid4())
-        logger.info(f"Processing job ID: {job_id}")
-
         # Create Kafka producer
         producer = create_kafka_producer()
 
         try:
-            # Process payload with Watson X Orchestrate
-            enriched_payload = process_payload(payload)
-
-            # Publish to Kafka
-            publish_to_kafka(producer, enriched_payload, job_id)
+            # Enrich with Watson X Orchestrate and publish to Kafka
+            job_id = enrich_and_publish(producer, payload)
 
             # Calculate metrics
             elapsed = round(time.time() - start_time, 2)
@@ -297,6 +888,11 @@ def main() -> None:
         logger.error(f"Job processing failed: {e}")
         raise SystemExit(1)
 
+    finally:
+        resilience.log_metrics()
+        if _skill_cache:
+            logger.info(f"Skill cache: {_skill_cache.stats()}")
+
 
 if __name__ == "__main__":
     logger.info("=== Watson X Orchestrate Job Runner Started ===")
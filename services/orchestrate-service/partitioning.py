@@ -0,0 +1,196 @@
+"""Avatar-Affine Partitioning of Render Jobs.
+
+Unkeyed messages land on random partitions, so every renderer pod ends up
+downloading and caching every avatar. Job messages are instead keyed by
+their avatar and placed with rendezvous (highest random weight) hashing:
+all jobs of an avatar go to the same partition, and therefore to the same
+consumer, and changing the partition count moves only the keys of the
+partitions that were added or removed.
+
+One very popular avatar would overload its partition. Hot avatars, listed
+in ``HOT_AVATARS`` or seen in more than ``HOT_AVATAR_SHARE`` of the last
+``HOT_AVATAR_WINDOW`` jobs of a run, are split into ``HOT_AVATAR_SPLIT``
+sub-keys: their jobs spread over a few partitions, and still only over those.
+
+Author: Ruslan Magana (https://ruslanmv.com)
+License: Apache 2.0
+"""
+
+import hashlib
+import logging
+import os
+import random
+import threading
+from collections import Counter, deque
+from typing import Any, Deque, Dict, List, Optional, Sequence
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Configuration constants
+AVATAR_PARTITIONING = os.getenv("AVATAR_PARTITIONING", "true").lower() == "true"
+HOT_AVATAR_SPLIT = int(os.getenv("HOT_AVATAR_SPLIT", "4"))
+HOT_AVATAR_SHARE = float(os.getenv("HOT_AVATAR_SHARE", "0.1"))
+HOT_AVATAR_WINDOW = int(os.getenv("HOT_AVATAR_WINDOW", "500"))
+# Avatars that are always split, e.g. "john_doe,jane_doe" or "john_doe:8"
+HOT_AVATARS = os.getenv("HOT_AVATARS", "")
+
+
+def parse_hot_avatars(spec: str) -> Dict[str, int]:
+    """Parse ``HOT_AVATARS`` into a mapping of avatar to sub-key count.
+
+    Args:
+        spec: Comma-separated avatars with an optional ``:split`` suffix.
+
+    Returns:
+        Dict of avatar ID to its number of sub-keys.
+    """
+    hot = {}
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        avatar, _, split = entry.partition(":")
+        hot[avatar] = int(split) if split else HOT_AVATAR_SPLIT
+    return hot
+
+
+def _score(key: bytes, partition: int) -> int:
+    """Return the rendezvous weight of a key on a partition."""
+    digest = hashlib.blake2b(
+        key + b"@" + str(partition).encode(), digest_size=8
+    ).digest()
+    return int.from_bytes(digest, "big")
+
+
+def partition(
+    key: Optional[bytes], all_partitions: Sequence[int], available: Sequence[int]
+) -> int:
+    """Choose the partition of a message (a kafka-python ``partitioner``).
+
+    Keyed messages go to the partition with the highest rendezvous weight
+    among all partitions, so the choice does not depend on which brokers
+    are currently reachable. Unkeyed messages go to a random available
+    partition, like kafka-python's default.
+
+    Args:
+        key: Serialized message key, or None.
+        all_partitions: Every partition of the topic.
+        available: Partitions with a reachable leader.
+
+    Returns:
+        int: The partition to send to.
+    """
+    if key is None:
+        return random.choice(available or all_partitions)
+    return max(all_partitions, key=lambda p: _score(key, p))
+
+
+class HotKeyTracker:
+    """Spots avatars that dominate the recent jobs of this run.
+
+    Args:
+        window: Number of recent jobs considered.
+        share: Fraction of the window above which an avatar is hot.
+        static: Avatars that are always hot, with their sub-key counts.
+    """
+
+    def __init__(
+        self,
+        window: int = HOT_AVATAR_WINDOW,
+        share: float = HOT_AVATAR_SHARE,
+        static: Optional[Dict[str, int]] = None,
+    ) -> None:
+        self.share = share
+        self.static = static if static is not None else parse_hot_avatars(HOT_AVATARS)
+        self._recent: Deque[str] = deque(maxlen=window)
+        self._counts: Counter = Counter()
+        self._hot: set = set()
+        self._lock = threading.Lock()
+
+    def observe(self, avatar: str) -> int:
+        """Record a job of ``avatar`` and return how many sub-keys it gets.
+
+        Args:
+            avatar: Avatar ID of the job.
+
+        Returns:
+            int: 1 for a normal avatar, more for a hot one.
+        """
+        with self._lock:
+            if len(self._recent) == self._recent.maxlen:
+                self._counts[self._recent[0]] -= 1
+            self._recent.append(avatar)
+            self._counts[avatar] += 1
+
+            if avatar in self.static:
+                return self.static[avatar]
+
+            # Only judge once the window has enough jobs to be meaningful
+            hot = len(self._recent) >= min(100, self._recent.maxlen) and (
+                self._counts[avatar] > self.share * len(self._recent)
+            )
+            if hot != (avatar in self._hot):
+                logger.info(f"Avatar '{avatar}' is {'now' if hot else 'no longer'} hot")
+                self._hot.symmetric_difference_update({avatar})
+            return HOT_AVATAR_SPLIT if hot else 1
+
+
+# Hot-key tracker of this process
+_tracker = HotKeyTracker()
+
+
+def job_avatar(payload: Dict[str, Any]) -> Optional[str]:
+    """Return the avatar ID of a job payload.
+
+    The frontend sends ``avatarId``; older producers send ``avatar``.
+
+    Args:
+        payload: Job payload.
+
+    Returns:
+        The avatar ID, or None if the payload has none.
+    """
+    return payload.get("avatar") or payload.get("avatarId")
+
+
+def message_key(
+    avatar: Optional[str], job_id: str, tracker: Optional[HotKeyTracker] = None
+) -> Optional[bytes]:
+    """Return the Kafka key of a job message.
+
+    Args:
+        avatar: Avatar ID of the job, if any.
+        job_id: Unique job identifier; picks the sub-key of a hot avatar.
+        tracker: Hot-key tracker; defaults to the process-wide one.
+
+    Returns:
+        The avatar (``avatar#n`` for a hot one) as bytes, or None if
+        partitioning is disabled or the job has no avatar.
+    """
+    if not AVATAR_PARTITIONING or not avatar:
+        return None
+
+    split = (tracker or _tracker).observe(avatar)
+    if split <= 1:
+        return avatar.encode("utf-8")
+    sub_key = (
+        int(hashlib.blake2b(job_id.encode("utf-8"), digest_size=4).hexdigest(), 16)
+        % split
+    )
+    return f"{avatar}#{sub_key}".encode("utf-8")
+
+
+def skew(counts: Dict[int, int], partitions: Optional[List[int]] = None) -> float:
+    """Return the load of the busiest partition relative to the mean.
+
+    Args:
+        counts: Messages per partition.
+        partitions: Every partition, so that empty ones count; defaults to
+            the keys of ``counts``.
+
+    Returns:
+        float: ``max / mean``; 1.0 is a perfectly even spread.
+    """
+    partitions = partitions if partitions is not None else list(counts)
+    total = sum(counts.get(p, 0) for p in partitions)
+    if not partitions or not total:
+        return 1.0
+    return max(counts.get(p, 0) for p in partitions) * len(partitions) / total
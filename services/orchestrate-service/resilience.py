@@ -0,0 +1,392 @@
+"""Latency-Aware Resilience for Orchestrate Skill Calls.
+
+Wraps a skill request with:
+
+  * **Adaptive timeouts:** Once enough latencies of a skill have been seen,
+    its timeout is a multiple of the observed p99 instead of the fixed
+    ``ORCH_TIMEOUT``, so a stalled replica is abandoned early.
+  * **Hedged requests:** If a request has not answered by the skill's p95
+    latency, a second identical request is sent and the first answer wins.
+    Skills are pure transformations, so a duplicate is harmless.
+  * **Retries:** Timeouts, connection errors, ``429`` and ``5xx`` answers are
+    retried with full-jitter exponential backoff (or ``Retry-After``).
+  * **Circuit breaker:** After ``ORCH_BREAKER_FAILURES`` consecutive failures
+    calls fail fast for ``ORCH_BREAKER_RESET_SECONDS``, then one trial call
+    decides whether Orchestrate is back.
+
+Author: Ruslan Magana (https://ruslanmv.com)
+License: Apache 2.0
+"""
+
+import asyncio
+import logging
+import math
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Configuration constants
+ORCH_MAX_ATTEMPTS = int(os.getenv("ORCH_MAX_ATTEMPTS", "3"))
+ORCH_MIN_TIMEOUT = float(os.getenv("ORCH_MIN_TIMEOUT", "2"))
+# Adaptive timeout as a multiple of the skill's p99 latency
+ORCH_TIMEOUT_FACTOR = float(os.getenv("ORCH_TIMEOUT_FACTOR", "3"))
+ORCH_LATENCY_WINDOW = int(os.getenv("ORCH_LATENCY_WINDOW", "200"))
+# Latencies needed before timeouts adapt and hedging starts
+ORCH_MIN_SAMPLES = int(os.getenv("ORCH_MIN_SAMPLES", "20"))
+ORCH_HEDGE = os.getenv("ORCH_HEDGE", "true").lower() == "true"
+ORCH_RETRY_BASE = float(os.getenv("ORCH_RETRY_BASE", "0.5"))
+ORCH_RETRY_CAP = float(os.getenv("ORCH_RETRY_CAP", "10"))
+ORCH_BREAKER_FAILURES = int(os.getenv("ORCH_BREAKER_FAILURES", "5"))
+ORCH_BREAKER_RESET_SECONDS = float(os.getenv("ORCH_BREAKER_RESET_SECONDS", "30"))
+# Log the metrics every this many calls of a skill
+ORCH_METRICS_EVERY = int(os.getenv("ORCH_METRICS_EVERY", "50"))
+
+T = TypeVar("T")
+
+# Threads running the hedged requests of blocking calls
+_hedge_pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix="skill-hedge")
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling Orchestrate while the breaker is open."""
+
+
+class SkillPolicy:
+    """Latency statistics and counters of one skill.
+
+    Args:
+        skill: Skill name, used in the metrics.
+        max_timeout: Timeout used until enough latencies are known, and the
+            upper bound of the adaptive timeout.
+    """
+
+    def __init__(self, skill: str, max_timeout: float) -> None:
+        self.skill = skill
+        self.max_timeout = max_timeout
+        self.latencies: deque = deque(maxlen=ORCH_LATENCY_WINDOW)
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        """Record the latency of a successful request."""
+        with self._lock:
+            self.latencies.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Return the q-th percentile latency, or None before ``ORCH_MIN_SAMPLES``."""
+        with self._lock:
+            if len(self.latencies) < ORCH_MIN_SAMPLES:
+                return None
+            ordered = sorted(self.latencies)
+        return ordered[
+            min(len(ordered) - 1, max(0, math.ceil(q / 100 * len(ordered)) - 1))
+        ]
+
+    def timeout(self) -> float:
+        """Return the per-request timeout."""
+        p99 = self.percentile(99)
+        if p99 is None:
+            return self.max_timeout
+        return min(self.max_timeout, max(ORCH_MIN_TIMEOUT, p99 * ORCH_TIMEOUT_FACTOR))
+
+    def hedge_delay(self) -> Optional[float]:
+        """Return how long to wait before hedging, or None to not hedge."""
+        return self.percentile(95) if ORCH_HEDGE else None
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return tail latencies, hedge rate and retry counts."""
+
+        def ms(q: float) -> Optional[int]:
+            value = self.percentile(q)
+            return None if value is None else round(value * 1000)
+
+        return {
+            "skill": self.skill,
+            "calls": self.calls,
+            "p50Ms": ms(50),
+            "p95Ms": ms(95),
+            "p99Ms": ms(99),
+            "timeoutS": round(self.timeout(), 2),
+            "hedges": self.hedges,
+            "hedgeRate": round(self.hedges / self.calls, 3) if self.calls else 0.0,
+            "hedgeWins": self.hedge_wins,
+            "retries": self.retries,
+        }
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker.
+
+    Args:
+        failures: Consecutive failures that open the breaker.
+        reset_seconds: How long the breaker stays open before a trial call.
+    """
+
+    def __init__(
+        self,
+        failures: int = ORCH_BREAKER_FAILURES,
+        reset_seconds: float = ORCH_BREAKER_RESET_SECONDS,
+    ) -> None:
+        self.threshold = failures
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """Return ``closed``, ``open`` or ``half-open``."""
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.reset_seconds:
+            return "open"
+        return "half-open"
+
+    def allow(self) -> bool:
+        """Raise CircuitOpenError unless a call may go through.
+
+        Returns:
+            bool: True if the call is the half-open trial; it must then be
+            settled with ``success``/``failure`` or handed back with
+            ``release``.
+        """
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return False
+            if state == "half-open" and not self._trial:
+                # Let exactly one trial call probe the service
+                self._trial = True
+                return True
+        raise CircuitOpenError(f"Orchestrate circuit breaker is {state}")
+
+    def release(self) -> None:
+        """End a trial call that neither succeeded nor counted as a failure.
+
+        The breaker stays half-open, so the next call becomes the trial.
+        """
+        with self._lock:
+            self._trial = False
+
+    def success(self) -> None:
+        """Record a successful call and close the breaker."""
+        with self._lock:
+            if self.opened_at is not None:
+                logger.info("Orchestrate circuit breaker closed")
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def failure(self) -> None:
+        """Record a failed call, opening the breaker at the threshold."""
+        with self._lock:
+            self.failures += 1
+            if self._trial or (
+                self.opened_at is None and self.failures >= self.threshold
+            ):
+                logger.error(
+                    f"Orchestrate circuit breaker opened after {self.failures} consecutive failures"
+                )
+                self.opened_at = time.monotonic()
+                self._trial = False
+
+
+# One breaker for the Orchestrate endpoint and one policy per skill
+breaker = CircuitBreaker()
+_policies: Dict[str, SkillPolicy] = {}
+_policies_lock = threading.Lock()
+
+
+def policy(skill: str, max_timeout: float) -> SkillPolicy:
+    """Return the process-wide policy of a skill, creating it on first use."""
+    with _policies_lock:
+        if skill not in _policies:
+            _policies[skill] = SkillPolicy(skill, max_timeout)
+        return _policies[skill]
+
+
+def log_metrics() -> None:
+    """Log the metrics of every skill and the breaker state."""
+    for skill_policy in list(_policies.values()):
+        logger.info(
+            f"Skill metrics: {skill_policy.metrics()}, breaker: {breaker.state}"
+        )
+
+
+def backoff(attempt: int) -> float:
+    """Return a full-jitter exponential backoff delay for a retry attempt."""
+    return random.uniform(0, min(ORCH_RETRY_CAP, ORCH_RETRY_BASE * 2**attempt))
+
+
+def _timed(fn: Callable[[float], T], timeout: float) -> Tuple[T, float]:
+    start = time.perf_counter()
+    result = fn(timeout)
+    return result, time.perf_counter() - start
+
+
+def _hedged(fn: Callable[[float], T], skill_policy: SkillPolicy) -> Tuple[T, float]:
+    """Run a blocking request, hedging it after the skill's p95 latency."""
+    timeout, delay = skill_policy.timeout(), skill_policy.hedge_delay()
+    first = _hedge_pool.submit(_timed, fn, timeout)
+    if delay is None or wait([first], timeout=delay).done:
+        return first.result()
+
+    skill_policy.hedges += 1
+    second = _hedge_pool.submit(_timed, fn, timeout)
+    pending = {first, second}
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                skill_policy.hedge_wins += future is second
+                return future.result()
+    # The loser of a successful race keeps running in the pool until its timeout
+    raise first.exception()
+
+
+async def _timed_async(
+    fn: Callable[[float], Awaitable[T]], timeout: float
+) -> Tuple[T, float]:
+    start = time.perf_counter()
+    result = await fn(timeout)
+    return result, time.perf_counter() - start
+
+
+async def _hedged_async(
+    fn: Callable[[float], Awaitable[T]], skill_policy: SkillPolicy
+) -> Tuple[T, float]:
+    """Run a request coroutine, hedging it after the skill's p95 latency."""
+    timeout, delay = skill_policy.timeout(), skill_policy.hedge_delay()
+    first = asyncio.ensure_future(_timed_async(fn, timeout))
+    done, _ = await asyncio.wait({first}, timeout=delay)
+    if done:
+        return first.result()
+
+    skill_policy.hedges += 1
+    second = asyncio.ensure_future(_timed_async(fn, timeout))
+    pending = {first, second}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is None:
+                    skill_policy.hedge_wins += task is second
+                    return task.result()
+        raise first.exception()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def _start(skill_policy: SkillPolicy) -> bool:
+    """Admit an attempt through the breaker; return whether it is the trial."""
+    trial = breaker.allow()
+    skill_policy.calls += 1
+    if skill_policy.calls % ORCH_METRICS_EVERY == 0:
+        log_metrics()
+    return trial
+
+
+def _retry_delay(
+    error: Exception,
+    attempt: int,
+    skill_policy: SkillPolicy,
+    retryable: Callable[[Exception], bool],
+    retry_after: Callable[[Exception], Optional[float]],
+) -> float:
+    """Return the delay before the next attempt, or re-raise ``error``."""
+    if not retryable(error):
+        raise error
+    server_delay = retry_after(error)
+    if server_delay is None:
+        # Rate limiting (or a delay of local origin) means Orchestrate is up;
+        # only outages count
+        breaker.failure()
+    if attempt == ORCH_MAX_ATTEMPTS:
+        raise error
+    skill_policy.retries += 1
+    delay = server_delay if server_delay is not None else backoff(attempt)
+    logger.warning(
+        f"Skill '{skill_policy.skill}' attempt {attempt} failed ({error}), retrying in {delay:.1f}s"
+    )
+    return delay
+
+
+def call(
+    fn: Callable[[float], T],
+    skill_policy: SkillPolicy,
+    retryable: Callable[[Exception], bool],
+    retry_after: Callable[[Exception], Optional[float]] = lambda e: None,
+) -> T:
+    """Call a blocking request with hedging, retries and the circuit breaker.
+
+    Args:
+        fn: Sends one request with the given timeout in seconds.
+        skill_policy: Latency statistics of the skill.
+        retryable: Whether an error may be retried.
+        retry_after: Server-requested retry delay of an error, if any.
+
+    Returns:
+        The result of the first successful request.
+
+    Raises:
+        CircuitOpenError: If the breaker is open.
+        Exception: The last error once retries are exhausted, or the first
+            non-retryable one.
+    """
+    attempt = 1
+    while True:
+        trial = _start(skill_policy)
+        try:
+            result, seconds = _hedged(fn, skill_policy)
+        except Exception as e:
+            delay = _retry_delay(e, attempt, skill_policy, retryable, retry_after)
+        else:
+            skill_policy.record(seconds)
+            breaker.success()
+            return result
+        finally:
+            if trial:
+                # Non-retryable and rate-limited trials settle nothing
+                breaker.release()
+        time.sleep(delay)
+        attempt += 1
+
+
+async def call_async(
+    fn: Callable[[float], Awaitable[T]],
+    skill_policy: SkillPolicy,
+    retryable: Callable[[Exception], bool],
+    retry_after: Callable[[Exception], Optional[float]] = lambda e: None,
+) -> T:
+    """Async variant of ``call`` for request coroutines."""
+    attempt = 1
+    while True:
+        trial = _start(skill_policy)
+        try:
+            result, seconds = await _hedged_async(fn, skill_policy)
+        except Exception as e:
+            delay = _retry_delay(e, attempt, skill_policy, retryable, retry_after)
+        else:
+            skill_policy.record(seconds)
+            breaker.success()
+            return result
+        finally:
+            if trial:
+                # Non-retryable and rate-limited trials settle nothing
+                breaker.release()
+        await asyncio.sleep(delay)
+        attempt += 1
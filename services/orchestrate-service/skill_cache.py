@@ -0,0 +1,166 @@
+"""Persistent Cache for Watson X Orchestrate Skill Results.
+
+Source texts are often submitted again (template edits, retries), and each
+time the same skills are invoked with identical parameters. Results are
+cached in a SQLite file keyed by the skill name and a SHA-256 hash of the
+canonical JSON of its parameters. Put the file on a persistent volume and
+the cache survives across job runs.
+
+Author: Ruslan Magana (https://ruslanmv.com)
+License: Apache 2.0
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Configuration constants
+SKILL_CACHE = os.getenv("SKILL_CACHE", "true").lower() == "true"
+SKILL_CACHE_PATH = Path(
+    os.getenv("SKILL_CACHE_PATH", "/tmp/orchestrate-skill-cache.sqlite3")
+)
+SKILL_CACHE_TTL_HOURS = float(os.getenv("SKILL_CACHE_TTL_HOURS", "168"))
+# Skip lookups but keep storing fresh results
+SKILL_CACHE_BYPASS = os.getenv("SKILL_CACHE_BYPASS", "false").lower() == "true"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS skill_results (
+    key TEXT PRIMARY KEY,
+    skill TEXT NOT NULL,
+    result TEXT NOT NULL,
+    expires REAL NOT NULL
+)
+"""
+
+
+def cache_key(skill: str, params: Dict[str, Any]) -> str:
+    """Return the cache key of a skill invocation.
+
+    Args:
+        skill: Skill name.
+        params: Skill parameters; key order does not matter.
+
+    Returns:
+        Hex SHA-256 of the skill name and the canonical JSON of the params.
+    """
+    canonical = json.dumps(
+        params, sort_keys=True, separators=(",", ":"), ensure_ascii=False
+    )
+    return hashlib.sha256(f"{skill}\0{canonical}".encode("utf-8")).hexdigest()
+
+
+class SkillCache:
+    """SQLite-backed skill result cache with a time to live.
+
+    The connection is shared between threads behind a lock. WAL mode lets
+    concurrent job runs on the same host use one file. WAL needs shared
+    memory between those processes, so the file must be on a local disk or a
+    volume mounted by one node only, never on a network filesystem.
+
+    Args:
+        path: SQLite database file.
+        ttl_hours: How long a result stays valid.
+        bypass: Ignore cached results but store fresh ones.
+    """
+
+    def __init__(
+        self,
+        path: Path = SKILL_CACHE_PATH,
+        ttl_hours: float = SKILL_CACHE_TTL_HOURS,
+        bypass: bool = SKILL_CACHE_BYPASS,
+    ) -> None:
+        self.ttl = ttl_hours * 3600
+        self.bypass = bypass
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(
+            str(path), timeout=30, check_same_thread=False, isolation_level=None
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(_SCHEMA)
+        purged = self._db.execute(
+            "DELETE FROM skill_results WHERE expires < ?", (time.time(),)
+        ).rowcount
+        logger.info(f"Skill cache opened at {path} ({purged} expired results purged)")
+
+    def get(self, skill: str, params: Dict[str, Any]) -> Optional[Any]:
+        """Return the cached result of a skill invocation, or None.
+
+        A database error (e.g. ``database is locked``) is logged and treated
+        as a miss, so the cache never fails a skill call.
+
+        Args:
+            skill: Skill name.
+            params: Skill parameters.
+        """
+        key = cache_key(skill, params)
+        if self.bypass:
+            logger.info(f"Skill cache bypassed: {skill} ({key[:12]})")
+            return None
+
+        with self._lock:
+            try:
+                row = self._db.execute(
+                    "SELECT result FROM skill_results WHERE key = ? AND expires >= ?",
+                    (key, time.time()),
+                ).fetchone()
+            except sqlite3.Error as e:
+                logger.warning(f"Skill cache lookup failed, treating as a miss: {e}")
+                row = None
+            if row:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        logger.info(f"Skill cache {'hit' if row else 'miss'}: {skill} ({key[:12]})")
+        return json.loads(row[0]) if row else None
+
+    def put(self, skill: str, params: Dict[str, Any], result: Any) -> None:
+        """Store the result of a successful skill invocation.
+
+        A database error is logged and the result is not cached.
+
+        Args:
+            skill: Skill name.
+            params: Skill parameters.
+            result: JSON-serialisable skill result.
+        """
+        with self._lock:
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO skill_results (key, skill, result, expires) VALUES (?, ?, ?, ?)",
+                    (
+                        cache_key(skill, params),
+                        skill,
+                        json.dumps(result),
+                        time.time() + self.ttl,
+                    ),
+                )
+            except sqlite3.Error as e:
+                logger.warning(f"Skill cache store failed, result not cached: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit and miss counts of this process."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRatio": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._db.close()
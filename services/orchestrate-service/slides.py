@@ -0,0 +1,117 @@
+"""Sectioned Slide Generation.
+
+A long script sent to ``generate-slides`` in one call makes that call
+dominate the job and risks its timeout. The script is therefore split into
+sections at heading and paragraph boundaries. Each section's slides are
+generated concurrently, and the slide lists are merged back in order with
+renumbered indices, so latency follows the largest section rather than the
+whole script.
+
+Author: Ruslan Magana (https://ruslanmv.com)
+License: Apache 2.0
+"""
+
+import os
+import re
+from typing import Any, List
+
+# Configuration constants
+# Scripts longer than this are split; sections are packed up to this size
+SLIDE_SECTION_CHARS = int(os.getenv("SLIDE_SECTION_CHARS", "4000"))
+# Sections of one payload sent to generate-slides at the same time
+SLIDE_SECTION_CONCURRENCY = int(os.getenv("SLIDE_SECTION_CONCURRENCY", "4"))
+
+# Keys a slide may carry its position in
+INDEX_KEYS = ("index", "slide", "number", "slideNumber")
+
+_HEADING = re.compile(r"^\s*#{1,6}\s")
+
+
+def _blocks(text: str) -> List[str]:
+    """Split text into paragraphs, starting a new one at every heading line."""
+    blocks: List[str] = []
+    current: List[str] = []
+    for line in text.splitlines():
+        if not line.strip() or _HEADING.match(line):
+            if current:
+                blocks.append("\n".join(current))
+                current = []
+        if line.strip():
+            current.append(line)
+    if current:
+        blocks.append("\n".join(current))
+    return blocks
+
+
+def split_sections(text: str, max_chars: int = SLIDE_SECTION_CHARS) -> List[str]:
+    """Split a script into sections of at most ``max_chars`` where possible.
+
+    Paragraphs are never cut, so a single paragraph longer than
+    ``max_chars`` becomes a section of its own. A section never ends with a
+    heading; the heading moves on with the paragraph it introduces.
+
+    Args:
+        text: Enhanced script.
+        max_chars: Target section size.
+
+    Returns:
+        Sections in script order; the whole text if it is short enough.
+    """
+    if len(text) <= max_chars:
+        return [text]
+
+    sections: List[List[str]] = [[]]
+    size = 0
+    for block in _blocks(text):
+        if sections[-1] and size + len(block) > max_chars:
+            last = sections[-1][-1]
+            carried = (
+                [sections[-1].pop()]
+                if _HEADING.match(last) and "\n" not in last
+                else []
+            )
+            if not sections[-1]:
+                sections.pop()
+            sections.append(carried)
+            size = sum(len(b) + 2 for b in carried)
+        sections[-1].append(block)
+        size += len(block) + 2
+    return ["\n\n".join(blocks) for blocks in sections if blocks]
+
+
+def _slide_list(result: Any) -> List[Any]:
+    """Return the slides of a ``generate-slides`` result."""
+    if isinstance(result, dict) and isinstance(result.get("slides"), list):
+        return result["slides"]
+    if isinstance(result, list):
+        return result
+    return [result]
+
+
+def merge_slides(results: List[Any]) -> Any:
+    """Concatenate the slide lists of consecutive sections and renumber them.
+
+    Slides that carry their position under one of ``INDEX_KEYS`` are
+    renumbered consecutively, starting from the first slide's own index.
+
+    Args:
+        results: ``generate-slides`` results of the sections, in order.
+
+    Returns:
+        A result shaped like the first section's: either a list of slides or
+        a dict whose ``slides`` list holds every section's slides.
+    """
+    merged = [slide for result in results for slide in _slide_list(result)]
+
+    first = merged[0] if merged else None
+    key = next((k for k in INDEX_KEYS if isinstance(first, dict) and k in first), None)
+    if key:
+        base = first[key] if isinstance(first[key], int) else 1
+        merged = [
+            {**slide, key: base + position} if isinstance(slide, dict) else slide
+            for position, slide in enumerate(merged)
+        ]
+
+    if isinstance(results[0], dict) and "slides" in results[0]:
+        return {**results[0], "slides": merged}
+    return merged
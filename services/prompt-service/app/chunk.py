@@ -0,0 +1,185 @@
+"""Render Chunk Planner (Argo ``chunk-step``).
+
+Splits a script into render chunks of roughly equal predicted duration so
+the render workflow can run one GPU step per chunk in parallel and join the
+clips afterwards. Chunks are contiguous runs of sentences, because the
+clips are concatenated in order; among those, the planner picks the split
+with the shortest longest chunk, which bounds the end-to-end render time.
+
+Sentence durations come from the prompt service's timed ``segments`` when
+the input carries them, otherwise from ``estimate_speaking_time``.
+
+Usage (as in ``pipelines/argo/render-workflow.yaml``):
+    INPUT_JSON='{"jobId": "abc", "avatar": "john_doe", "text": "..."}' python app/chunk.py
+
+The fan-out list is printed and written to ``CHUNK_OUTPUT_DIR/parts.json``,
+with the job ID and chunk count next to it, for Argo output parameters.
+
+Author: Ruslan Magana (https://ruslanmv.com)
+License: Apache 2.0
+"""
+
+import json
+import logging
+import math
+import os
+import sys
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+from utils import estimate_speaking_time, split_sentences
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+# Configuration constants
+RENDER_CHUNKS = int(os.getenv("RENDER_CHUNKS", "4"))
+# Chunks shorter than this are not worth a GPU step of their own
+CHUNK_MIN_SECONDS = float(os.getenv("CHUNK_MIN_SECONDS", "15"))
+CHUNK_OUTPUT_DIR = Path(os.getenv("CHUNK_OUTPUT_DIR", "/tmp/chunks"))
+
+# Input fields that are replaced by each part's own script
+SCRIPT_FIELDS = ("text", "script", "segments", "slides")
+
+
+def _greedy(durations: Sequence[float], limit: float) -> List[int]:
+    """Return the chunk start indexes when filling chunks up to ``limit``."""
+    starts = [0]
+    total = 0.0
+    for index, seconds in enumerate(durations):
+        if total + seconds > limit and index > starts[-1]:
+            starts.append(index)
+            total = 0.0
+        total += seconds
+    return starts
+
+
+def partition(durations: Sequence[float], parts: int) -> List[range]:
+    """Split a sequence into at most ``parts`` contiguous, balanced ranges.
+
+    Binary-searches the smallest chunk duration limit for which greedy
+    filling needs at most ``parts`` chunks (the linear partition problem).
+
+    Args:
+        durations: Predicted duration of each sentence, in order.
+        parts: Maximum number of chunks.
+
+    Returns:
+        Index ranges in order; fewer than ``parts`` if there are fewer
+        sentences or the balance does not improve with more chunks.
+
+    Example:
+        >>> partition([4, 1, 1, 2, 2], 2)
+        [range(0, 2), range(2, 5)]
+    """
+    if not durations:
+        return []
+
+    low, high = max(durations), sum(durations)
+    while high - low > 0.01:
+        middle = (low + high) / 2
+        if len(_greedy(durations, middle)) <= parts:
+            high = middle
+        else:
+            low = middle
+
+    starts = _greedy(durations, high)
+    return [
+        range(start, stop) for start, stop in zip(starts, starts[1:] + [len(durations)])
+    ]
+
+
+def sentence_timings(job: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Return the timed sentences of a job.
+
+    Args:
+        job: Workflow input with ``segments`` (text and seconds, as returned
+            by ``POST /prompt``) or a ``script``/``text`` string.
+
+    Returns:
+        List of ``{"text", "seconds"}`` dicts in script order.
+    """
+    if job.get("segments"):
+        return [
+            {"text": s["text"], "seconds": float(s["seconds"])} for s in job["segments"]
+        ]
+
+    text = job.get("script") or job.get("text") or ""
+    return [
+        {"text": s, "seconds": estimate_speaking_time(s)} for s in split_sentences(text)
+    ]
+
+
+def plan_parts(
+    job: Dict[str, Any], chunks: int = RENDER_CHUNKS
+) -> List[Dict[str, Any]]:
+    """Plan the render parts of a job.
+
+    Args:
+        job: Workflow input (see ``sentence_timings``); its other fields,
+            such as ``avatar`` and ``voice``, are copied into every part.
+        chunks: Maximum number of parallel render steps.
+
+    Returns:
+        One renderer payload per part, with the parent ``jobId``, the part
+        index as ``chunk``, the number of parts as ``chunks``, the part's
+        ``script`` and its predicted ``seconds``.
+    """
+    sentences = sentence_timings(job)
+    total = sum(s["seconds"] for s in sentences)
+    parts = max(1, min(chunks, math.floor(total / CHUNK_MIN_SECONDS)))
+    ranges = partition([s["seconds"] for s in sentences], parts) or [range(0)]
+
+    job_id = job.get("jobId") or str(uuid.uuid4())
+    base = {key: value for key, value in job.items() if key not in SCRIPT_FIELDS}
+    return [
+        {
+            **base,
+            "jobId": job_id,
+            "chunk": index,
+            "chunks": len(ranges),
+            "script": " ".join(sentences[i]["text"] for i in indexes),
+            "seconds": round(sum(sentences[i]["seconds"] for i in indexes), 2),
+        }
+        for index, indexes in enumerate(ranges)
+    ]
+
+
+def main() -> None:
+    """Plan the render parts of ``INPUT_JSON`` and write the Argo outputs.
+
+    Raises:
+        SystemExit: If the input is missing or not valid JSON.
+    """
+    raw = os.environ.get("INPUT_JSON")
+    if not raw:
+        logger.error("FATAL: Required 'INPUT_JSON' env var not set")
+        raise SystemExit(1)
+
+    try:
+        job = json.loads(raw)
+    except json.JSONDecodeError as e:
+        logger.error(f"FATAL: Invalid JSON in INPUT_JSON: {e}")
+        raise SystemExit(1)
+
+    parts = plan_parts(job)
+    seconds = [part["seconds"] for part in parts]
+    balance = max(seconds) * len(seconds) / sum(seconds) if sum(seconds) else 1.0
+    logger.info(
+        f"Job {parts[0]['jobId']}: {len(parts)} parts of {seconds}s (longest/mean {balance:.2f})"
+    )
+
+    CHUNK_OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    (CHUNK_OUTPUT_DIR / "parts.json").write_text(json.dumps(parts))
+    (CHUNK_OUTPUT_DIR / "job-id").write_text(parts[0]["jobId"])
+    (CHUNK_OUTPUT_DIR / "count").write_text(str(len(parts)))
+    json.dump(parts, sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
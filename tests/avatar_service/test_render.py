@@ -0,0 +1,104 @@
+"""Unit tests for the avatar service audio cache.
+
+Author: Ruslan Magana (https://ruslanmv.com)
+License: Apache 2.0
+"""
+
+import os
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Add service to path
+sys.path.insert(
+    0, str(Path(__file__).parent.parent.parent / "services" / "avatar-service")
+)
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("requests")
+
+from app import render
+
+
+@pytest.fixture
+def audio(tmp_path, monkeypatch):
+    """Cache into a temporary directory with ffmpeg and Wav2Lip's audio module stubbed."""
+    calls = []
+
+    def ffmpeg(cmd, **kwargs):
+        calls.append("ffmpeg")
+        Path(cmd[-1]).write_bytes(b"RIFF")
+
+    def melspectrogram(samples):
+        calls.append("mel")
+        return np.ones((80, len(samples)), dtype=np.float64)
+
+    module = SimpleNamespace(
+        load_wav=lambda path, sr: np.arange(32, dtype=np.float64),
+        melspectrogram=melspectrogram,
+    )
+    monkeypatch.setattr(render, "AUDIO_CACHE_DIR", tmp_path / "cache")
+    monkeypatch.setattr(render.subprocess, "run", ffmpeg)
+    monkeypatch.setattr(render, "_wav2lip_audio", lambda: module)
+    return calls
+
+
+def voice(tmp_path, content):
+    """Write a source voice file."""
+    path = tmp_path / f"voice-{len(content)}.mp3"
+    path.write_bytes(content)
+    return str(path)
+
+
+class TestPreprocessAudio:
+    """Test suite for the content-addressed audio cache."""
+
+    def test_same_audio_is_preprocessed_once(self, tmp_path, audio):
+        """Test a second render of the same voice reuses the cached features."""
+        first = render.preprocess_audio(voice(tmp_path, b"hello"))
+        second = render.preprocess_audio(voice(tmp_path, b"hello"))
+
+        assert first == second
+        assert audio == ["ffmpeg", "mel"]
+        assert np.load(first.mel_path).dtype == np.float32
+        assert np.load(first.samples_path).tolist() == list(range(32))
+
+    def test_different_audio_misses(self, tmp_path, audio):
+        """Test the cache is keyed by content."""
+        first = render.preprocess_audio(voice(tmp_path, b"hello"))
+        second = render.preprocess_audio(voice(tmp_path, b"goodbye"))
+
+        assert first.key != second.key
+        assert audio == ["ffmpeg", "mel", "ffmpeg", "mel"]
+
+    def test_no_temporary_files_are_left(self, tmp_path, audio):
+        """Test features are renamed into place."""
+        render.preprocess_audio(voice(tmp_path, b"hello"))
+
+        assert not [p for p in (tmp_path / "cache").iterdir() if p.suffix == ".tmp"]
+
+
+class TestPruneAudioCache:
+    """Test suite for audio cache eviction."""
+
+    def test_least_recently_used_entry_is_evicted(self, tmp_path, audio, monkeypatch):
+        """Test eviction removes whole entries, oldest first, and skips files being written."""
+        old = render.preprocess_audio(voice(tmp_path, b"old"))
+        past = time.time() - 60
+        for path in old[1:]:
+            os.utime(path, (past, past))
+        new = render.preprocess_audio(voice(tmp_path, b"new"))
+        writing = tmp_path / "cache" / f"{old.key}.wav.1.2.tmp"
+        writing.write_bytes(b"x" * 10_000)
+
+        monkeypatch.setattr(
+            render, "AUDIO_CACHE_MAX_BYTES", sum(p.stat().st_size for p in new[1:])
+        )
+        render._prune_audio_cache()
+
+        assert not any(path.exists() for path in old[1:])
+        assert all(path.exists() for path in new[1:])
+        assert writing.exists()
@@ -0,0 +1,184 @@
+"""Unit tests for the avatar service render scheduler.
+
+Author: Ruslan Magana (https://ruslanmv.com)
+License: Apache 2.0
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add service to path
+sys.path.insert(
+    0, str(Path(__file__).parent.parent.parent / "services" / "avatar-service" / "app")
+)
+
+from scheduler import PRIORITY_FULL, PRIORITY_PREVIEW, RenderScheduler
+
+
+def run_all(scheduler, expected):
+    """Start the scheduler and wait until ``expected`` jobs have run."""
+    scheduler.start()
+    deadline = time.time() + 2
+    while len(scheduler.ran) < expected and time.time() < deadline:
+        time.sleep(0.01)
+    scheduler.stop(timeout=1)
+
+
+class RecordingScheduler(RenderScheduler):
+    """Scheduler recording the order in which jobs run."""
+
+    def __init__(self, workers=1, **kwargs):
+        self.ran = []
+        self.batches = []
+        super().__init__(self._record, workers=workers, **kwargs)
+
+    def _record(self, jobs):
+        self.batches.append([job.out_path for job in jobs])
+        self.ran.extend(job.out_path for job in jobs)
+
+
+class TestRenderScheduler:
+    """Test suite for RenderScheduler."""
+
+    def test_previews_run_before_full_renders(self):
+        """Test previews are scheduled ahead of earlier full renders."""
+        scheduler = RecordingScheduler()
+        scheduler.submit("a", "alice", "u", "full-a", priority=PRIORITY_FULL)
+        scheduler.submit("b", "alice", "u", "full-b", priority=PRIORITY_FULL)
+        scheduler.submit("b", "alice", "u", "preview-b", priority=PRIORITY_PREVIEW)
+
+        run_all(scheduler, 3)
+
+        assert scheduler.ran == ["preview-b", "full-a", "full-b"]
+
+    def test_failing_job_does_not_stop_worker(self):
+        """Test a runner exception is logged and the next job still runs."""
+        ran = []
+
+        def runner(jobs):
+            if jobs[0].job_id == "bad":
+                raise RuntimeError("boom")
+            ran.extend(job.job_id for job in jobs)
+
+        scheduler = RenderScheduler(runner)
+        scheduler.submit("bad", "alice", "u", "out-bad")
+        scheduler.submit("good", "alice", "u", "out-good")
+        scheduler.ran = ran
+
+        run_all(scheduler, 1)
+
+        assert ran == ["good"]
+
+    def test_jobs_for_same_avatar_are_batched(self):
+        """Test queued jobs sharing an avatar are coalesced up to the size limit."""
+        scheduler = RecordingScheduler(batch_max_size=2)
+        scheduler.submit("a", "alice", "u", "alice-1")
+        scheduler.submit("b", "bob", "u", "bob-1")
+        scheduler.submit("c", "alice", "u", "alice-2")
+        scheduler.submit("d", "alice", "u", "alice-3")
+
+        run_all(scheduler, 4)
+
+        assert scheduler.batches == [["alice-1", "alice-2"], ["bob-1"], ["alice-3"]]
+
+    def test_previews_are_not_batched_with_full_renders(self):
+        """Test batches never mix priority classes."""
+        scheduler = RecordingScheduler(batch_max_size=4)
+        scheduler.submit("a", "alice", "u", "full-a")
+        scheduler.submit("a", "alice", "u", "preview-a", priority=PRIORITY_PREVIEW)
+
+        run_all(scheduler, 2)
+
+        assert scheduler.batches == [["preview-a"], ["full-a"]]
+
+    def test_small_tenant_is_not_starved_by_bulk_tenant(self):
+        """Test deficit round-robin interleaves tenants regardless of submit order."""
+        scheduler = RecordingScheduler()
+        for index in range(5):
+            scheduler.submit(
+                f"b{index}", "alice", "u", f"bulk-{index}", tenant_id="bulk"
+            )
+        scheduler.submit("s0", "bob", "u", "small-0", tenant_id="small")
+
+        run_all(scheduler, 6)
+
+        assert scheduler.ran.index("small-0") == 1
+
+    def test_tenant_weights_scale_their_share(self):
+        """Test a tenant with weight 3 starts three jobs per turn of a weight-1 tenant."""
+        scheduler = RecordingScheduler(tenant_weights={"heavy": 3})
+        for index in range(6):
+            scheduler.submit(
+                f"h{index}", "alice", "u", f"heavy-{index}", tenant_id="heavy"
+            )
+            scheduler.submit(
+                f"l{index}", "bob", "u", f"light-{index}", tenant_id="light"
+            )
+
+        run_all(scheduler, 12)
+
+        assert scheduler.ran[:8] == [
+            "heavy-0",
+            "heavy-1",
+            "heavy-2",
+            "light-0",
+            "heavy-3",
+            "heavy-4",
+            "heavy-5",
+            "light-1",
+        ]
+
+    def test_tenant_at_its_cap_is_skipped(self):
+        """Test a tenant at TENANT_MAX_RUNNING waits while others use the free worker."""
+        release = threading.Event()
+        started = []
+
+        def runner(jobs):
+            started.extend(job.out_path for job in jobs)
+            if jobs[0].tenant_id == "bulk":
+                release.wait(2)
+
+        scheduler = RenderScheduler(runner, workers=2, tenant_max_running=1)
+        for index in range(3):
+            scheduler.submit(
+                f"b{index}", "alice", "u", f"bulk-{index}", tenant_id="bulk"
+            )
+        scheduler.submit("s0", "bob", "u", "small-0", tenant_id="small")
+
+        scheduler.start()
+        deadline = time.time() + 2
+        while len(started) < 2 and time.time() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.05)
+
+        # bulk-1 must not start while bulk-0 holds the tenant's only slot
+        assert sorted(started) == ["bulk-0", "small-0"]
+
+        release.set()
+        deadline = time.time() + 2
+        while len(started) < 4 and time.time() < deadline:
+            time.sleep(0.01)
+        scheduler.stop(timeout=1)
+
+        assert started[2:] == ["bulk-1", "bulk-2"]
+
+    def test_metrics_report_per_tenant_depth_and_waits(self):
+        """Test metrics expose queue depth before and wait samples after running."""
+        scheduler = RecordingScheduler()
+        scheduler.submit("a", "alice", "u", "a-1", tenant_id="acme")
+        scheduler.submit(
+            "b", "alice", "u", "b-1", tenant_id="beta", priority=PRIORITY_PREVIEW
+        )
+
+        before = scheduler.metrics()
+        assert before["queued"] == 2
+        assert before["tenants"]["acme"]["queued"] == {"preview": 0, "full": 1}
+        assert before["tenants"]["beta"]["queued"] == {"preview": 1, "full": 0}
+
+        run_all(scheduler, 2)
+
+        after = scheduler.metrics()
+        assert after["queued"] == 0
+        assert after["tenants"]["acme"]["waitSeconds"]["count"] == 1
@@ -0,0 +1,140 @@
+"""Unit tests for the avatar service shared model weights.
+
+Author: Ruslan Magana (https://ruslanmv.com)
+License: Apache 2.0
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Add service to path
+sys.path.insert(
+    0, str(Path(__file__).parent.parent.parent / "services" / "avatar-service" / "app")
+)
+
+import weights
+
+
+@pytest.fixture
+def torch(tmp_path, monkeypatch):
+    """Convert checkpoints with an in-memory torch.load/torch.save."""
+    calls = []
+
+    def save(obj, path):
+        calls.append(("save", Path(path).name))
+        Path(path).write_text(f"zip:{obj}")
+
+    fake = SimpleNamespace(
+        load=lambda path, map_location: Path(path).read_text(), save=save
+    )
+    monkeypatch.setitem(sys.modules, "torch", fake)
+    monkeypatch.setattr(weights, "WEIGHTS_CACHE_DIR", tmp_path / "cache")
+    return calls
+
+
+def write_proc(root, pid, smaps, rollup=True, cmd=b"python\0-m\0uvicorn"):
+    """Write a fake /proc/<pid> entry."""
+    proc = root / str(pid)
+    proc.mkdir(parents=True)
+    (proc / ("smaps_rollup" if rollup else "smaps")).write_text(smaps)
+    (proc / "cmdline").write_bytes(cmd)
+
+
+class TestMmapCheckpoint:
+    """Test suite for the memory-mappable checkpoint copies."""
+
+    def test_checkpoint_is_converted_once(self, tmp_path, torch):
+        """Test the converted copy is written atomically and then reused."""
+        source = tmp_path / "wav2lip_gan.pth"
+        source.write_text("legacy")
+
+        first = weights.mmap_checkpoint(str(source))
+        second = weights.mmap_checkpoint(str(source))
+
+        assert first == second
+        assert first.read_text() == "zip:legacy"
+        assert first.name.startswith("wav2lip_gan-6-")
+        assert torch == [
+            ("save", f"wav2lip_gan-6-{int(source.stat().st_mtime)}.{os.getpid()}.tmp")
+        ]
+        assert [p.name for p in first.parent.iterdir()] == [first.name]
+
+    def test_changed_checkpoint_is_converted_again(self, tmp_path, torch):
+        """Test the copy is keyed by source size and modification time."""
+        source = tmp_path / "s3fd.pth"
+        source.write_text("v1")
+        first = weights.mmap_checkpoint(str(source))
+
+        source.write_text("v2-longer")
+        second = weights.mmap_checkpoint(str(source))
+
+        assert first != second
+        assert second.read_text() == "zip:v2-longer"
+
+    def test_missing_checkpoint_raises(self, tmp_path, torch):
+        """Test a missing source checkpoint is reported."""
+        with pytest.raises(FileNotFoundError):
+            weights.mmap_checkpoint(str(tmp_path / "missing.pth"))
+
+
+class TestMemoryReport:
+    """Test suite for the per-process memory report."""
+
+    def test_smaps_fields_are_summed(self, tmp_path, monkeypatch):
+        """Test shared and private pages are summed in bytes, from either smaps file."""
+        monkeypatch.setattr(weights, "PROC_DIR", tmp_path)
+        write_proc(
+            tmp_path,
+            10,
+            "Rss: 300 kB\nPss: 150 kB\nShared_Clean: 180 kB\nShared_Dirty: 20 kB\n"
+            "Private_Clean: 40 kB\nPrivate_Dirty: 60 kB\nSwap: 0 kB\n",
+        )
+        write_proc(
+            tmp_path,
+            11,
+            "Rss: 100 kB\nPss: 100 kB\nPrivate_Dirty: 100 kB\n",
+            rollup=False,
+        )
+
+        report = weights.memory_report([10, 11, 12])
+
+        assert [p["pid"] for p in report["processes"]] == [10, 11]
+        assert report["processes"][0]["cmd"] == "python -m uvicorn"
+        assert report["processes"][0]["sharedBytes"] == 200 * 1024
+        assert report["processes"][0]["uniqueBytes"] == 100 * 1024
+        assert report["totals"] == {
+            "rssBytes": 400 * 1024,
+            "pssBytes": 250 * 1024,
+            "uniqueBytes": 200 * 1024,
+            "sharedBytes": 200 * 1024,
+        }
+
+    @pytest.mark.skipif(not Path("/proc/self/smaps").exists(), reason="requires procfs")
+    def test_current_process_is_measured(self):
+        """Test the current process reports resident memory."""
+        counters = weights._read_smaps(os.getpid())
+
+        assert counters["rssBytes"] > 0
+        assert 0 < counters["pssBytes"] <= counters["rssBytes"]
+
+
+@pytest.mark.skipif(not Path("/proc/self/stat").exists(), reason="requires procfs")
+class TestWorkerPids:
+    """Test suite for worker process discovery."""
+
+    def test_render_subprocesses_follow_their_worker(self):
+        """Test the current process and its children are reported."""
+        child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(5)"])
+        try:
+            pids = weights.worker_pids()
+        finally:
+            child.kill()
+            child.wait()
+
+        assert os.getpid() in pids
+        assert pids.index(child.pid) > pids.index(os.getpid())
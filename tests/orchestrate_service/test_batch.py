@@ -0,0 +1,104 @@
+"""Unit tests for orchestrate job runner batch processing.
+
+Author: Ruslan Magana (https://ruslanmv.com)
+License: Apache 2.0
+"""
+
+import asyncio
+import io
+import sys
+from pathlib import Path
+
+# Add service to path
+sys.path.insert(
+    0, str(Path(__file__).parent.parent.parent / "services" / "orchestrate-service")
+)
+
+import batch
+
+
+class TestRunBatch:
+    """Test cases for run_batch."""
+
+    def test_failed_payloads_do_not_stop_the_batch(self):
+        """Test bad JSON and handler errors are counted and skipped."""
+        stream = io.StringIO('{"text": "a"}\nnot json\n\n{"text": ""}\n{"text": "b"}\n')
+        handled = []
+
+        async def handle(payload):
+            if not payload["text"]:
+                raise KeyError("text")
+            handled.append(payload["text"])
+            return f"job-{payload['text']}"
+
+        stats = asyncio.run(batch.run_batch(batch.jsonl_source(stream), handle))
+        summary = stats.summary()
+
+        assert sorted(handled) == ["a", "b"]
+        assert summary["queued"] == 2
+        assert summary["failed"] == 2
+
+    def test_payloads_overlap_up_to_the_limit(self):
+        """Test payloads run concurrently, each with its steps in order."""
+        active, peak, steps = [0], [0], []
+
+        async def handle(payload):
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+            steps.append((payload["n"], "rewrite"))
+            await asyncio.sleep(0.01)
+            steps.append((payload["n"], "slides"))
+            active[0] -= 1
+            return "job"
+
+        source = [(f"p{n}", f'{{"n": {n}}}') for n in range(10)]
+        asyncio.run(batch.run_batch(source, handle, concurrency=3))
+
+        assert peak[0] == 3
+        for n in range(10):
+            assert steps.index((n, "rewrite")) < steps.index((n, "slides"))
+
+    def test_checkpoint_waits_for_payloads_in_flight(self):
+        """Test offsets are committed only after every earlier payload finished."""
+        done, checkpoints = [], []
+
+        async def handle(payload):
+            await asyncio.sleep(0.01 * (5 - payload["n"]))
+            done.append(payload["n"])
+            return "job"
+
+        source = [(f"p{n}", f'{{"n": {n}}}') for n in range(5)]
+        asyncio.run(
+            batch.run_batch(
+                source,
+                handle,
+                lambda: checkpoints.append(len(done)),
+                commit_every=2,
+                concurrency=4,
+            )
+        )
+
+        assert checkpoints == [2, 4, 5]
+
+    def test_no_checkpoint_after_a_failed_payload(self):
+        """Test offsets are never committed past a payload that failed."""
+        checkpoints = []
+
+        async def handle(payload):
+            if payload["n"] == 2:
+                raise RuntimeError("Circuit open")
+            return "job"
+
+        source = [(f"p{n}", f'{{"n": {n}}}') for n in range(5)]
+        stats = asyncio.run(
+            batch.run_batch(
+                source,
+                handle,
+                lambda: checkpoints.append("commit"),
+                commit_every=2,
+                concurrency=1,
+            )
+        )
+
+        assert checkpoints == ["commit"]
+        assert stats.failed == 1
@@ -0,0 +1,84 @@
+"""Unit tests for avatar-affine job partitioning.
+
+Author: Ruslan Magana (https://ruslanmv.com)
+License: Apache 2.0
+"""
+
+import sys
+from pathlib import Path
+
+# Add service to path
+sys.path.insert(
+    0, str(Path(__file__).parent.parent.parent / "services" / "orchestrate-service")
+)
+
+import partitioning
+from partitioning import HotKeyTracker, message_key, partition
+
+
+class TestPartitioning:
+    """Test cases for message keys and the rendezvous partitioner."""
+
+    def test_avatar_jobs_share_a_partition(self):
+        """Test every job of a normal avatar gets the same key and partition."""
+        tracker = HotKeyTracker(static={})
+        keys = {message_key("john_doe", f"job-{i}", tracker) for i in range(20)}
+
+        assert keys == {b"john_doe"}
+        assert partition(b"john_doe", range(12), [0]) == partition(
+            b"john_doe", range(12), range(12)
+        )
+
+    def test_frontend_avatar_id_is_the_key(self):
+        """Test payloads from the frontend, which send avatarId, are keyed too."""
+        tracker = HotKeyTracker(static={})
+        frontend = {"avatarId": "john_doe", "voiceId": "v1", "text": "Hi"}
+
+        assert partitioning.job_avatar(frontend) == "john_doe"
+        assert partitioning.job_avatar({"avatar": "jane_doe"}) == "jane_doe"
+        assert partitioning.job_avatar({"text": "Hi"}) is None
+        assert (
+            message_key(partitioning.job_avatar(frontend), "job-1", tracker)
+            == b"john_doe"
+        )
+
+    def test_adding_a_partition_moves_few_keys(self):
+        """Test rendezvous hashing only moves keys to the new partition."""
+        keys = [f"avatar_{i}".encode() for i in range(1000)]
+        before = {key: partition(key, range(12), range(12)) for key in keys}
+        after = {key: partition(key, range(13), range(13)) for key in keys}
+        moved = [key for key in keys if before[key] != after[key]]
+
+        assert all(after[key] == 12 for key in moved)
+        assert len(moved) < 2 * len(keys) / 13
+
+    def test_hot_avatar_is_split(self, monkeypatch):
+        """Test an avatar dominating the window spreads over its sub-keys."""
+        monkeypatch.setattr(partitioning, "HOT_AVATAR_SPLIT", 4)
+        tracker = HotKeyTracker(window=100, share=0.3, static={})
+        for i in range(100):
+            message_key("popular" if i % 2 else f"rare_{i}", f"warm-{i}", tracker)
+
+        keys = {message_key("popular", f"job-{i}", tracker) for i in range(200)}
+
+        assert keys == {f"popular#{n}".encode() for n in range(4)}
+
+    def test_static_hot_avatars(self):
+        """Test HOT_AVATARS entries are split from the first job."""
+        static = partitioning.parse_hot_avatars("john_doe:8, jane_doe")
+        tracker = HotKeyTracker(static=static)
+
+        assert static == {"john_doe": 8, "jane_doe": partitioning.HOT_AVATAR_SPLIT}
+        assert (
+            len({message_key("john_doe", f"job-{i}", tracker) for i in range(200)}) == 8
+        )
+
+    def test_unkeyed_messages_use_available_partitions(self):
+        """Test jobs without an avatar go to a reachable partition."""
+        assert message_key(None, "job-1") is None
+        assert {partition(None, range(12), [3, 5]) for _ in range(50)} <= {3, 5}
+
+    def test_skew_counts_empty_partitions(self):
+        """Test skew is the busiest partition relative to the mean."""
+        assert partitioning.skew({0: 10, 1: 10}) == 1.0
+        assert partitioning.skew({0: 10, 1: 10}, [0, 1, 2, 3]) == 2.0
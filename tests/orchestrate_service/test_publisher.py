@@ -0,0 +1,80 @@
+"""Unit tests for orchestrate Kafka producer settings.
+
+Author: Ruslan Magana (https://ruslanmv.com)
+License: Apache 2.0
+"""
+
+import sys
+from collections import namedtuple
+from pathlib import Path
+
+# Add service to path
+sys.path.insert(
+    0, str(Path(__file__).parent.parent.parent / "services" / "orchestrate-service")
+)
+
+import publisher
+
+RecordMetadata = namedtuple("RecordMetadata", "topic partition offset")
+
+
+class FakeFuture:
+    """Stand-in for kafka-python's FutureRecordMetadata."""
+
+    def __init__(self):
+        self.callbacks, self.errbacks = [], []
+
+    def add_callback(self, fn, *args):
+        self.callbacks.append((fn, args))
+
+    def add_errback(self, fn, *args):
+        self.errbacks.append((fn, args))
+
+    def succeed(self, partition=0):
+        for fn, args in self.callbacks:
+            fn(*args, RecordMetadata("videoJob", partition, 0))
+
+    def fail(self, error):
+        for fn, args in self.errbacks:
+            fn(*args, error)
+
+
+class TestPublisher:
+    """Test cases for producer settings and delivery tracking."""
+
+    def test_default_mode_sends_one_request_at_a_time(self):
+        """Test the single-payload producer keeps its synchronous settings."""
+        assert publisher.producer_config() == {
+            "acks": "all",
+            "retries": 3,
+            "max_in_flight_requests_per_connection": 1,
+        }
+
+    def test_pipelining_requires_idempotence(self, monkeypatch):
+        """Test more requests are put in flight only by an idempotent producer."""
+        monkeypatch.setattr(publisher, "supports_idempotence", lambda: False)
+        plain = publisher.producer_config(high_throughput=True)
+        monkeypatch.setattr(publisher, "supports_idempotence", lambda: True)
+        idempotent = publisher.producer_config(high_throughput=True)
+
+        assert plain["max_in_flight_requests_per_connection"] == 1
+        assert plain["compression_type"] == publisher.KAFKA_COMPRESSION
+        assert idempotent["enable_idempotence"] is True
+        assert (
+            idempotent["max_in_flight_requests_per_connection"]
+            == publisher.KAFKA_MAX_IN_FLIGHT
+        )
+
+    def test_tracker_collects_failures(self):
+        """Test delivery callbacks count successes and record failures."""
+        tracker = publisher.DeliveryTracker()
+        ok, bad = FakeFuture(), FakeFuture()
+        tracker.track(ok, "job-1")
+        tracker.track(bad, "job-2")
+
+        ok.succeed()
+        bad.fail(RuntimeError("timed out"))
+
+        assert tracker.delivered == 1
+        assert tracker.partitions == {0: 1}
+        assert tracker.failures == [("job-2", "timed out")]
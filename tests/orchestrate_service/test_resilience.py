@@ -0,0 +1,151 @@
+"""Unit tests for hedged, retried and circuit-broken skill calls.
+
+Author: Ruslan Magana (https://ruslanmv.com)
+License: Apache 2.0
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# Add service to path
+sys.path.insert(
+    0, str(Path(__file__).parent.parent.parent / "services" / "orchestrate-service")
+)
+
+import resilience
+from resilience import CircuitBreaker, CircuitOpenError, SkillPolicy
+
+
+class Transient(Exception):
+    """A retryable failure."""
+
+
+def retryable(error):
+    return isinstance(error, Transient)
+
+
+@pytest.fixture(autouse=True)
+def fresh_breaker(monkeypatch):
+    """Give each test a closed breaker and no retry delay."""
+    monkeypatch.setattr(
+        resilience, "breaker", CircuitBreaker(failures=3, reset_seconds=0.05)
+    )
+    monkeypatch.setattr(resilience, "backoff", lambda attempt: 0)
+
+
+def warmed_policy(latency):
+    """Return a policy that has seen enough latencies to adapt and hedge."""
+    policy = SkillPolicy("rewrite-script", max_timeout=30)
+    for _ in range(resilience.ORCH_MIN_SAMPLES):
+        policy.record(latency)
+    return policy
+
+
+class TestResilience:
+    """Test cases for resilience."""
+
+    def test_timeout_adapts_to_observed_latency(self):
+        """Test the timeout follows p99 between the floor and ORCH_TIMEOUT."""
+        assert SkillPolicy("s", max_timeout=30).timeout() == 30
+        assert warmed_policy(0.1).timeout() == resilience.ORCH_MIN_TIMEOUT
+        assert warmed_policy(4.0).timeout() == 4.0 * resilience.ORCH_TIMEOUT_FACTOR
+
+    def test_transient_errors_are_retried(self):
+        """Test a transient failure is retried and the success recorded."""
+        calls = []
+
+        def fn(timeout):
+            calls.append(timeout)
+            if len(calls) < 2:
+                raise Transient()
+            return "ok"
+
+        policy = SkillPolicy("s", max_timeout=30)
+
+        assert resilience.call(fn, policy, retryable) == "ok"
+        assert policy.retries == 1
+        assert len(policy.latencies) == 1
+
+    def test_non_retryable_errors_are_raised_at_once(self):
+        """Test a client error is not retried."""
+        calls = []
+
+        def fn(timeout):
+            calls.append(1)
+            raise ValueError("bad request")
+
+        with pytest.raises(ValueError):
+            resilience.call(fn, SkillPolicy("s", 30), retryable)
+        assert len(calls) == 1
+
+    def test_breaker_fails_fast_then_probes(self):
+        """Test the breaker opens after repeated failures and closes on a good trial."""
+
+        def down(timeout):
+            raise Transient()
+
+        policy = SkillPolicy("s", 30)
+        with pytest.raises(Transient):
+            resilience.call(down, policy, retryable)
+        assert resilience.breaker.state == "open"
+        with pytest.raises(CircuitOpenError):
+            resilience.call(lambda t: "ok", policy, retryable)
+
+        time.sleep(0.06)
+
+        assert resilience.call(lambda t: "ok", policy, retryable) == "ok"
+        assert resilience.breaker.state == "closed"
+
+    def test_non_retryable_trial_does_not_block_the_breaker(self):
+        """Test a trial call failing with a client error lets the next call probe."""
+        policy = SkillPolicy("s", 30)
+        for _ in range(3):
+            resilience.breaker.failure()
+        time.sleep(0.06)
+
+        def bad_request(timeout):
+            raise ValueError("bad request")
+
+        with pytest.raises(ValueError):
+            resilience.call(bad_request, policy, retryable)
+
+        assert resilience.breaker.state == "half-open"
+        assert resilience.call(lambda t: "ok", policy, retryable) == "ok"
+        assert resilience.breaker.state == "closed"
+
+    def test_slow_request_is_hedged(self):
+        """Test a request slower than p95 is raced by a second one."""
+        policy = warmed_policy(0.01)
+        calls = []
+
+        def fn(timeout):
+            calls.append(1)
+            if len(calls) == 1:
+                time.sleep(0.5)
+                return "slow"
+            return "fast"
+
+        assert resilience.call(fn, policy, retryable) == "fast"
+        assert policy.metrics()["hedges"] == 1
+        assert policy.hedge_wins == 1
+
+    def test_slow_coroutine_is_hedged(self):
+        """Test hedging of async requests cancels the losing request."""
+        policy = warmed_policy(0.01)
+        calls = []
+
+        async def fn(timeout):
+            calls.append(1)
+            if len(calls) == 1:
+                await asyncio.sleep(5)
+                return "slow"
+            return "fast"
+
+        start = time.perf_counter()
+        assert asyncio.run(resilience.call_async(fn, policy, retryable)) == "fast"
+        assert time.perf_counter() - start < 1
+        assert policy.hedge_wins == 1
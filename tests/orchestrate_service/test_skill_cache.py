@@ -0,0 +1,76 @@
+"""Unit tests for the persistent skill result cache.
+
+Author: Ruslan Magana (https://ruslanmv.com)
+License: Apache 2.0
+"""
+
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+# Add service to path
+sys.path.insert(
+    0, str(Path(__file__).parent.parent.parent / "services" / "orchestrate-service")
+)
+
+import skill_cache
+from skill_cache import SkillCache
+
+
+class TestSkillCache:
+    """Test cases for SkillCache."""
+
+    def test_key_ignores_param_order_but_not_skill(self):
+        """Test params are hashed canonically and the skill is part of the key."""
+        key = skill_cache.cache_key("rewrite-script", {"text": "hi", "lang": "en"})
+
+        assert key == skill_cache.cache_key(
+            "rewrite-script", {"lang": "en", "text": "hi"}
+        )
+        assert key != skill_cache.cache_key(
+            "generate-slides", {"text": "hi", "lang": "en"}
+        )
+
+    def test_results_survive_across_runs(self, tmp_path):
+        """Test a result stored by one run is a hit for the next one."""
+        path = tmp_path / "cache.sqlite3"
+        first = SkillCache(path)
+        assert first.get("rewrite-script", {"text": "hi"}) is None
+        first.put("rewrite-script", {"text": "hi"}, {"text": "Hello!"})
+        first.close()
+
+        second = SkillCache(path)
+
+        assert second.get("rewrite-script", {"text": "hi"}) == {"text": "Hello!"}
+        assert second.stats() == {"hits": 1, "misses": 0, "hitRatio": 1.0}
+
+    def test_expired_results_are_misses(self, tmp_path, monkeypatch):
+        """Test results are not served after their time to live."""
+        cache = SkillCache(tmp_path / "cache.sqlite3", ttl_hours=1)
+        cache.put("generate-slides", {"text": "hi"}, ["slide"])
+        later = time.time() + 2 * 3600
+        monkeypatch.setattr(skill_cache.time, "time", lambda: later)
+
+        assert cache.get("generate-slides", {"text": "hi"}) is None
+
+    def test_bypass_skips_lookups(self, tmp_path):
+        """Test a bypassing cache never returns a stored result."""
+        cache = SkillCache(tmp_path / "cache.sqlite3", bypass=True)
+        cache.put("rewrite-script", {"text": "hi"}, "Hello!")
+
+        assert cache.get("rewrite-script", {"text": "hi"}) is None
+
+    def test_database_errors_do_not_fail_calls(self, tmp_path):
+        """Test a locked database is a miss on lookup and a no-op on store."""
+
+        class LockedDatabase:
+            def execute(self, *args):
+                raise sqlite3.OperationalError("database is locked")
+
+        cache = SkillCache(tmp_path / "cache.sqlite3")
+        cache._db = LockedDatabase()
+
+        assert cache.get("rewrite-script", {"text": "hi"}) is None
+        cache.put("rewrite-script", {"text": "hi"}, "Hello!")
+        assert cache.stats()["misses"] == 1
@@ -0,0 +1,80 @@
+"""Unit tests for sectioned slide generation.
+
+Author: Ruslan Magana (https://ruslanmv.com)
+License: Apache 2.0
+"""
+
+import sys
+from pathlib import Path
+
+# Add service to path
+sys.path.insert(
+    0, str(Path(__file__).parent.parent.parent / "services" / "orchestrate-service")
+)
+
+from slides import merge_slides, split_sections
+
+
+class TestSplitSections:
+    """Test cases for split_sections."""
+
+    def test_short_script_is_one_section(self):
+        """Test a script under the limit is returned unchanged."""
+        text = "# Intro\n\nHello there.\nSecond line."
+
+        assert split_sections(text, max_chars=1000) == [text]
+
+    def test_sections_break_at_paragraphs(self):
+        """Test paragraphs are packed into sections without being cut."""
+        paragraphs = [c * 30 for c in "abcd"]
+        sections = split_sections("\n\n".join(paragraphs), max_chars=70)
+
+        assert sections == ["\n\n".join(paragraphs[:2]), "\n\n".join(paragraphs[2:])]
+
+    def test_heading_moves_with_its_paragraph(self):
+        """Test a section never ends with a heading."""
+        text = "a" * 40 + "\n\n# Part two\n\n" + "b" * 40
+        sections = split_sections(text, max_chars=60)
+
+        assert sections == ["a" * 40, "# Part two\n\n" + "b" * 40]
+
+    def test_oversized_paragraph_is_its_own_section(self):
+        """Test a paragraph longer than the limit is kept whole."""
+        text = "a" * 10 + "\n\n" + "b" * 100 + "\n\n" + "c" * 10
+
+        assert split_sections(text, max_chars=50) == ["a" * 10, "b" * 100, "c" * 10]
+
+
+class TestMergeSlides:
+    """Test cases for merge_slides."""
+
+    def test_lists_are_concatenated_and_renumbered(self):
+        """Test indices continue across sections from the first slide's index."""
+        merged = merge_slides(
+            [
+                [{"index": 1, "title": "A"}, {"index": 2, "title": "B"}],
+                [{"index": 1, "title": "C"}],
+            ]
+        )
+
+        assert [(s["index"], s["title"]) for s in merged] == [
+            (1, "A"),
+            (2, "B"),
+            (3, "C"),
+        ]
+
+    def test_dict_results_keep_their_shape(self):
+        """Test results with a slides field merge into the first result."""
+        merged = merge_slides(
+            [
+                {"slides": [{"slideNumber": 0}], "model": "m"},
+                {"slides": [{"slideNumber": 0}, {"slideNumber": 1}]},
+            ]
+        )
+
+        assert merged["model"] == "m"
+        assert [s["slideNumber"] for s in merged["slides"]] == [0, 1, 2]
+
+    def test_slides_without_index_are_untouched(self):
+        """Test plain slides are only concatenated."""
+        assert merge_slides([["one"], ["two", "three"]]) == ["one", "two", "three"]
@@ -0,0 +1,94 @@
+"""Unit tests for the render chunk planner.
+
+Author: Ruslan Magana (https://ruslanmv.com)
+License: Apache 2.0
+"""
+
+import json
+import sys
+from pathlib import Path
+
+# Add service to path
+sys.path.insert(
+    0, str(Path(__file__).parent.parent.parent / "services" / "prompt-service" / "app")
+)
+
+import chunk
+from chunk import partition, plan_parts
+
+
+class TestPartition:
+    """Test suite for the linear partition of sentence durations."""
+
+    def test_minimises_longest_part(self):
+        """Test the split with the shortest longest part is chosen."""
+        assert partition([4, 1, 1, 2, 2], 2) == [range(0, 2), range(2, 5)]
+
+    def test_parts_are_contiguous_and_cover_everything(self):
+        """Test every sentence is in exactly one part, in order."""
+        durations = [3, 1, 4, 1, 5, 9, 2, 6, 5, 3, 5]
+        ranges = partition(durations, 4)
+
+        assert [i for r in ranges for i in r] == list(range(len(durations)))
+        assert max(sum(durations[i] for i in r) for r in ranges) == 14
+
+    def test_never_more_parts_than_sentences(self):
+        """Test short inputs get fewer parts."""
+        assert partition([5], 4) == [range(0, 1)]
+        assert partition([], 4) == []
+
+
+class TestPlanParts:
+    """Test suite for the render part payloads."""
+
+    def test_long_script_fans_out_evenly(self):
+        """Test a long script is split into equally long parts."""
+        text = " ".join(
+            f"Sentence {i} has exactly seven words here." for i in range(80)
+        )
+        parts = plan_parts(
+            {"jobId": "job-1", "avatar": "john_doe", "text": text}, chunks=4
+        )
+
+        assert [p["chunk"] for p in parts] == [0, 1, 2, 3]
+        assert {p["chunks"] for p in parts} == {4}
+        assert {p["seconds"] for p in parts} == {56.0}
+        assert all(p["avatar"] == "john_doe" and "text" not in p for p in parts)
+        assert " ".join(p["script"] for p in parts) == text
+
+    def test_short_script_is_one_part(self):
+        """Test scripts under CHUNK_MIN_SECONDS per part are not split."""
+        parts = plan_parts(
+            {"jobId": "job-1", "text": "Hello world. Goodbye."}, chunks=4
+        )
+
+        assert len(parts) == 1
+        assert parts[0]["script"] == "Hello world. Goodbye."
+
+    def test_timed_segments_are_used(self):
+        """Test prompt-service timings take precedence over estimates."""
+        segments = [
+            {"text": "A.", "seconds": 30},
+            {"text": "B.", "seconds": 10},
+            {"text": "C.", "seconds": 20},
+        ]
+        parts = plan_parts({"jobId": "job-1", "segments": segments}, chunks=2)
+
+        assert [(p["script"], p["seconds"]) for p in parts] == [
+            ("A.", 30.0),
+            ("B. C.", 30.0),
+        ]
+
+    def test_main_writes_argo_outputs(self, tmp_path, monkeypatch, capsys):
+        """Test the fan-out list, job ID and count are written for Argo."""
+        monkeypatch.setattr(chunk, "CHUNK_OUTPUT_DIR", tmp_path)
+        monkeypatch.setenv(
+            "INPUT_JSON", json.dumps({"jobId": "job-1", "text": "Hello there."})
+        )
+
+        chunk.main()
+
+        assert json.loads((tmp_path / "parts.json").read_text())[0]["jobId"] == "job-1"
+        assert (tmp_path / "job-id").read_text() == "job-1"
+        assert (tmp_path / "count").read_text() == "1"
+        assert json.loads(capsys.readouterr().out)[0]["chunk"] == 0
@@ -0,0 +1,97 @@
+"""Unit tests for the renderer asset cache.
+
+Author: Ruslan Magana (https://ruslanmv.com)
+License: Apache 2.0
+"""
+
+import io
+import sys
+from pathlib import Path
+
+# Add renderer to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "renderer"))
+
+from asset_cache import AssetCache
+
+
+class NotModified(Exception):
+    """Stand-in for botocore's ClientError on a 304 response."""
+
+    response = {"Error": {"Code": "304"}, "ResponseMetadata": {"HTTPStatusCode": 304}}
+
+
+class FakeS3:
+    """Minimal in-memory S3 client supporting conditional GETs."""
+
+    def __init__(self):
+        self.objects = {}
+        self.requests = []
+
+    def put(self, key, body, etag):
+        self.objects[key] = (body, etag)
+
+    def get_object(self, Bucket, Key, IfNoneMatch=None):
+        self.requests.append((Key, IfNoneMatch))
+        body, etag = self.objects[Key]
+        if IfNoneMatch == etag:
+            raise NotModified()
+        return {"Body": io.BytesIO(body), "ETag": etag}
+
+
+class TestAssetCache:
+    """Test cases for AssetCache."""
+
+    def test_second_fetch_is_revalidated_hit(self, tmp_path):
+        """Test an unchanged object is served from cache via a 304."""
+        s3 = FakeS3()
+        s3.put("avatars/alice.png", b"alice-v1", '"e1"')
+        cache = AssetCache(tmp_path / "cache", max_bytes=1024)
+
+        first = cache.fetch(
+            s3, "b", "avatars/alice.png", tmp_path / "job1" / "avatar.png"
+        )
+        second = cache.fetch(
+            s3, "b", "avatars/alice.png", tmp_path / "job2" / "avatar.png"
+        )
+
+        assert (first.hit, first.bytes_fetched) == (False, 8)
+        assert (second.hit, second.bytes_fetched) == (True, 0)
+        assert s3.requests[1] == ("avatars/alice.png", '"e1"')
+        assert (tmp_path / "job2" / "avatar.png").read_bytes() == b"alice-v1"
+        assert cache.stats() == {
+            "hits": 1,
+            "misses": 1,
+            "hitRatio": 0.5,
+            "bytesFetched": 8,
+            "warmed": 0,
+        }
+
+    def test_changed_etag_refetches(self, tmp_path):
+        """Test a modified object replaces the cached copy."""
+        s3 = FakeS3()
+        s3.put("avatars/alice.png", b"alice-v1", '"e1"')
+        cache = AssetCache(tmp_path / "cache", max_bytes=1024)
+        cache.fetch(s3, "b", "avatars/alice.png", tmp_path / "job1" / "avatar.png")
+
+        s3.put("avatars/alice.png", b"alice-v2", '"e2"')
+        result = cache.fetch(
+            s3, "b", "avatars/alice.png", tmp_path / "job2" / "avatar.png"
+        )
+
+        assert result.hit is False
+        assert (tmp_path / "job2" / "avatar.png").read_bytes() == b"alice-v2"
+        assert (tmp_path / "job1" / "avatar.png").read_bytes() == b"alice-v1"
+
+    def test_least_recently_used_object_is_evicted(self, tmp_path):
+        """Test eviction keeps the cache under its size limit."""
+        s3 = FakeS3()
+        for name in ("a", "b", "c"):
+            s3.put(name, name.encode() * 10, name)
+        cache = AssetCache(tmp_path / "cache", max_bytes=25)
+
+        for name in ("a", "b", "c"):
+            cache.fetch(s3, "b", name, tmp_path / "job" / name)
+
+        cached = [p for p in (tmp_path / "cache").iterdir() if not p.suffix]
+        assert len(cached) == 2
+        assert cache.fetch(s3, "b", "a", tmp_path / "job" / "a2").hit is False
@@ -0,0 +1,76 @@
+"""Unit tests for the render pipeline capacity simulator.
+
+Author: Ruslan Magana (https://ruslanmv.com)
+License: Apache 2.0
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add renderer to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "renderer"))
+
+import capacity_sim
+from capacity_sim import Arrival, KedaConfig, Simulator, Stage
+
+FIXED = {"download": Stage(5), "render": Stage(45), "upload": Stage(5)}
+
+
+class TestCapacitySim:
+    """Test cases for the capacity simulator."""
+
+    def test_cold_start_delays_first_job(self):
+        """Test a job arriving at zero replicas waits for one pod to start."""
+        result = Simulator([Arrival(0)], KedaConfig(), FIXED, startup=90).run()
+
+        assert result.jobs == 1
+        assert result.wait_max == 90
+        assert result.latency_p95 == 145
+        # Billed until the first poll a cooldown after the last poll with lag
+        assert result.pod_hours * 3600 == 120 + 300
+
+    def test_burst_is_capped_at_max_replicas(self):
+        """Test a burst scales up in steps and never beyond maxReplicaCount."""
+        keda = KedaConfig(lag_threshold=1, max_replicas=3)
+        result = Simulator([Arrival(0)] * 30, keda, FIXED, startup=10).run()
+
+        assert result.jobs == 30
+        assert result.peak_replicas == 3
+        assert result.wait_max > result.wait_p50 > 0
+
+    def test_shorter_cooldown_costs_less(self):
+        """Test the idle tail after the last job is billed until the cooldown."""
+        arrivals = [Arrival(t * 60.0) for t in range(10)]
+        short = Simulator(arrivals, KedaConfig(cooldown=60), FIXED).run()
+        long = Simulator(arrivals, KedaConfig(cooldown=900), FIXED).run()
+
+        assert short.cost < long.cost
+        assert short.utilization > long.utilization
+
+    def test_trace_replays_arrivals_and_render_times(self, tmp_path):
+        """Test a JSONL trace is read relative to its first job."""
+        trace = tmp_path / "jobs.jsonl"
+        trace.write_text(
+            json.dumps({"timestamp": "2026-01-01T00:01:00Z"})
+            + "\n"
+            + json.dumps({"timestamp": "2026-01-01T00:00:00Z", "renderSeconds": 300})
+            + "\n"
+        )
+
+        assert capacity_sim.load_trace(trace) == [
+            Arrival(0.0, 300),
+            Arrival(60.0, None),
+        ]
+
+    def test_reads_repository_manifest(self):
+        """Test the KEDA parameters come from the ScaledObject manifest."""
+        pytest.importorskip("yaml")
+
+        keda = capacity_sim.load_keda_config()
+
+        assert keda.lag_threshold == 5
+        assert keda.max_replicas == 10
+        assert keda.scale_up_window == 30
@@ -0,0 +1,161 @@
+"""Unit tests for checkpointed chunk rendering.
+
+Author: Ruslan Magana (https://ruslanmv.com)
+License: Apache 2.0
+"""
+
+import hashlib
+import io
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add renderer to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "renderer"))
+
+import checkpoint
+import segments
+
+
+class FakeS3:
+    """In-memory S3 client covering the calls made by ChunkStore."""
+
+    def __init__(self):
+        self.objects = {}
+
+    def get_paginator(self, name):
+        client = self
+
+        class Paginator:
+            def paginate(self, Bucket, Prefix):
+                keys = sorted(k for k in client.objects if k.startswith(Prefix))
+                yield {"Contents": [{"Key": k} for k in keys]}
+
+        return Paginator()
+
+    def upload_file(self, Filename, Bucket, Key):
+        self.objects[Key] = Path(Filename).read_bytes()
+
+    def download_file(self, Bucket, Key, Filename):
+        Path(Filename).write_bytes(self.objects[Key])
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self.objects[Key] = Body
+        return {"ETag": f'"{hashlib.md5(Body).hexdigest()}"'}
+
+    def get_object(self, Bucket, Key):
+        return {"Body": io.BytesIO(self.objects[Key])}
+
+    def delete_objects(self, Bucket, Delete):
+        for item in Delete["Objects"]:
+            self.objects.pop(item["Key"])
+
+
+def recording_renderer(rendered, fail_at=None):
+    """Return a chunk renderer that records chunks and can simulate eviction."""
+
+    def render(chunks):
+        for index, frames, output in chunks:
+            if index == fail_at:
+                raise RuntimeError("Pod evicted")
+            segments.write_segment(frames, "", output)
+            rendered.append(index)
+            yield index
+
+    return render
+
+
+@pytest.fixture(autouse=True)
+def no_ffmpeg(monkeypatch):
+    """Use placeholder segments joined byte by byte."""
+    monkeypatch.setattr(segments, "ffmpeg_available", lambda: False)
+
+
+class TestRenderChunked:
+    """Test cases for render_chunked."""
+
+    def test_plan_is_fixed_size(self):
+        """Test chunks have a fixed length except the last."""
+        assert checkpoint.plan_chunks(10, 4) == [range(0, 4), range(4, 8), range(8, 10)]
+
+    def test_restart_skips_completed_chunks(self, tmp_path):
+        """Test a restarted job renders only the chunks missing from COS."""
+        s3 = FakeS3()
+        first, second = [], []
+
+        with pytest.raises(RuntimeError, match="evicted"):
+            checkpoint.render_chunked(
+                "job",
+                str(tmp_path / "a"),
+                10,
+                tmp_path / "a.mp4",
+                recording_renderer(first, fail_at=2),
+                checkpoint.ChunkStore(s3, "b", "job"),
+                chunk_frames=3,
+            )
+
+        output = checkpoint.render_chunked(
+            "job",
+            str(tmp_path / "b"),
+            10,
+            tmp_path / "b.mp4",
+            recording_renderer(second),
+            checkpoint.ChunkStore(s3, "b", "job"),
+            chunk_frames=3,
+        )
+
+        assert first == [0, 1]
+        assert second == [2, 3]
+        assert output.read_text().splitlines() == [
+            "Placeholder frames 0-2",
+            "Placeholder frames 3-5",
+            "Placeholder frames 6-8",
+            "Placeholder frames 9-9",
+        ]
+
+    def test_corrupted_chunk_is_rerendered(self, tmp_path):
+        """Test a chunk whose clip does not match its marker is rendered again."""
+        s3 = FakeS3()
+        store = checkpoint.ChunkStore(s3, "b", "job")
+        checkpoint.render_chunked(
+            "job",
+            str(tmp_path / "a"),
+            4,
+            tmp_path / "a.mp4",
+            recording_renderer([]),
+            store,
+            2,
+        )
+        s3.objects["chunks/job/00001.mp4"] = b"corrupt"
+
+        rendered = []
+        checkpoint.render_chunked(
+            "job",
+            str(tmp_path / "b"),
+            4,
+            tmp_path / "b.mp4",
+            recording_renderer(rendered),
+            store,
+            2,
+        )
+
+        assert rendered == [1]
+
+    def test_clear_removes_chunks(self, tmp_path):
+        """Test clear deletes every chunk and marker of the job."""
+        s3 = FakeS3()
+        store = checkpoint.ChunkStore(s3, "b", "job")
+        checkpoint.render_chunked(
+            "job",
+            str(tmp_path),
+            4,
+            tmp_path / "v.mp4",
+            recording_renderer([]),
+            store,
+            2,
+        )
+
+        store.clear()
+
+        assert s3.objects == {}
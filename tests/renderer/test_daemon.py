@@ -0,0 +1,152 @@
+"""Unit tests for the renderer Kafka consumer mode.
+
+Author: Ruslan Magana (https://ruslanmv.com)
+License: Apache 2.0
+"""
+
+import json
+import sys
+from collections import namedtuple
+from pathlib import Path
+
+import pytest
+
+# Add renderer to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "renderer"))
+
+pytest.importorskip("kafka")
+
+import daemon
+import render
+
+Record = namedtuple("Record", "topic partition offset value")
+
+
+class FakeConsumer:
+    """Consumer returning queued records one poll at a time."""
+
+    def __init__(self, values):
+        self.records = [Record("videoJob", 0, i, v) for i, v in enumerate(values)]
+        self.committed = []
+
+    def poll(self, timeout_ms, max_records):
+        if not self.records:
+            return {}
+        return {("videoJob", 0): [self.records.pop(0)]}
+
+    def commit(self, offsets):
+        self.committed.extend(o.offset for o in offsets.values())
+
+
+@pytest.fixture
+def jobs(monkeypatch):
+    """Record rendered jobs instead of rendering them."""
+    rendered = []
+    monkeypatch.setattr(
+        render, "download_assets", lambda job_id, payload: f"/tmp/{job_id}/"
+    )
+    monkeypatch.setattr(
+        render,
+        "run_job",
+        lambda payload, job_id, asset_path: rendered.append((job_id, asset_path)),
+    )
+    return rendered
+
+
+class TestRenderDaemon:
+    """Test cases for RenderDaemon."""
+
+    def test_jobs_are_prefetched_and_committed_in_order(self, jobs):
+        """Test each job uses its prefetched assets and commits its own offset."""
+        values = [json.dumps({"jobId": f"job-{i}"}).encode() for i in range(3)]
+        consumer = FakeConsumer(values)
+
+        daemon.RenderDaemon(consumer, max_jobs=3).run()
+
+        assert jobs == [(f"job-{i}", f"/tmp/job-{i}/") for i in range(3)]
+        assert consumer.committed == [1, 2, 3]
+
+    def test_failed_job_without_dlq_is_not_committed(self, monkeypatch):
+        """Test a failed render stops the daemon before its offset is committed."""
+        monkeypatch.setattr(
+            render, "download_assets", lambda job_id, payload: "/tmp/job-1/"
+        )
+
+        def fail(payload, job_id, asset_path):
+            raise RuntimeError("GPU render failed")
+
+        monkeypatch.setattr(render, "run_job", fail)
+        consumer = FakeConsumer([json.dumps({"jobId": "job-1"}).encode()])
+
+        with pytest.raises(SystemExit):
+            daemon.RenderDaemon(consumer, max_jobs=1).run()
+
+        assert consumer.committed == []
+
+    def test_undecodable_message_is_skipped(self, jobs):
+        """Test a malformed message is committed without crashing the daemon."""
+        consumer = FakeConsumer([b"not json", json.dumps({"jobId": "job-1"}).encode()])
+
+        daemon.RenderDaemon(consumer, max_jobs=1).run()
+
+        assert jobs == [("job-1", "/tmp/job-1/")]
+        assert consumer.committed == [1, 2]
+
+    def test_failed_prefetch_is_downloaded_again(self, jobs, monkeypatch):
+        """Test a job whose prefetch failed still renders, downloading inline."""
+
+        def fail(job_id, payload):
+            raise OSError("connection reset")
+
+        monkeypatch.setattr(render, "download_assets", fail)
+        consumer = FakeConsumer([json.dumps({"jobId": "job-1"}).encode()])
+
+        daemon.RenderDaemon(consumer, max_jobs=1).run()
+
+        assert jobs == [("job-1", None)]
+        assert consumer.committed == [1]
+
+    def test_failed_job_workspace_is_removed(self, tmp_path, monkeypatch):
+        """Test a failed render does not leave its assets on the node."""
+        monkeypatch.setattr(render, "RENDER_WORK_DIR", tmp_path)
+
+        def download(job_id, payload):
+            (tmp_path / job_id).mkdir()
+            return f"{tmp_path / job_id}/"
+
+        def fail(payload, job_id, asset_path):
+            raise RuntimeError("GPU render failed")
+
+        monkeypatch.setattr(render, "download_assets", download)
+        monkeypatch.setattr(render, "run_job", fail)
+        consumer = FakeConsumer([json.dumps({"jobId": "job-1"}).encode()])
+
+        with pytest.raises(SystemExit):
+            daemon.RenderDaemon(consumer, max_jobs=1).run()
+
+        assert list(tmp_path.iterdir()) == []
+
+    def test_prefetched_workspace_is_removed_on_stop(self, tmp_path, monkeypatch):
+        """Test assets prefetched for a job that never runs are removed at shutdown."""
+        monkeypatch.setattr(render, "RENDER_WORK_DIR", tmp_path)
+        rendered = []
+
+        def download(job_id, payload):
+            (tmp_path / job_id).mkdir()
+            return f"{tmp_path / job_id}/"
+
+        def render_and_stop(payload, job_id, asset_path):
+            rendered.append(job_id)
+            renderer.stop()
+
+        monkeypatch.setattr(render, "download_assets", download)
+        monkeypatch.setattr(render, "run_job", render_and_stop)
+        values = [json.dumps({"jobId": f"job-{i}"}).encode() for i in range(2)]
+        consumer = FakeConsumer(values)
+        renderer = daemon.RenderDaemon(consumer)
+
+        renderer.run()
+
+        assert rendered == ["job-0"]
+        assert consumer.committed == [1]
+        assert list(tmp_path.iterdir()) == []
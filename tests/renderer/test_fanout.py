@@ -0,0 +1,68 @@
+"""Unit tests for joining parallel-rendered parts.
+
+Author: Ruslan Magana (https://ruslanmv.com)
+License: Apache 2.0
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add renderer to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "renderer"))
+
+import checkpoint
+import fanout
+import render
+import segments
+from test_checkpoint import FakeS3
+
+
+@pytest.fixture
+def s3(tmp_path, monkeypatch):
+    """Route COS calls to memory and uploads to a list."""
+    client = FakeS3()
+    uploads = []
+    monkeypatch.setattr(segments, "ffmpeg_available", lambda: False)
+    monkeypatch.setattr(render, "get_s3_client", lambda: client)
+    monkeypatch.setattr(render, "RENDER_WORK_DIR", tmp_path / "work")
+    monkeypatch.setattr(
+        render,
+        "upload_result",
+        lambda job_id, name, path: uploads.append((Path(path) / name).read_bytes())
+        or f"videos/{name}",
+    )
+    client.uploads = uploads
+    return client
+
+
+def store_parts(client, tmp_path, contents):
+    """Store clips the way render_part does."""
+    store = checkpoint.ChunkStore(client, render.COS_BUCKET, "job-1")
+    for index, content in enumerate(contents):
+        clip = tmp_path / f"part{index}.mp4"
+        clip.write_bytes(content)
+        store.save(index, range(len(content)), clip)
+
+
+class TestMergeParts:
+    """Test cases for merge_parts."""
+
+    def test_parts_are_joined_in_order(self, s3, tmp_path):
+        """Test the uploaded video is the parts in index order, then parts are removed."""
+        store_parts(s3, tmp_path, [b"first ", b"second ", b"third"])
+
+        url = fanout.merge_parts("job-1", 3)
+
+        assert url == "videos/job-1.mp4"
+        assert s3.uploads == [b"first second third"]
+        assert s3.objects == {}
+
+    def test_missing_part_fails(self, s3, tmp_path):
+        """Test the merge refuses to join an incomplete set of parts."""
+        store_parts(s3, tmp_path, [b"first ", b"second "])
+
+        with pytest.raises(RuntimeError, match=r"\[2\]"):
+            fanout.merge_parts("job-1", 3)
+        assert s3.uploads == []
@@ -0,0 +1,145 @@
+"""Unit tests for incremental re-rendering.
+
+Author: Ruslan Magana (https://ruslanmv.com)
+License: Apache 2.0
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add renderer to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "renderer"))
+
+import incremental
+import segments
+from test_checkpoint import FakeS3
+
+
+class NotFound(Exception):
+    """botocore-style 404 error."""
+
+    response = {"Error": {"Code": "404"}}
+
+
+class Unreachable(Exception):
+    """botocore-style connection error, which has ``response = None``."""
+
+    response = None
+
+
+class SegmentS3(FakeS3):
+    """In-memory S3 client that also keeps object metadata."""
+
+    def __init__(self):
+        super().__init__()
+        self.metadata = {}
+
+    def upload_file(self, Filename, Bucket, Key, ExtraArgs=None):
+        super().upload_file(Filename, Bucket, Key)
+        self.metadata[Key] = (ExtraArgs or {}).get("Metadata", {})
+
+    def head_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise NotFound()
+        return {"ContentLength": len(self.objects[Key]), "Metadata": self.metadata[Key]}
+
+
+@pytest.fixture(autouse=True)
+def no_ffmpeg(monkeypatch):
+    """Join placeholder segments byte by byte."""
+    monkeypatch.setattr(segments, "ffmpeg_available", lambda: False)
+
+
+def render(tmp_path, payload, store, rendered):
+    """Render a payload, recording which slide texts were rendered."""
+
+    def render_segment(text, output):
+        rendered.append(text)
+        output.write_text(f"[{text}]")
+
+    output = tmp_path / "video.mp4"
+    incremental.render_incremental(
+        "job-1", payload, str(tmp_path), output, render_segment, store
+    )
+    return output.read_text()
+
+
+class TestIncrementalRender:
+    """Test cases for render_incremental."""
+
+    def test_script_splits_like_the_slide_editor(self):
+        """Test slides are separated by blank lines."""
+        assert incremental.split_segments("One.\n\n\nTwo.\n  \nThree.") == [
+            "One.",
+            "Two.",
+            "Three.",
+        ]
+        assert incremental.split_segments("Only one.") == ["Only one."]
+
+    def test_hash_covers_voice_avatar_and_quality(self):
+        """Test every rendering input changes the segment hash."""
+        base = incremental.segment_hash("Hi.", "voice", "avatar", "1080p")
+
+        assert base == incremental.segment_hash("Hi.", "voice", "avatar", "1080p")
+        assert base != incremental.segment_hash("Hi!", "voice", "avatar", "1080p")
+        assert base != incremental.segment_hash("Hi.", "other", "avatar", "1080p")
+        assert base != incremental.segment_hash("Hi.", "voice", "other", "1080p")
+        assert base != incremental.segment_hash("Hi.", "voice", "avatar", "720p")
+
+    def test_edit_renders_only_the_changed_slide(self, tmp_path):
+        """Test unchanged slides are reused after an edit."""
+        store = incremental.SegmentStore(SegmentS3(), "bucket")
+        payload = {"script": "One.\n\nTwo.\n\nThree.", "voice": "v", "avatar": "a"}
+        first, second = [], []
+
+        render(tmp_path, payload, store, first)
+        video = render(
+            tmp_path,
+            {**payload, "script": "One.\n\nTwo, edited.\n\nThree."},
+            store,
+            second,
+        )
+
+        assert first == ["One.", "Two.", "Three."]
+        assert second == ["Two, edited."]
+        assert video == "[One.][Two, edited.][Three.]"
+
+    def test_new_voice_renders_everything(self, tmp_path):
+        """Test segments are not shared across voices."""
+        store = incremental.SegmentStore(SegmentS3(), "bucket")
+        payload = {"script": "One.\n\nTwo.", "voice": "v", "avatar": "a"}
+        rendered = []
+
+        render(tmp_path, payload, store, [])
+        render(tmp_path, {**payload, "voice": "w"}, store, rendered)
+
+        assert rendered == ["One.", "Two."]
+
+    def test_corrupt_segment_is_rendered_again(self, tmp_path):
+        """Test a stored segment that fails its MD5 check is not used."""
+        s3 = SegmentS3()
+        store = incremental.SegmentStore(s3, "bucket")
+        payload = {"script": "One.", "voice": "v", "avatar": "a"}
+        render(tmp_path, payload, store, [])
+        key = next(iter(s3.objects))
+        s3.objects[key] = b"truncated"
+        rendered = []
+
+        assert render(tmp_path, payload, store, rendered) == "[One.]"
+        assert rendered == ["One."]
+
+    def test_connection_error_is_raised(self, tmp_path):
+        """Test an error without a response is not mistaken for a missing segment."""
+        s3 = SegmentS3()
+
+        def head_object(Bucket, Key):
+            raise Unreachable()
+
+        s3.head_object = head_object
+
+        with pytest.raises(Unreachable):
+            incremental.SegmentStore(s3, "bucket").fetch(
+                "0" * 64, tmp_path / "clip.mp4"
+            )
@@ -0,0 +1,109 @@
+"""Unit tests for job message envelopes and claim checks.
+
+Author: Ruslan Magana (https://ruslanmv.com)
+License: Apache 2.0
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add renderer and the producing service to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "renderer"))
+sys.path.insert(
+    0, str(Path(__file__).parent.parent.parent / "services" / "orchestrate-service")
+)
+
+import envelope
+import job_message
+
+
+class FakeStore(envelope.ClaimStore):
+    """Claim store keeping objects in memory."""
+
+    def __init__(self):
+        self.objects = {}
+        super().__init__(self, "bucket")
+
+    def put_object(self, Bucket, Key, Body):
+        self.objects[(Bucket, Key)] = Body
+
+    def fetch(self, reference):
+        return self.objects[(reference["bucket"], reference["key"])]
+
+
+def message(size=100):
+    """Return a job message with a script of roughly ``size`` characters."""
+    return {
+        "jobId": "job-1",
+        "avatar": "john_doe",
+        "script": "word " * (size // 5),
+        "slides": [{"index": 1}],
+    }
+
+
+@pytest.fixture(autouse=True)
+def envelopes(monkeypatch):
+    """Publish envelopes, which are off by default."""
+    monkeypatch.setattr(envelope, "MESSAGE_ENVELOPE", True)
+
+
+class TestJobMessage:
+    """Test cases for envelope encoding and decoding."""
+
+    def test_disabled_envelope_publishes_plain_json(self, monkeypatch):
+        """Test consumers that parse JSON can read messages with envelopes off."""
+        monkeypatch.setattr(envelope, "MESSAGE_ENVELOPE", False)
+
+        assert json.loads(envelope.encode(message())) == message()
+
+    def test_plain_json_still_decodes(self):
+        """Test messages of older producers are accepted."""
+        assert job_message.decode(json.dumps(message()).encode()) == message()
+
+    @pytest.mark.parametrize("size", [100, 20000])
+    def test_round_trip(self, size):
+        """Test small and compressed envelopes decode to the original."""
+        value = envelope.encode(message(size))
+
+        assert value.startswith(job_message.MAGIC)
+        assert job_message.decode(value) == message(size)
+
+    def test_large_bodies_are_compressed(self):
+        """Test bodies above the threshold get a compression byte."""
+        value = envelope.encode(message(20000))
+
+        assert value[5:6] in (envelope.COMPRESSION_ZLIB, envelope.COMPRESSION_ZSTD)
+        assert len(value) < len(json.dumps(message(20000))) / 10
+
+    def test_claim_check_round_trip(self, monkeypatch):
+        """Test an oversized envelope is stored and fetched by reference."""
+        monkeypatch.setattr(envelope, "CLAIM_CHECK_BYTES", 64)
+        store = FakeStore()
+
+        value = envelope.encode(message(), store)
+
+        assert value[4:5] == envelope.FORMAT_CLAIM
+        assert len(store.objects) == 1
+        assert job_message.decode(value, store.fetch) == message()
+
+    def test_claim_check_is_verified(self, monkeypatch):
+        """Test a stored payload that does not match its checksum is rejected."""
+        monkeypatch.setattr(envelope, "CLAIM_CHECK_BYTES", 64)
+        store = FakeStore()
+        value = envelope.encode(message(), store)
+        key = next(iter(store.objects))
+        store.objects[key] = store.objects[key][:-1] + b"x"
+
+        with pytest.raises(ValueError, match="does not match"):
+            job_message.decode(value, store.fetch)
+
+    def test_unknown_version_is_rejected(self):
+        """Test envelopes of a newer producer fail loudly."""
+        value = envelope.encode(message())
+        value = value[:3] + bytes([envelope.VERSION + 1]) + value[4:]
+
+        with pytest.raises(ValueError, match="version"):
+            job_message.decode(value)
@@ -0,0 +1,45 @@
+"""Unit tests for the renderer rendition ladder.
+
+Author: Ruslan Magana (https://ruslanmv.com)
+License: Apache 2.0
+"""
+
+import sys
+from pathlib import Path
+
+# Add renderer to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "renderer"))
+
+import ladder
+import render
+
+
+class TestLadder:
+    """Test cases for the rendition ladder."""
+
+    def test_ladder_never_upscales(self):
+        """Test rungs above the source height are dropped."""
+        rungs = ladder.renditions([360, 1080, 720], source_height=720)
+
+        assert [r.name for r in rungs] == ["720p", "360p"]
+        assert rungs[0].bitrate == 2800
+
+    def test_single_decode_feeds_every_rendition(self):
+        """Test one split filter fans the decoded source out to each encoder."""
+        rungs = ladder.renditions([1080, 720, 360])
+        command = ladder.ladder_command(Path("in.mp4"), Path("out"), rungs, audio=True)
+
+        assert command.count("-i") == 1
+        graph = command[command.index("-filter_complex") + 1]
+        assert graph.startswith("[0:v]split=3[s0][s1][s2];")
+        assert "[s2]scale=-2:360[v2]" in graph
+        stream_map = command[command.index("-var_stream_map") + 1]
+        assert stream_map == "v:0,a:0,name:1080p v:1,a:1,name:720p v:2,a:2,name:360p"
+
+    def test_content_type_by_extension(self):
+        """Test playlists and segments get streaming content types."""
+        assert (
+            render.content_type(Path("master.m3u8")) == "application/vnd.apple.mpegurl"
+        )
+        assert render.content_type(Path("720p/segment_00001.ts")) == "video/mp2t"
+        assert render.content_type(Path("job.mp4")) == "video/mp4"
@@ -0,0 +1,150 @@
+"""Unit tests for avatar popularity tracking and cache warm-up.
+
+Author: Ruslan Magana (https://ruslanmv.com)
+License: Apache 2.0
+"""
+
+import io
+import json
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Add renderer to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "renderer"))
+
+import popularity
+from asset_cache import AssetCache
+
+
+class NoSuchKey(Exception):
+    """Stand-in for botocore's ClientError on a missing object."""
+
+    response = {"Error": {"Code": "NoSuchKey"}}
+
+
+class NotModified(Exception):
+    """Stand-in for botocore's ClientError on a 304 response."""
+
+    response = {"Error": {"Code": "304"}}
+
+
+class FakeS3:
+    """In-memory S3 client with per-object modification times."""
+
+    def __init__(self):
+        self.objects = {}
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self.objects[Key] = (Body, datetime.now(timezone.utc))
+
+    def get_object(self, Bucket, Key, IfNoneMatch=None):
+        if Key not in self.objects:
+            raise NoSuchKey()
+        if IfNoneMatch == '"e"':
+            raise NotModified()
+        return {"Body": io.BytesIO(self.objects[Key][0]), "ETag": '"e"'}
+
+    def get_paginator(self, name):
+        client = self
+
+        class Paginator:
+            def paginate(self, Bucket, Prefix):
+                contents = [
+                    {"Key": key, "LastModified": modified}
+                    for key, (_, modified) in sorted(client.objects.items())
+                    if key.startswith(Prefix)
+                ]
+                yield {"Contents": contents}
+
+        return Paginator()
+
+
+class TestPopularity:
+    """Test cases for popularity tracking."""
+
+    def test_counts_from_all_recent_pods_are_merged(self):
+        """Test top avatars sum the per-node counts and skip stale nodes."""
+        s3 = FakeS3()
+        for node, avatars in (
+            ("node-a", ["alice", "bob", "alice"]),
+            ("node-b", ["bob", "bob", "carol"]),
+        ):
+            tracker = popularity.PopularityTracker(s3, "b", node=node)
+            for avatar in avatars:
+                tracker.record(avatar)
+            tracker.flush()
+        stale = json.dumps({"avatars": {"dave": 100}}).encode()
+        s3.objects["stats/avatar-popularity/old.json"] = (
+            stale,
+            datetime.now(timezone.utc) - timedelta(days=30),
+        )
+
+        assert popularity.top_avatars(s3, "b", limit=2) == ["bob", "alice"]
+
+    def test_replaced_pod_keeps_its_node_counts(self):
+        """Test a new tracker on the same node adds to the stored counts."""
+        s3 = FakeS3()
+        first = popularity.PopularityTracker(s3, "b", node="node-a")
+        first.record("alice")
+        first.flush()
+
+        second = popularity.PopularityTracker(s3, "b", node="node-a")
+        second.record("alice")
+        second.flush()
+
+        stored = json.loads(s3.objects["stats/avatar-popularity/node-a.json"][0])
+        assert stored["avatars"] == {"alice": 2}
+
+    def test_counts_are_flushed_in_batches(self, monkeypatch):
+        """Test maybe_flush writes only once POPULARITY_FLUSH_JOBS renders are pending."""
+        monkeypatch.setattr(popularity, "POPULARITY_FLUSH_JOBS", 3)
+        s3 = FakeS3()
+        tracker = popularity.PopularityTracker(s3, "b", node="node-a")
+
+        for avatar in ("alice", "bob"):
+            tracker.record(avatar)
+            tracker.maybe_flush()
+        assert s3.objects == {}
+
+        tracker.record("alice")
+        tracker.maybe_flush()
+
+        stored = json.loads(s3.objects["stats/avatar-popularity/node-a.json"][0])
+        assert stored["avatars"] == {"alice": 2, "bob": 1}
+        assert not tracker.pending
+
+    def test_failed_flush_keeps_pending_counts(self):
+        """Test counts that could not be written are written by the next flush."""
+        s3 = FakeS3()
+        tracker = popularity.PopularityTracker(s3, "b", node="node-a")
+        tracker.record("alice")
+
+        def unavailable(**kwargs):
+            raise ConnectionError("COS unavailable")
+
+        s3.put_object = unavailable
+        tracker.flush()
+        del s3.put_object
+        tracker.flush()
+
+        stored = json.loads(s3.objects["stats/avatar-popularity/node-a.json"][0])
+        assert stored["avatars"] == {"alice": 1}
+
+    def test_prefetch_warms_cache(self, tmp_path):
+        """Test the prefetch thread loads popular avatars into the cache."""
+        s3 = FakeS3()
+        tracker = popularity.PopularityTracker(s3, "b", node="node-a")
+        tracker.record("alice")
+        tracker.flush()
+        s3.put_object("b", "avatars/alice.png", b"png")
+        cache = AssetCache(tmp_path, max_bytes=1024)
+
+        thread = popularity.start_prefetch(s3, "b", cache, lambda a: f"avatars/{a}.png")
+        thread.join(timeout=5)
+
+        assert cache.stats()["warmed"] == 1
+        assert cache.fetch(
+            s3, "b", "avatars/alice.png", tmp_path / "job" / "avatar.png"
+        ).hit
+        assert (cache.stats()["hits"], cache.stats()["misses"]) == (1, 0)
@@ -0,0 +1,76 @@
+"""Unit tests for the renderer segment helpers and CPU backend.
+
+Author: Ruslan Magana (https://ruslanmv.com)
+License: Apache 2.0
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# Add renderer to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "renderer"))
+
+import cpu_backend
+import segments
+
+
+class TestFrameRanges:
+    """Test cases for frame_ranges."""
+
+    def test_ranges_cover_all_frames_in_order(self):
+        """Test ranges are contiguous and balanced."""
+        ranges = segments.frame_ranges(10, 3)
+
+        assert ranges == [range(0, 4), range(4, 7), range(7, 10)]
+
+    def test_more_parts_than_frames(self):
+        """Test no empty ranges are produced."""
+        assert segments.frame_ranges(2, 8) == [range(0, 1), range(1, 2)]
+
+
+class TestCpuBackend:
+    """Test cases for the CPU render backend."""
+
+    def test_physical_cores_are_allowed_cpus(self):
+        """Test one CPU per core is chosen from the affinity mask."""
+        cores = cpu_backend.physical_cores()
+
+        assert cores
+        assert set(cores) <= os.sched_getaffinity(0)
+
+    def test_production_segments_skip_synthetic_work(self, tmp_path, monkeypatch):
+        """Test the synthetic model workload only runs when a caller asks for it."""
+        monkeypatch.setattr(segments, "FFMPEG_BIN", "ffmpeg-missing")
+        calls = []
+        monkeypatch.setattr(
+            cpu_backend, "_synthetic_frame", lambda index, work: calls.append(index)
+        )
+
+        cpu_backend.render_segment(range(3), str(tmp_path), str(tmp_path / "a.mp4"))
+        cpu_backend.render_segment(
+            range(3), str(tmp_path), str(tmp_path / "b.mp4"), work=1
+        )
+
+        assert calls == [0, 1, 2]
+
+    def test_segments_are_merged_in_order(self, tmp_path, monkeypatch):
+        """Test the pool output is joined in frame order."""
+        # Spawned workers re-read FFMPEG_BIN, so hide ffmpeg through the environment
+        monkeypatch.setenv("FFMPEG_BIN", "ffmpeg-missing")
+        monkeypatch.setattr(segments, "FFMPEG_BIN", "ffmpeg-missing")
+        output = tmp_path / "video.mp4"
+
+        cpu_backend.shutdown_pool()
+        try:
+            cpu_backend.render_frames(
+                "job", str(tmp_path), 9, output, workers=3, work=1
+            )
+        finally:
+            cpu_backend.shutdown_pool()
+
+        assert output.read_text().splitlines() == [
+            "Placeholder frames 0-2",
+            "Placeholder frames 3-5",
+            "Placeholder frames 6-8",
+        ]
@@ -0,0 +1,61 @@
+"""Unit tests for renderer start-up profiling and the device probe cache.
+
+Author: Ruslan Magana (https://ruslanmv.com)
+License: Apache 2.0
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add renderer to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "renderer"))
+
+import startup
+
+
+@pytest.fixture
+def probes(monkeypatch):
+    """Count device probes and start each test without an in-process result."""
+    calls = []
+
+    def probe():
+        calls.append(1)
+        return {"device": "cuda", "name": "A100", "memoryGb": 40.0}
+
+    monkeypatch.setattr(startup, "_probe_torch", probe)
+    monkeypatch.setattr(startup, "_device", None)
+    return calls
+
+
+class TestStartup:
+    """Test cases for start-up helpers."""
+
+    def test_probe_is_cached_per_node(self, tmp_path, probes, monkeypatch):
+        """Test a second process on the same node reads the cached probe."""
+        path = tmp_path / "device.json"
+        first = startup.probe_device(path)
+        monkeypatch.setattr(startup, "_device", None)
+
+        assert startup.probe_device(path) == first
+        assert len(probes) == 1
+
+    def test_probe_repeated_when_node_changes(self, tmp_path, probes, monkeypatch):
+        """Test a changed driver or GPU assignment invalidates the cache."""
+        path = tmp_path / "device.json"
+        startup.probe_device(path)
+        monkeypatch.setattr(startup, "_device", None)
+        monkeypatch.setenv("NVIDIA_VISIBLE_DEVICES", "GPU-other")
+
+        startup.probe_device(path)
+
+        assert len(probes) == 2
+
+    def test_profile_lists_direct_imports(self):
+        """Test the import profile reports the module first, then its imports."""
+        timings = startup.profile_imports("json")
+
+        assert timings[0].module == "json"
+        assert "json.decoder" in [t.module for t in timings[1:]]
+        assert startup.profile_imports("no_such_module") == []
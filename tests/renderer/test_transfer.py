@@ -0,0 +1,225 @@
+"""Unit tests for the renderer multipart transfers.
+
+Author: Ruslan Magana (https://ruslanmv.com)
+License: Apache 2.0
+"""
+
+import hashlib
+import io
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add renderer to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "renderer"))
+
+import transfer
+
+
+class AccessDenied(Exception):
+    """Stand-in for botocore's ClientError on a request that cannot succeed."""
+
+    response = {
+        "Error": {"Code": "AccessDenied"},
+        "ResponseMetadata": {"HTTPStatusCode": 403},
+    }
+
+
+class SlowDown(Exception):
+    """Stand-in for botocore's ClientError on a throttled request."""
+
+    response = {
+        "Error": {"Code": "SlowDown"},
+        "ResponseMetadata": {"HTTPStatusCode": 503},
+    }
+
+
+class FakeS3:
+    """In-memory S3 client implementing the multipart API.
+
+    With ``encrypted`` it assigns ETags that are not MD5s, like SSE-KMS.
+    """
+
+    def __init__(self, fail_parts=(), encrypted=False):
+        self.fail_parts = set(fail_parts)
+        self.encrypted = encrypted
+        self.uploads = {}
+        self.objects = {}
+        self.part_calls = []
+        self.aborted = []
+
+    def _etag(self, body):
+        salt = b"kms" if self.encrypted else b""
+        return f'"{hashlib.md5(salt + body).hexdigest()}"'
+
+    def put_object(self, Bucket, Key, Body, ContentMD5, **kwargs):
+        self.objects[Key] = Body
+        return {"ETag": self._etag(Body)}
+
+    def create_multipart_upload(self, Bucket, Key, **kwargs):
+        upload_id = f"upload-{len(self.uploads)}"
+        self.uploads[upload_id] = {}
+        return {"UploadId": upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body, ContentMD5):
+        self.part_calls.append(PartNumber)
+        if PartNumber in self.fail_parts:
+            self.fail_parts.discard(PartNumber)
+            raise SlowDown()
+        etag = self._etag(Body)
+        self.uploads[UploadId][PartNumber] = (Body, etag)
+        return {"ETag": etag}
+
+    def list_parts(self, Bucket, Key, UploadId, PartNumberMarker=0):
+        parts = self.uploads[UploadId]
+        return {
+            "Parts": [
+                {"PartNumber": n, "ETag": parts[n][1], "Size": len(parts[n][0])}
+                for n in sorted(parts)
+            ],
+            "IsTruncated": False,
+        }
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        parts = self.uploads.pop(UploadId)
+        numbers = [p["PartNumber"] for p in MultipartUpload["Parts"]]
+        if any(
+            p["ETag"] != parts[p["PartNumber"]][1] for p in MultipartUpload["Parts"]
+        ):
+            raise ValueError("InvalidPart")
+        self.objects[Key] = b"".join(parts[n][0] for n in numbers)
+        digests = [hashlib.md5(parts[n][0]).digest() for n in numbers]
+        if self.encrypted:
+            return {"ETag": self._etag(self.objects[Key])}
+        return {"ETag": transfer.composite_etag(digests)}
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.uploads.pop(UploadId)
+        self.aborted.append(UploadId)
+
+
+@pytest.fixture(autouse=True)
+def small_parts(monkeypatch):
+    """Allow tiny parts and skip retry back-off."""
+    monkeypatch.setattr(transfer, "MIN_PART_SIZE", 1)
+    monkeypatch.setattr(transfer, "_backoff", lambda attempt: None)
+
+
+class TestMultipartUpload:
+    """Test cases for resumable multipart uploads."""
+
+    @pytest.mark.parametrize("encrypted", [False, True])
+    def test_upload_resumes_from_completed_parts(
+        self, tmp_path, monkeypatch, encrypted
+    ):
+        """Test an interrupted upload resumes by sending only the missing part."""
+        video = tmp_path / "video.mp4"
+        video.write_bytes(bytes(range(250)) * 4)
+        s3 = FakeS3(fail_parts={3}, encrypted=encrypted)
+
+        monkeypatch.setattr(transfer, "TRANSFER_MAX_ATTEMPTS", 1)
+        upload = transfer.MultipartUpload(s3, video, "b", "videos/v.mp4", part_size=300)
+        with pytest.raises(SlowDown):
+            upload.run()
+        assert (tmp_path / "video.mp4.upload.json").exists()
+
+        monkeypatch.setattr(transfer, "TRANSFER_MAX_ATTEMPTS", 5)
+        s3.part_calls.clear()
+        transfer.upload_file(s3, video, "b", "videos/v.mp4", part_size=300, threshold=1)
+
+        assert s3.part_calls == [3]
+        assert s3.objects["videos/v.mp4"] == video.read_bytes()
+        assert not (tmp_path / "video.mp4.upload.json").exists()
+
+    def test_transient_errors_are_retried(self, tmp_path):
+        """Test upload_file retries throttled parts without restarting the upload."""
+        video = tmp_path / "video.mp4"
+        video.write_bytes(b"x" * 1000)
+        s3 = FakeS3(fail_parts={2})
+
+        transfer.upload_file(s3, video, "b", "k", part_size=400, threshold=1)
+
+        assert sorted(s3.part_calls) == [1, 2, 2, 3]
+        assert s3.objects["k"] == video.read_bytes()
+
+    def test_encrypted_upload_is_not_rejected(self, tmp_path):
+        """Test ETags that are not MD5s (SSE-KMS, SSE-C) pass by default."""
+        video = tmp_path / "video.mp4"
+        video.write_bytes(b"e" * 1000)
+        s3 = FakeS3(encrypted=True)
+
+        transfer.upload_file(s3, video, "b", "k", part_size=400, threshold=1)
+        transfer.upload_file(s3, video, "b", "small", threshold=10_000)
+
+        assert s3.objects["k"] == video.read_bytes()
+
+    def test_failed_upload_is_aborted(self, tmp_path):
+        """Test an upload that fails for good is aborted and not resumed."""
+        video = tmp_path / "video.mp4"
+        video.write_bytes(b"a" * 1000)
+        s3 = FakeS3()
+
+        def deny(**kwargs):
+            raise AccessDenied()
+
+        s3.upload_part = deny
+        with pytest.raises(AccessDenied):
+            transfer.upload_file(s3, video, "b", "k", part_size=400, threshold=1)
+
+        assert s3.aborted == ["upload-0"]
+        assert not (tmp_path / "video.mp4.upload.json").exists()
+
+    def test_corrupted_part_is_rejected(self, tmp_path, monkeypatch):
+        """Test a part whose ETag differs from its MD5 fails a verified upload."""
+        monkeypatch.setattr(transfer, "TRANSFER_VERIFY_ETAG", True)
+        video = tmp_path / "video.mp4"
+        video.write_bytes(b"y" * 100)
+        s3 = FakeS3()
+        s3.upload_part = lambda **kwargs: {"ETag": '"0000"'}
+        upload = transfer.MultipartUpload(s3, video, "b", "k", part_size=60)
+
+        with pytest.raises(transfer.ChecksumError):
+            upload.run()
+
+
+class BrokenStream:
+    """Stream that yields some data and then fails like a crashed encoder."""
+
+    def __init__(self, data):
+        self.data = data
+
+    def read(self, size):
+        if not self.data:
+            raise RuntimeError("Encoder failed")
+        chunk, self.data = self.data[:size], self.data[size:]
+        return chunk
+
+
+class TestUploadStream:
+    """Test cases for streaming multipart uploads."""
+
+    def test_stream_is_uploaded_in_parts(self):
+        """Test a stream is split into parts and reassembled in order."""
+        data = bytes(range(256)) * 10
+        s3 = FakeS3()
+
+        etag = transfer.upload_stream(
+            s3, io.BytesIO(data), "b", "k", part_size=1000, concurrency=2
+        )
+
+        assert s3.objects["k"] == data
+        assert sorted(s3.part_calls) == [1, 2, 3]
+        assert etag.endswith('-3"')
+
+    def test_failed_stream_aborts_upload(self):
+        """Test an encoder failure aborts instead of completing a truncated object."""
+        s3 = FakeS3()
+
+        with pytest.raises(RuntimeError, match="Encoder failed"):
+            transfer.upload_stream(
+                s3, BrokenStream(b"z" * 2500), "b", "k", part_size=1000
+            )
+
+        assert s3.aborted == ["upload-0"]
+        assert "k" not in s3.objects